@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import AuctionListing, Comment, Bid
+from .models import AuctionListing, Comment, Bid, Notification, Task
 
 # Registra los modelos en la administración de Django
 admin.site.register(AuctionListing)
 admin.site.register(Comment)
-admin.site.register(Bid)
\ No newline at end of file
+admin.site.register(Bid)
+admin.site.register(Notification)
+admin.site.register(Task)
@@ -0,0 +1,170 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Min, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln, TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import AuctionListing, Bid
+
+try:
+    import numpy
+except ImportError:  # El análisis por lotes es opcional; el resto del módulo no necesita NumPy.
+    numpy = None
+
+# Subastas más activas. Cada subasta guarda en hot_key el logaritmo de la suma de exp(t / HOT_WINDOW)
+# de sus ofertas, con t en segundos desde HOT_EPOCH. Así exp(hot_key - ahora / HOT_WINDOW) es su número
+# de ofertas con decaimiento exponencial de una hora: una oferta de ahora cuenta 1, una de hace una hora
+# 0.37. Como todas las subastas decaen al mismo ritmo, ordenar por hot_key es ordenar por velocidad en
+# cualquier instante, y el ranking se lee con el índice (is_active, -hot_key) sin recalcular nada.
+HOT_WINDOW = 3600
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HOT_MIN_VELOCITY = 0.01  # Por debajo, la subasta ya no aparece en el ranking.
+HOT_REBUILD_HOURS = 24  # Ofertas más antiguas pesan menos de exp(-24) y se ignoran al reconstruir.
+MAX_HOT = 100
+
+CENT = Decimal("0.01")
+BUCKETS = {"minute": TruncMinute, "hour": TruncHour, "day": TruncDay}
+
+
+def _hot_time(moment):
+    return (moment - HOT_EPOCH).total_seconds() / HOT_WINDOW
+
+
+# Expresión para el UPDATE de una oferta aceptada en `now`: hot_key = log(exp(hot_key) + exp(x)),
+# calculado como max + log(1 + exp(-|diferencia|)) para que no desborde.
+def hot_key_update(now):
+    x = Value(_hot_time(now))
+    return Case(
+        When(hot_key__isnull=True, then=x),
+        default=Greatest(F("hot_key"), x) + Ln(Value(1.0) + Exp(-Abs(F("hot_key") - x))),
+    )
+
+
+def velocity(hot_key, now=None):
+    if hot_key is None:
+        return 0.0
+    return math.exp(hot_key - _hot_time(now or timezone.now()))
+
+
+# Las `limit` subastas activas con más ofertas recientes, con su velocidad (ofertas por hora con
+# decaimiento). Una sola consulta que recorre `limit` entradas del índice.
+def hottest(limit=10, now=None):
+    now = now or timezone.now()
+    threshold = _hot_time(now) + math.log(HOT_MIN_VELOCITY)
+    rows = list(
+        AuctionListing.objects.filter(is_active=True, hot_key__gt=threshold)
+        .order_by("-hot_key")
+        .values("id", "title", "current_price", "bid_count", "hot_key")[:limit]
+    )
+    for row in rows:
+        row["bid_velocity"] = round(velocity(row.pop("hot_key"), now), 3)
+    return rows
+
+
+# Recalcula hot_key de todas las subastas a partir de las ofertas de las últimas HOT_REBUILD_HOURS horas;
+# sirve para rellenarlo tras la migración o corregirlo si se insertaron ofertas sin pasar por place_bid.
+def rebuild_hot_keys(now=None, batch_size=1000):
+    now = now or timezone.now()
+    since = now - timedelta(hours=HOT_REBUILD_HOURS)
+    recent = Bid.objects.filter(bid_time__gte=since, bid_time__lte=now)
+    times = defaultdict(list)
+    for listing_id, bid_time in recent.values_list("listing_id", "bid_time").iterator(chunk_size=batch_size):
+        times[listing_id].append(_hot_time(bid_time))
+
+    listings = []
+    for listing_id, values in times.items():
+        top = max(values)
+        listings.append(AuctionListing(id=listing_id, hot_key=top + math.log(sum(math.exp(x - top) for x in values))))
+    # Las subastas sin ofertas en la ventana se filtran con una subconsulta y no con la lista de ids, que
+    # necesitaría un parámetro por subasta y superaría el límite de parámetros de SQLite.
+    with transaction.atomic():
+        AuctionListing.objects.exclude(id__in=Bid.objects.filter(bid_time__gte=since).values("listing_id")).exclude(hot_key=None).update(hot_key=None)
+        AuctionListing.objects.bulk_update(listings, ["hot_key"], batch_size=batch_size)
+    return len(listings)
+
+
+# Historial de precios de una subasta agrupado por minuto, hora o día, con el índice (listing, bid_time).
+# Las ofertas aceptadas siempre suben el precio, así que el máximo de cada intervalo es su precio final.
+def bid_history(listing_id, bucket="hour"):
+    rows = list(
+        Bid.objects.filter(listing_id=listing_id)
+        .annotate(bucket=BUCKETS[bucket]("bid_time"))
+        .order_by("bucket")
+        .values("bucket")
+        .annotate(bids=Count("id"), low=Min("amount"), high=Max("amount"))
+    )
+    for row in rows:  # SQLite devuelve los agregados de un DecimalField sin sus decimales.
+        row["low"], row["high"] = row["low"].quantize(CENT), row["high"].quantize(CENT)
+    return rows
+
+
+# Análisis por lotes con NumPy sobre las ofertas exportadas como arrays (ver el comando bid_analytics).
+
+BID_ARRAYS = ("listing", "bidder", "amount", "time")
+
+
+# Exporta las ofertas a arrays de NumPy ordenados por (subasta, momento); `time` en segundos Unix.
+def bid_arrays(queryset=None, chunk_size=10000):
+    queryset = Bid.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("listing_id", "bid_time", "id").values_list("listing_id", "bidder_id", "amount", "bid_time")
+    columns = {name: [] for name in BID_ARRAYS}
+    for listing_id, bidder_id, amount, bid_time in rows.iterator(chunk_size=chunk_size):
+        columns["listing"].append(listing_id)
+        columns["bidder"].append(bidder_id)
+        columns["amount"].append(float(amount))
+        columns["time"].append(bid_time.timestamp())
+    return {
+        "listing": numpy.array(columns["listing"], dtype=numpy.int64),
+        "bidder": numpy.array(columns["bidder"], dtype=numpy.int64),
+        "amount": numpy.array(columns["amount"], dtype=numpy.float64),
+        "time": numpy.array(columns["time"], dtype=numpy.float64),
+    }
+
+
+# Estadísticas por subasta y de toda la muestra, sin bucles de Python por oferta: cada subasta es un
+# tramo contiguo de los arrays y se agrega con reduceat.
+def analyze_bids(arrays, now=None, window=HOT_WINDOW, top=10):
+    listing, bidder, amount, times = (arrays[name] for name in BID_ARRAYS)
+    if not len(listing):
+        return {"bids": 0, "listings": [], "top_bidders": []}
+    now = (now or timezone.now()).timestamp()
+
+    listing_ids, starts, counts = numpy.unique(listing, return_index=True, return_counts=True)
+    ends = starts + counts - 1
+    first_price, last_price = amount[starts], amount[ends]
+    duration = times[ends] - times[starts]
+    recent = numpy.add.reduceat((times >= now - window).astype(numpy.int64), starts)
+
+    # Intervalos entre ofertas consecutivas de la misma subasta (se descarta el salto entre subastas).
+    gaps = numpy.diff(times)
+    same_listing = listing[1:] == listing[:-1]
+    gap_sums = numpy.bincount(numpy.searchsorted(listing_ids, listing[1:][same_listing]), weights=gaps[same_listing], minlength=len(listing_ids))
+    mean_gap = numpy.divide(gap_sums, counts - 1, out=numpy.zeros(len(listing_ids)), where=counts > 1)
+
+    bidder_ids, bids_per_bidder = numpy.unique(bidder, return_counts=True)
+    leaders = numpy.argsort(-bids_per_bidder, kind="stable")[:top]
+
+    hot = numpy.argsort(-recent, kind="stable")[:top]
+    return {
+        "bids": int(len(listing)),
+        "listings": [
+            {
+                "id": int(listing_ids[i]),
+                "bids": int(counts[i]),
+                "bids_last_window": int(recent[i]),
+                "first_price": float(first_price[i]),
+                "last_price": float(last_price[i]),
+                "price_growth": round(float(last_price[i] / first_price[i]), 4) if first_price[i] else None,
+                "active_seconds": round(float(duration[i]), 1),
+                "mean_seconds_between_bids": round(float(mean_gap[i]), 1),
+            }
+            for i in hot if recent[i]
+        ],
+        "top_bidders": [{"id": int(bidder_ids[i]), "bids": int(bids_per_bidder[i])} for i in leaders],
+        "median_bids_per_listing": float(numpy.median(counts)),
+        "median_price_growth": float(numpy.median(last_price / first_price)),
+    }
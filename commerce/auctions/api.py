@@ -0,0 +1,194 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import path
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from . import analytics
+from .cache import fragment_key, get_or_compute
+from .facets import category_facets
+from .models import AuctionListing, Bid, Comment
+from .pagination import paginate_request
+
+# API JSON de solo lectura, versionada en la URL (/api/v1/). Las respuestas se construyen con values()
+# (sin instanciar modelos), se envían en JSON compacto y comprimidas con gzip si el cliente lo acepta.
+# Cada respuesta lleva un ETag calculado a partir de la versión de los datos: un cliente que vuelve a
+# preguntar con If-None-Match recibe un 304 tras una única consulta ligera, sin serializar nada. El
+# cuerpo ya serializado se guarda en la caché con el ETag como clave: una versión nueva usa otra clave,
+# así que no hace falta invalidarlo.
+
+LISTING_FIELDS = [
+    "id", "title", "category", "starting_bid", "current_price", "bid_count", "comment_count", "is_active", "ends_at",
+    "image_url", "updated_at",
+]
+DETAIL_FIELDS = [*LISTING_FIELDS, "description", "winning_bid", "closed_at"]
+COMPACT = {"separators": (",", ":")}
+API = "api"  # Tipo de entrada en la caché y en sus contadores.
+
+
+def _etag(*parts):
+    return '"' + hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest() + '"'
+
+
+# Devuelve un 304 si el cliente ya tiene esta versión; si no, None.
+def _not_modified(request, etag, last_modified=None):
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
+def _json(request, data, etag, last_modified=None):
+    body = data if isinstance(data, str) else _dumps(data)
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)  # El cliente guarda la respuesta pero la revalida siempre.
+    return response
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, **COMPACT)
+
+
+# Cuerpo JSON de una versión concreta: se calcula con `build` solo si no está en la caché.
+def _cached_body(etag, build):
+    return get_or_compute(API, fragment_key(API, etag.strip('"')), lambda: _dumps(build()))
+
+
+def _page(page):
+    return {"results": page.items, "next": page.next_cursor, "previous": page.previous_cursor}
+
+
+# Versión de una subasta: su updated_at y el número de ofertas. Las ofertas y los cierres la actualizan.
+def _listing_version(listing_id):
+    version = AuctionListing.objects.filter(id=listing_id).values_list("updated_at", "bid_count").first()
+    if version is None:
+        raise Http404("No AuctionListing matches the given query.")
+    return version
+
+
+# GET /api/v1/listings?category=&include_closed=1&cursor=&page_size=
+@gzip_page
+@require_GET
+def listings(request):
+    queryset = AuctionListing.objects.all()
+    if request.GET.get("include_closed") != "1":
+        queryset = queryset.filter(is_active=True)
+    if request.GET.get("category"):
+        queryset = queryset.filter(category=request.GET["category"])
+    page = paginate_request(request, queryset.values(*LISTING_FIELDS, owner_username=F("owner__username")))
+
+    # La página ya está leída; el ETag evita serializarla y enviarla si no cambió ninguna fila.
+    etag = _etag(request.GET.urlencode(), *((row["id"], row["updated_at"]) for row in page.items))
+    return _not_modified(request, etag) or _json(request, _page(page), etag)
+
+
+# GET /api/v1/listings/<id>
+@gzip_page
+@require_GET
+def listing(request, listing_id):
+    updated_at, bid_count = _listing_version(listing_id)
+    etag = _etag("listing", listing_id, updated_at.isoformat(), bid_count)
+    not_modified = _not_modified(request, etag, updated_at)
+    if not_modified:
+        return not_modified
+
+    def build():
+        return AuctionListing.objects.filter(id=listing_id).values(
+            *DETAIL_FIELDS, owner_username=F("owner__username"), winner_username=F("winner__username"),
+        ).first()
+
+    return _json(request, _cached_body(etag, build), etag, updated_at)
+
+
+# GET /api/v1/listings/<id>/bids?cursor=&page_size=
+@gzip_page
+@require_GET
+def bids(request, listing_id):
+    updated_at, bid_count = _listing_version(listing_id)
+    etag = _etag("bids", listing_id, updated_at.isoformat(), bid_count, request.GET.urlencode())
+    not_modified = _not_modified(request, etag, updated_at)
+    if not_modified:
+        return not_modified
+
+    def build():
+        queryset = Bid.objects.filter(listing_id=listing_id).values("id", "amount", "bid_time", bidder_username=F("bidder__username"))
+        return _page(paginate_request(request, queryset))
+
+    return _json(request, _cached_body(etag, build), etag, updated_at)
+
+
+# GET /api/v1/listings/<id>/bids/history?bucket=minute|hour|day: ofertas y precios por intervalo.
+@gzip_page
+@require_GET
+def bid_history(request, listing_id):
+    bucket = request.GET.get("bucket", "hour")
+    if bucket not in analytics.BUCKETS:
+        return JsonResponse({"error": f"bucket must be one of: {', '.join(analytics.BUCKETS)}."}, status=400)
+    updated_at, bid_count = _listing_version(listing_id)
+    etag = _etag("history", listing_id, updated_at.isoformat(), bid_count, bucket)
+    not_modified = _not_modified(request, etag, updated_at)
+    if not_modified:
+        return not_modified
+    body = _cached_body(etag, lambda: {"bucket": bucket, "results": analytics.bid_history(listing_id, bucket)})
+    return _json(request, body, etag, updated_at)
+
+
+# GET /api/v1/listings/hot?limit=: subastas activas con más ofertas en la última hora.
+@gzip_page
+@require_GET
+def hot_listings(request):
+    try:
+        limit = min(max(int(request.GET.get("limit", 10)), 1), analytics.MAX_HOT)
+    except ValueError:
+        limit = 10
+    results = analytics.hottest(limit)
+    etag = _etag("hot", *((row["id"], row["bid_velocity"]) for row in results))
+    return _not_modified(request, etag) or _json(request, {"results": results}, etag)
+
+
+# GET /api/v1/listings/<id>/comments?cursor=&page_size=: los más recientes primero.
+@gzip_page
+@require_GET
+def comments(request, listing_id):
+    # Los comentarios actualizan la versión de la subasta (ver signals.count_created_comment).
+    updated_at, _ = _listing_version(listing_id)
+    etag = _etag("comments", listing_id, updated_at.isoformat(), request.GET.urlencode())
+    not_modified = _not_modified(request, etag, updated_at)
+    if not_modified:
+        return not_modified
+
+    def build():
+        return _page(paginate_request(request, Comment.objects.rows(listing_id), Comment.PAGE_ORDERING, settings.AUCTIONS_COMMENTS_PAGE_SIZE))
+
+    return _json(request, _cached_body(etag, build), etag, updated_at)
+
+
+# GET /api/v1/categories: subastas activas y rango de ofertas iniciales por categoría.
+@gzip_page
+@require_GET
+def categories(request):
+    results = category_facets()
+    etag = _etag("categories", *((row["count"], row["min_starting_bid"], row["max_starting_bid"]) for row in results))
+    return _not_modified(request, etag) or _json(request, {"results": results}, etag)
+
+
+urlpatterns = [
+    path("listings", listings, name="listings"),
+    path("listings/hot", hot_listings, name="hot_listings"),
+    path("listings/<int:listing_id>", listing, name="listing"),
+    path("listings/<int:listing_id>/bids", bids, name="bids"),
+    path("listings/<int:listing_id>/bids/history", bid_history, name="bid_history"),
+    path("listings/<int:listing_id>/comments", comments, name="comments"),
+    path("categories", categories, name="categories"),
+]
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AuctionsConfig(AppConfig):
     name = 'auctions'
+
+    def ready(self):
+        from . import db, metrics, notifications, signals  # noqa: F401 Conecta los receptores y registra las tareas.
@@ -0,0 +1,98 @@
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .db import retry_on_lock
+from .expiry import _acquire_sqlite_write_lock
+from .models import ArchivedBid, ArchivedComment, ArchivedListing, AuctionListing, Bid, Comment, Notification, User
+from .signals import listings_archived
+
+# Archivo de subastas cerradas: mueve las subastas cerradas antes de una fecha, con sus ofertas y
+# comentarios, de las tablas en uso a las tablas de archivo (ArchivedListing, ArchivedBid y
+# ArchivedComment), conservando los ids.
+#
+# Cada lote se copia con un INSERT ... SELECT por tabla y se borra de las tablas en uso en la misma
+# transacción, así que un lote queda archivado entero o no se archiva: el proceso se puede interrumpir y
+# volver a lanzar, y continúa con las subastas que quedan. Los avisos y las entradas de listas de
+# seguimiento de las subastas archivadas se borran; el índice de búsqueda y la caché se actualizan con la
+# señal listings_archived.
+
+# (tabla de origen, tabla de archivo, columna con el id de la subasta), en orden de inserción.
+COPIES = (
+    (AuctionListing, ArchivedListing, "id"),
+    (Bid, ArchivedBid, "listing_id"),
+    (Comment, ArchivedComment, "listing_id"),
+)
+
+# (tabla, columna con el id de la subasta), en orden de borrado: primero las que apuntan a la subasta.
+DELETES = (
+    (Bid, "listing_id"),
+    (Comment, "listing_id"),
+    (Notification, "listing_id"),
+    (User.watchlist.through, User.watchlist.field.m2m_reverse_name()),
+    (AuctionListing, "id"),
+)
+
+
+def _copy(cursor, source, target, column, listing_ids, **values):
+    quote = connection.ops.quote_name
+    columns = [field.column for field in target._meta.concrete_fields if field.column not in values]
+    cursor.execute(
+        f"INSERT INTO {quote(target._meta.db_table)} ({', '.join(map(quote, [*columns, *values]))}) "
+        f"SELECT {', '.join([*map(quote, columns), *['%s'] * len(values)])} FROM {quote(source._meta.db_table)} "
+        f"WHERE {quote(column)} IN ({', '.join(['%s'] * len(listing_ids))})",
+        [*values.values(), *listing_ids],
+    )
+
+
+def _delete(cursor, model, column, listing_ids):
+    quote = connection.ops.quote_name
+    cursor.execute(
+        f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({', '.join(['%s'] * len(listing_ids))})",
+        listing_ids,
+    )
+
+
+# Archiva un lote de subastas cerradas antes de `cutoff` y devuelve sus ids. Los DELETE no disparan
+# señales por fila: los contadores de comentarios y las categorías no cambian porque la subasta entera
+# desaparece y ya estaba cerrada. Con varios procesos a la vez se turnan como en auctions/expiry.py.
+def archive_batch(cutoff, batch_size=200):
+    def attempt(_):
+        with transaction.atomic():
+            if connection.vendor == "sqlite":
+                _acquire_sqlite_write_lock()
+            due = AuctionListing.objects.filter(is_active=False, closed_at__lt=cutoff).order_by("closed_at", "id")
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            listing_ids = list(due.values_list("id", flat=True)[:batch_size])
+            if not listing_ids:
+                return []
+
+            archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+            with connection.cursor() as cursor:
+                for source, target, column in COPIES:
+                    extra = {"archived_at": archived_at} if target is ArchivedListing else {}
+                    _copy(cursor, source, target, column, listing_ids, **extra)
+                for model, column in DELETES:
+                    _delete(cursor, model, column, listing_ids)
+            listings_archived.send(sender=AuctionListing, listing_ids=listing_ids)
+            return listing_ids
+
+    return retry_on_lock(attempt)
+
+
+# Archiva en lotes las subastas cerradas hace más de `days` días; devuelve (subastas archivadas,
+# segundos transcurridos).
+def archive_closed(days, batch_size=200, max_batches=None, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    started = time.perf_counter()
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        listing_ids = archive_batch(cutoff, batch_size)
+        if not listing_ids:
+            break
+        total += len(listing_ids)
+        batches += 1
+    return total, time.perf_counter() - started
@@ -0,0 +1,36 @@
+import contextlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+
+# Crea una base de datos de prueba desechable para que los benchmarks no toquen los datos reales.
+# En SQLite se usa un archivo temporal (y no la base en memoria) para poder usarla desde varios hilos.
+# También se admite el host del cliente de pruebas de Django para poder medir las vistas, y las
+# imágenes se guardan en un directorio temporal.
+@contextlib.contextmanager
+def isolated_database():
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    old_test_name = test_settings.get("NAME")
+    tmpdir = None
+    if connection.vendor == "sqlite" and not old_test_name:
+        tmpdir = tempfile.mkdtemp(prefix="auctions-bench-")
+        test_settings["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+
+    media_root = tempfile.mkdtemp(prefix="auctions-bench-media-")
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], MEDIA_ROOT=media_root):
+            yield
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings["NAME"] = old_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
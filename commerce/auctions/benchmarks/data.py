@@ -0,0 +1,129 @@
+import base64
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from auctions import facets
+from auctions.images import store_original
+from auctions.models import AuctionListing, Bid, Comment, User
+from auctions.search import get_backend as get_search_backend
+from auctions.watchlist import Watch
+
+PASSWORD = "bench-password"
+WORDS = [
+    "vintage", "camera", "guitar", "bicycle", "lamp", "watch", "leather", "jacket", "wooden", "table", "vinyl",
+    "record", "laptop", "phone", "chair", "mirror", "ceramic", "vase", "silver", "ring", "poster", "signed",
+    "football", "helmet", "tennis", "racket", "drone", "speaker", "sofa", "rug", "boots", "dress", "antique",
+]
+# PNG de 1x1 píxeles: la imagen guardada de las subastas que tienen una.
+PIXEL = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg==")
+
+
+# Tamaño de un conjunto de datos de benchmark.
+@dataclass(frozen=True)
+class Scale:
+    users: int = 100
+    listings: int = 2000
+    bids_per_listing: int = 5
+    comments_per_listing: int = 2
+    watchlist_size: int = 20
+    closed_every: int = 10  # Una de cada `closed_every` subastas está cerrada.
+    image_every: int = 4  # Una de cada `image_every` subastas tiene imagen guardada.
+
+
+SCALES = {
+    "tiny": Scale(users=5, listings=40, bids_per_listing=2, comments_per_listing=1, watchlist_size=5),
+    "small": Scale(users=20, listings=200, bids_per_listing=3, comments_per_listing=1, watchlist_size=10),
+    "medium": Scale(),
+    "large": Scale(users=1000, listings=50000, bids_per_listing=10, comments_per_listing=3, watchlist_size=100),
+}
+
+
+# Datos generados que necesitan los escenarios: el primer usuario es el que inicia sesión y es
+# propietario de parte de las subastas.
+@dataclass
+class Dataset:
+    scale: Scale
+    users: list
+    active_ids: list
+    closed_ids: list
+    owned_active_ids: list = field(default_factory=list)  # Subastas activas del primer usuario.
+    media_paths: list = field(default_factory=list)  # Rutas de imágenes guardadas, relativas a MEDIA_ROOT.
+
+    @property
+    def user(self):
+        return self.users[0]
+
+
+# Genera usuarios, subastas (con ofertas y su resumen desnormalizado, y algunas con imagen), comentarios
+# y listas de seguimiento. Con la misma escala y semilla los datos son siempre los mismos. Todo se inserta con
+# bulk_create, así que al final se reconstruyen el índice de búsqueda y los contadores por categoría.
+def generate(scale, seed=0, batch_size=5000):
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(PASSWORD)  # Un único hash: crear miles de usuarios con PBKDF2 llevaría minutos.
+    users = User.objects.bulk_create([
+        # El primero es el usuario de los escenarios con sesión; es staff para poder leer las métricas.
+        User(username=f"bench-user-{n}", email=f"user{n}@example.com", password=password, is_staff=n == 0)
+        for n in range(scale.users)
+    ])
+    categories = [value for value, _ in AuctionListing.CATEGORY_CHOICES]
+    with_image = AuctionListing()
+    store_original(with_image, ContentFile(PIXEL, name="pixel.png"))
+
+    for start in range(0, scale.listings, batch_size):
+        listings, bids = [], []
+        for n in range(start, min(start + batch_size, scale.listings)):
+            owner = users[n % len(users)]
+            starting_bid = Decimal(rng.randint(100, 50000)) / 100
+            listing = AuctionListing(
+                title=" ".join(rng.sample(WORDS, 3)).capitalize(),
+                description=" ".join(rng.choices(WORDS, k=60)),
+                starting_bid=starting_bid, category=rng.choice(categories), owner=owner,
+                comment_count=scale.comments_per_listing,
+            )
+            amount = starting_bid
+            for _ in range(scale.bids_per_listing):
+                amount += Decimal(rng.randint(1, 2000)) / 100
+                bidder = rng.choice(users)
+                if bidder == owner and len(users) > 1:
+                    bidder = users[(n + 1) % len(users)]
+                bids.append(Bid(listing=listing, bidder=bidder, amount=amount))
+                listing.current_price, listing.highest_bidder, listing.bid_count = amount, bidder, listing.bid_count + 1
+            if n % scale.image_every == 0:
+                listing.image, listing.image_status = with_image.image.name, with_image.image_status
+            if n % scale.closed_every == scale.closed_every - 1:
+                listing.is_active = False
+                listing.winner, listing.winning_bid, listing.closed_at = listing.highest_bidder, listing.current_price, now
+            listings.append(listing)
+
+        with transaction.atomic():
+            AuctionListing.objects.bulk_create(listings)
+            Bid.objects.bulk_create(bids, batch_size=batch_size)
+            Comment.objects.bulk_create([
+                Comment(listing=listing, commenter=rng.choice(users), content=" ".join(rng.choices(WORDS, k=12)))
+                for listing in listings for _ in range(scale.comments_per_listing)
+            ], batch_size=batch_size)
+
+    listing_ids = list(AuctionListing.objects.order_by("id").values_list("id", flat=True))
+    Watch.objects.bulk_create([
+        Watch(user_id=user.id, auctionlisting_id=listing_id)
+        for user in users for listing_id in rng.sample(listing_ids, min(scale.watchlist_size, len(listing_ids)))
+    ], batch_size=batch_size)
+
+    get_search_backend().rebuild()
+    facets.reconcile()
+    active = AuctionListing.objects.filter(is_active=True).order_by("id")
+    return Dataset(
+        scale=scale,
+        users=users,
+        active_ids=list(active.values_list("id", flat=True)),
+        closed_ids=list(AuctionListing.objects.filter(is_active=False).order_by("id").values_list("id", flat=True)),
+        owned_active_ids=list(active.filter(owner=users[0]).values_list("id", flat=True)),
+        media_paths=[with_image.image.name],
+    )
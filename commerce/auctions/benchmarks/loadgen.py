@@ -0,0 +1,31 @@
+import http.client
+import time
+
+# Proceso del generador de carga HTTP. Solo usa la biblioteca estándar para que pueda arrancar con
+# "spawn" sin configurar Django: cada proceso recorre `paths` en bucle durante `seconds` segundos.
+
+
+def http_worker(host, port, paths, cookie, seconds, offset, expected_status):
+    headers = {"Cookie": cookie} if cookie else {}
+    latencies = []
+    errors = 0
+    n = offset
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        path = paths[n % len(paths)]
+        n += 1
+        started = time.perf_counter()
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except OSError:
+            status = None
+        finally:
+            connection.close()
+        latencies.append(time.perf_counter() - started)
+        if status != expected_status:
+            errors += 1
+    return latencies, errors
@@ -0,0 +1,171 @@
+import multiprocessing
+import statistics
+import threading
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from auctions.metrics import get_registry
+
+from .loadgen import http_worker
+
+HTTP_PATHS = 64  # URL distintas que recorre cada escenario en el generador HTTP.
+
+
+# p50, p95 y p99 en milisegundos.
+def percentiles(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    samples = sorted(samples)
+    return {
+        "p50": round(statistics.median(samples) * 1000, 3),
+        "p95": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000, 3),
+        "p99": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000, 3),
+    }
+
+
+# Consultas SQL por petición de la vista, según las métricas por vista del middleware.
+def _queries_per_request(scenario):
+    view = get_registry().snapshot().get(scenario.view_name)
+    return round(view["sql_count"] / view["count"], 2) if view and view["count"] else None
+
+
+def _request(client, scenario, dataset, n):
+    args, data = scenario.build(dataset, n)
+    url = reverse(scenario.view_name, args=args)
+    if scenario.method == "GET":
+        response = client.get(url, data)
+    elif scenario.content_type:
+        response = client.post(url, data, content_type=scenario.content_type)
+    else:
+        response = client.post(url, data)
+    if response.streaming:
+        if response.is_async:
+            async_to_sync(_drain)(response.streaming_content)
+        else:
+            for _ in response.streaming_content:
+                pass
+    return response.status_code
+
+
+async def _drain(chunks):
+    async for _ in chunks:
+        pass
+
+
+# Lanza cada escenario `requests` veces en serie con el cliente de pruebas de Django, tras `warmup`
+# peticiones de calentamiento (plantillas, caché de subastas, conexión).
+def run_client(scenarios, dataset, requests=50, warmup=5):
+    report = {}
+    for scenario in scenarios:
+        client = Client()
+        if scenario.login:
+            client.force_login(dataset.user)
+        for n in range(warmup):
+            _request(client, scenario, dataset, n)
+
+        get_registry().reset()
+        samples = []
+        errors = 0
+        started = time.perf_counter()
+        for n in range(warmup, warmup + requests):
+            request_started = time.perf_counter()
+            status = _request(client, scenario, dataset, n)
+            samples.append(time.perf_counter() - request_started)
+            if status != scenario.status:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        report[scenario.name] = {
+            **percentiles(samples),
+            "requests_per_second": round(requests / elapsed, 1),
+            "queries": _queries_per_request(scenario),
+            "errors": errors,
+        }
+    return report
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+# Servidor WSGI con un hilo por petición en este proceso, sobre la base de datos del benchmark.
+def start_server():
+    server = ThreadedWSGIServer(("127.0.0.1", 0), _QuietHandler, allow_reuse_address=False)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+# Lanza los escenarios GET con `processes` procesos que hacen peticiones HTTP reales durante
+# `seconds` segundos cada uno contra un servidor local.
+def run_http(scenarios, dataset, processes=4, seconds=5.0):
+    client = Client()
+    client.force_login(dataset.user)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+    server, thread = start_server()
+    host, port = server.server_address[:2]
+    connections.close_all()  # Los procesos no usan la base de datos; no deben heredar conexiones.
+    context = multiprocessing.get_context("spawn")
+    report = {}
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host]), context.Pool(processes) as pool:
+            for scenario in scenarios:
+                if not scenario.over_http:
+                    continue
+                paths = []
+                for n in range(HTTP_PATHS):
+                    args, data = scenario.build(dataset, n)
+                    paths.append(reverse(scenario.view_name, args=args) + (f"?{urlencode(data)}" if data else ""))
+                get_registry().reset()
+                jobs = [
+                    (host, port, paths, cookie if scenario.login else None, seconds, number * HTTP_PATHS // processes, scenario.status)
+                    for number in range(processes)
+                ]
+                results = pool.starmap(http_worker, jobs)
+                samples = [latency for latencies, _ in results for latency in latencies]
+                report[scenario.name] = {
+                    **percentiles(samples),
+                    "requests_per_second": round(len(samples) / seconds, 1),
+                    "queries": _queries_per_request(scenario),
+                    "errors": sum(errors for _, errors in results),
+                }
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+    return report
+
+
+# Compara un informe con uno anterior y devuelve las regresiones: p95 más de `threshold` (fracción)
+# más lento y al menos `min_ms` más, rendimiento más de `threshold` más bajo, más consultas por
+# petición o más errores.
+def compare(report, baseline, threshold=0.25, min_ms=0.5):
+    regressions = []
+    for mode in ("client", "http"):
+        for name, current in report.get(mode, {}).items():
+            base = baseline.get(mode, {}).get(name)
+            if not base:
+                continue
+            label = f"{mode}/{name}"
+            if current["p95"] is not None and base["p95"] is not None:
+                if current["p95"] > base["p95"] * (1 + threshold) and current["p95"] - base["p95"] >= min_ms:
+                    regressions.append(f"{label}: p95 {base['p95']} -> {current['p95']} ms")
+            if current["requests_per_second"] < base["requests_per_second"] * (1 - threshold):
+                regressions.append(f"{label}: throughput {base['requests_per_second']} -> {current['requests_per_second']} req/s")
+            if current["queries"] is not None and base["queries"] is not None and current["queries"] > base["queries"]:
+                regressions.append(f"{label}: queries {base['queries']} -> {current['queries']} per request")
+            if current["errors"] > base["errors"]:
+                regressions.append(f"{label}: errors {base['errors']} -> {current['errors']}")
+    return regressions
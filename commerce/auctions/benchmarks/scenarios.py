@@ -0,0 +1,114 @@
+import json
+from dataclasses import dataclass
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import URLResolver
+
+from auctions import urls
+from auctions.models import AuctionListing
+
+from .data import PASSWORD, WORDS
+
+
+def _pick(ids, n):
+    return ids[n % len(ids)]
+
+
+def _import_file(n):
+    rows = ["title,description,starting_bid,image_url,category,ends_at"]
+    rows += [f"Imported {n}-{row},Bulk imported listing,{row + 1}.00,,OTHER," for row in range(10)]
+    return SimpleUploadedFile(f"import-{n}.csv", "\n".join(rows).encode(), content_type="text/csv")
+
+
+# Una petición de benchmark contra una URL de auctions/urls.py. `build(dataset, n)` devuelve los
+# argumentos de la URL y los datos de la n-ésima petición, para repartir la carga entre subastas sin
+# depender del azar. Solo los escenarios con http=True (GET sin efectos) se lanzan también con el
+# generador de carga HTTP, que no tiene token CSRF.
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    url_name: str
+    build: object = lambda dataset, n: ([], {})
+    method: str = "GET"
+    login: bool = False
+    status: int = 200
+    content_type: str = None
+    http: bool = None
+
+    @property
+    def view_name(self):
+        return f"auctions:{self.url_name}"
+
+    @property
+    def over_http(self):
+        return self.method == "GET" if self.http is None else self.http
+
+
+SCENARIOS = [
+    Scenario("index", "index"),
+    Scenario("index_logged_in", "index", login=True),
+    Scenario("login", "login"),
+    Scenario("login_submit", "login", lambda d, n: ([], {"username": d.user.username, "password": PASSWORD}), method="POST", status=302),
+    Scenario("logout", "logout", login=True, status=302, http=False),
+    Scenario("register", "register"),
+    Scenario(
+        "register_submit", "register",
+        lambda d, n: ([], {"username": f"bench-new-{n}", "email": "", "password": PASSWORD, "confirmation": PASSWORD}),
+        method="POST", status=302,
+    ),
+    Scenario("create_listing", "create_listing", login=True),
+    Scenario(
+        "create_listing_submit", "create_listing",
+        lambda d, n: ([], {"title": f"Created {n}", "description": "Created listing", "starting_bid": "5.00", "category": "HOME"}),
+        method="POST", login=True, status=302,
+    ),
+    Scenario("listing_detail", "listing_detail", lambda d, n: ([_pick(d.active_ids, n)], {})),
+    Scenario("listing_detail_logged_in", "listing_detail", lambda d, n: ([_pick(d.active_ids, n)], {}), login=True),
+    Scenario("listing_comments", "listing_comments", lambda d, n: ([_pick(d.active_ids, n)], {})),
+    Scenario("listing_events", "listing_events", lambda d, n: ([_pick(d.closed_ids, n)], {})),  # Cerrada: el stream termina.
+    Scenario("watchlist", "watchlist", lambda d, n: ([_pick(d.active_ids, n)], {"action": "watch"}), method="POST", login=True, status=302),
+    Scenario(
+        "watchlist_bulk", "watchlist_bulk",
+        lambda d, n: ([], json.dumps({"watch": [_pick(d.active_ids, n + k) for k in range(5)], "unwatch": [_pick(d.active_ids, n + 5)]})),
+        method="POST", login=True, content_type="application/json",
+    ),
+    # Importes siempre crecientes para que todas las ofertas se acepten.
+    Scenario("bid", "bid", lambda d, n: ([_pick(d.active_ids, n)], {"new_bid": f"{100000 + n}.00"}), method="POST", login=True, status=302),
+    Scenario("close_auction", "close_auction", lambda d, n: ([_pick(d.owned_active_ids, n)], {}), method="POST", login=True, status=302),
+    Scenario("comment", "comment", lambda d, n: ([_pick(d.active_ids, n)], {"comment": f"Comment {n}"}), method="POST", login=True, status=302),
+    Scenario("watchlist_store", "watchlist_store", login=True),
+    Scenario("notifications", "notifications", login=True),
+    Scenario("notifications_read", "notifications_read", method="POST", login=True, status=302),
+    Scenario("categories", "categories"),
+    Scenario("category_listings", "category_listings", lambda d, n: ([_pick(AuctionListing.CATEGORY_CHOICES, n)[0]], {})),
+    Scenario("search", "search", lambda d, n: ([], {"q": _pick(WORDS, n)})),
+    Scenario("search_suggest", "search_suggest", lambda d, n: ([], {"q": _pick(WORDS, n)[:3]})),
+    Scenario("bulk_import", "bulk_import", lambda d, n: ([], {"file": _import_file(n)}), method="POST", login=True),
+    Scenario("bulk_export", "bulk_export", lambda d, n: (["listings", "csv"], {}), login=True),
+    Scenario("api_listings", "api:listings"),
+    Scenario("api_hot_listings", "api:hot_listings"),
+    Scenario("api_listing", "api:listing", lambda d, n: ([_pick(d.active_ids, n)], {})),
+    Scenario("api_bids", "api:bids", lambda d, n: ([_pick(d.active_ids, n)], {})),
+    Scenario("api_bid_history", "api:bid_history", lambda d, n: ([_pick(d.active_ids, n)], {"bucket": "minute"})),
+    Scenario("api_comments", "api:comments", lambda d, n: ([_pick(d.active_ids, n)], {})),
+    Scenario("api_categories", "api:categories"),
+    Scenario("media", "media", lambda d, n: ([_pick(d.media_paths, n)], {})),
+    Scenario("metrics", "metrics", login=True),
+    Scenario("cache_metrics", "cache_metrics", login=True),
+]
+
+
+# Nombres de todas las URL de auctions/urls.py (con los espacios de nombres incluidos, como "api:listings").
+def url_names(patterns=None, prefix=""):
+    names = set()
+    for pattern in urls.urlpatterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns, f"{prefix}{pattern.namespace}:" if pattern.namespace else prefix)
+        elif pattern.name:
+            names.add(prefix + pattern.name)
+    return names
+
+
+# URL sin ningún escenario: deberían añadirse a SCENARIOS al crear vistas nuevas.
+def uncovered_url_names():
+    return url_names() - {scenario.url_name for scenario in SCENARIOS}
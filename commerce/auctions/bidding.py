@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .analytics import hot_key_update
+from .db import retry_on_lock
+from .models import AuctionListing, Bid
+from .signals import listings_closed
+
+
+# Resultado de un intento de oferta.
+@dataclass(frozen=True)
+class BidResult:
+    ACCEPTED = "accepted"
+    OUTBID = "outbid"
+    BELOW_STARTING_BID = "below_starting_bid"
+    CLOSED = "closed"
+
+    status: str
+    amount: object
+    bid: object = None
+    attempts: int = 1
+
+    @property
+    def accepted(self):
+        return self.status == self.ACCEPTED
+
+
+# Realiza una oferta con un compare-and-set: un único UPDATE condicional sobre el precio de la subasta.
+def place_bid(listing_id, bidder, amount, retries=5, backoff=0.005):
+    return retry_on_lock(lambda attempt: _try_place_bid(listing_id, bidder, amount, attempt), retries, backoff)
+
+
+def _try_place_bid(listing_id, bidder, amount, attempt):
+    now = timezone.now()
+    with transaction.atomic():
+        # La condición del WHERE es la validación: solo una oferta concurrente puede superar el precio actual,
+        # y ninguna se acepta en una subasta cerrada o vencida aunque el cierre programado aún no haya pasado.
+        accepted = (
+            AuctionListing.objects.filter(pk=listing_id, is_active=True, starting_bid__lte=amount)
+            .filter(Q(ends_at__isnull=True) | Q(ends_at__gt=now))
+            .filter(Q(current_price__isnull=True) | Q(current_price__lt=amount))
+            .update(
+                current_price=amount, highest_bidder=bidder, bid_count=F("bid_count") + 1, updated_at=now,
+                hot_key=hot_key_update(now),
+            )
+        )
+        if accepted:
+            new_bid = Bid.objects.create(bidder=bidder, listing_id=listing_id, amount=amount)
+            return BidResult(BidResult.ACCEPTED, amount, bid=new_bid, attempts=attempt)
+
+    # La oferta fue rechazada: leer el estado actual solo para explicar el motivo.
+    listing = AuctionListing.objects.only("is_active", "starting_bid", "ends_at").get(pk=listing_id)
+    if not listing.is_active or (listing.ends_at and listing.ends_at <= now):
+        status = BidResult.CLOSED
+    elif amount < listing.starting_bid:
+        status = BidResult.BELOW_STARTING_BID
+    else:
+        status = BidResult.OUTBID
+    return BidResult(status, amount, attempts=attempt)
+
+
+# Valores del UPDATE que cierra subastas: el ganador se toma de la misma fila que actualizan las
+# ofertas, así que una oferta concurrente no puede quedar fuera del resultado.
+def closing_values(now=None):
+    now = now or timezone.now()
+    return {
+        "is_active": False,
+        "winner": F("highest_bidder"),
+        "winning_bid": F("current_price"),
+        "closed_at": now,
+        "updated_at": now,
+    }
+
+
+# Cierra la subasta con un único UPDATE condicional; los receptores de listings_closed se ejecutan en
+# la misma transacción.
+def close_listing(listing_id):
+    with transaction.atomic():
+        closed = AuctionListing.objects.filter(pk=listing_id, is_active=True).update(**closing_values())
+        if closed:
+            listings_closed.send(sender=AuctionListing, listing_ids=[listing_id])
+    return bool(closed)
@@ -0,0 +1,152 @@
+import codecs
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from . import facets
+from .forms import ListingForm
+from .models import AuctionListing, Bid, Comment
+from .search import get_backend as get_search_backend
+
+FORMATS = ("csv", "jsonl")
+IMPORT_FIELDS = ListingForm._meta.fields
+
+# Columnas de cada exportación; las de "listings" incluyen las de la importación para poder reimportarlas.
+EXPORTS = {
+    "listings": [
+        "id", "title", "description", "starting_bid", "image_url", "category", "ends_at", "owner__username",
+        "is_active", "current_price", "bid_count", "winner__username", "winning_bid", "closed_at",
+    ],
+    "bids": ["id", "listing_id", "bidder__username", "amount", "bid_time"],
+    "comments": ["id", "listing_id", "commenter__username", "content"],
+}
+EXPORT_MODELS = {"listings": AuctionListing, "bids": Bid, "comments": Comment}
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)  # [(número de fila, {campo: [mensajes]})], como mucho max_errors.
+
+
+def format_from_name(name, default="csv"):
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return extension if extension in FORMATS else default
+
+
+# Filas de un archivo de texto CSV (con cabecera) o JSON Lines, leídas de una en una. Una línea JSON
+# mal formada se devuelve como None para que se informe como error de esa fila.
+def read_rows(stream, format):
+    if format == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+# Comprueba que un archivo subido es UTF-8 válido leyéndolo por bloques, sin cargarlo entero, y lo
+# deja al principio para leerlo de nuevo. Lanza UnicodeDecodeError si no lo es.
+def check_utf8(upload):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in upload.chunks():
+        decoder.decode(chunk)
+    decoder.decode(b"", final=True)
+    upload.seek(0)
+
+
+# Valida filas con las reglas de ListingForm, con un formulario nuevo por fila.
+class ListingRowValidator:
+    def __init__(self, owner):
+        self.owner = owner
+
+    # Devuelve (subasta sin guardar, None) o (None, {campo: [mensajes]}).
+    def validate(self, row):
+        if not isinstance(row, dict):
+            return None, {"__all__": ["Invalid row."]}
+        form = ListingForm(
+            data={name: "" if row.get(name) is None else row[name] for name in IMPORT_FIELDS},
+            instance=AuctionListing(owner=self.owner, is_active=True),
+        )
+        if form.is_valid():
+            return form.instance, None
+        return None, {name: [str(message) for message in messages] for name, messages in form.errors.items()}
+
+
+# Importa subastas de `owner` a partir de filas (diccionarios) ya leídas. Las filas válidas se insertan
+# con bulk_create en transacciones de `batch_size` filas, junto con su entrada en el índice de búsqueda
+# y en los contadores por categoría (bulk_create no envía post_save). Las filas inválidas no detienen
+# la importación: se cuentan, se pasan a `on_error` y se guardan las primeras `max_errors`.
+def import_listings(rows, owner, batch_size=1000, on_error=None, max_errors=100):
+    result = ImportResult()
+    validator = ListingRowValidator(owner)
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            created = AuctionListing.objects.bulk_create(batch)
+            get_search_backend().index(created)
+            facets.listings_added((listing.category, listing.starting_bid) for listing in created)
+        result.created += len(batch)
+        batch.clear()
+
+    for number, row in enumerate(rows, start=1):
+        listing, errors = validator.validate(row)
+        if errors:
+            result.failed += 1
+            if len(result.errors) < max_errors:
+                result.errors.append((number, errors))
+            if on_error:
+                on_error(number, errors)
+            continue
+        batch.append(listing)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+
+# Filas de una exportación, leídas de la base de datos por bloques: la memoria no depende del tamaño.
+def export_queryset(kind, queryset=None):
+    queryset = EXPORT_MODELS[kind].objects.all() if queryset is None else queryset
+    return queryset.order_by("id").values_list(*EXPORTS[kind]).iterator(chunk_size=2000)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+# Genera la exportación en CSV o JSON Lines como bloques de texto de `rows_per_chunk` filas, para
+# StreamingHttpResponse o un archivo; escribir fila a fila multiplicaría las llamadas de escritura.
+def export_chunks(kind, format, queryset=None, rows_per_chunk=1000):
+    names = [column.replace("__", "_") for column in EXPORTS[kind]]  # owner__username -> owner_username
+    rows = export_queryset(kind, queryset)
+    buffer = io.StringIO()
+    if format == "jsonl":
+        write = lambda row: buffer.write(json.dumps(dict(zip(names, row)), default=str, separators=(",", ":")) + "\n")
+    else:
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        write = lambda row: writer.writerow([_csv_value(value) for value in row])
+
+    for number, row in enumerate(rows, start=1):
+        write(row)
+        if number % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,97 @@
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Fragmentos de plantilla cacheados por subasta; todos se invalidan juntos cuando la subasta cambia.
+#
+# Las claves de una subasta llevan su versión, guardada en la caché sin caducidad. Invalidar la subasta
+# cambia la versión en vez de borrar las entradas: un lector que leyó la versión antes de que la
+# escritura se confirmara guarda su valor, ya antiguo, con la versión anterior, que nadie vuelve a
+# pedir. Las entradas de versiones anteriores desaparecen al caducar o al necesitar sitio la caché.
+#
+# Las versiones y las entradas solo las ven los procesos que comparten la caché: con más de un proceso
+# (varios workers o máquinas) AUCTIONS_CACHE_BACKEND tiene que ser un backend compartido (redis); con
+# locmem, una invalidación solo llega al proceso que hizo la escritura.
+FRAGMENT_KINDS = ("card", "won_card")
+DETAIL = "detail"
+
+_MISSING = object()
+_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def get_cache():
+    return caches[settings.AUCTIONS_CACHE_ALIAS]
+
+
+def fragment_key(kind, listing_id):
+    return f"auctions:{kind}:{listing_id}"
+
+
+def version_key(listing_id):
+    return f"auctions:version:{listing_id}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:16]
+
+
+# Versión actual de las entradas de una subasta. Si no hay (primera lectura, o la caché la descartó) se
+# crea una nueva, distinta de todas las anteriores, así que nunca se vuelve a una versión antigua.
+def listing_version(listing_id):
+    cache = get_cache()
+    key = version_key(listing_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+# Clave de una entrada de la subasta en su versión actual; se debe calcular antes de leer los datos.
+def listing_key(kind, listing_id):
+    return f"{fragment_key(kind, listing_id)}:{listing_version(listing_id)}"
+
+
+def detail_key(listing_id):
+    return listing_key(DETAIL, listing_id)
+
+
+# Devuelve el valor cacheado o lo calcula con `compute` y lo guarda, contando aciertos y fallos por tipo.
+def get_or_compute(kind, key, compute):
+    cache = get_cache()
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        with _lock:
+            _hits[kind] += 1
+        return value
+
+    with _lock:
+        _misses[kind] += 1
+    value = compute()
+    cache.set(key, value)
+    return value
+
+
+# Invalida todas las entradas de las subastas indicadas (tarjetas y modelo de lectura del detalle)
+# cambiando su versión.
+def invalidate_listings(listing_ids):
+    versions = {version_key(listing_id): _new_version() for listing_id in listing_ids}
+    if versions:
+        get_cache().set_many(versions, timeout=None)
+
+
+# Copia de los contadores de este proceso: {"hits": {...}, "misses": {...}}.
+def stats():
+    with _lock:
+        return {"hits": dict(_hits), "misses": dict(_misses)}
+
+
+def reset_stats():
+    with _lock:
+        _hits.clear()
+        _misses.clear()
@@ -0,0 +1,11 @@
+from .models import Notification
+
+
+# Número de avisos sin leer del usuario para la barra de navegación. Es un callable que la plantilla
+# evalúa al mostrarlo, así que las respuestas que no lo muestran no hacen la consulta.
+def notifications(request):
+    def unread():
+        user = request.user
+        return Notification.objects.filter(user=user, read_at=None).count() if user.is_authenticated else 0
+
+    return {"unread_notifications": unread}
@@ -0,0 +1,56 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Códigos de PostgreSQL que indican conflicto entre transacciones y permiten reintentar.
+RETRYABLE_PGCODES = {"40001", "40P01", "55P03"}
+
+
+# Aplica AUCTIONS_SQLITE_PRAGMAS a cada conexión nueva de SQLite. Son PRAGMA de la conexión y hay que
+# repetirlos en cada una; el modo del diario se cambia aparte con set_journal_mode.
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.AUCTIONS_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+# Cambia el modo del diario (journal_mode) de la base de datos SQLite y devuelve el modo resultante. Queda
+# guardado en el archivo, así que basta con hacerlo una vez; espera busy_timeout si otro proceso tiene la
+# base bloqueada. Una base en memoria sigue en modo "memory".
+def set_journal_mode(mode, using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode = {mode}")
+        return cursor.fetchone()[0]
+
+
+# Indica si el error de base de datos se debe a contención de bloqueos y puede reintentarse.
+def is_lock_contention(error):
+    message = str(error).lower()
+    if "database is locked" in message or "database table is locked" in message:
+        return True
+    return getattr(error.__cause__, "pgcode", None) in RETRYABLE_PGCODES
+
+
+# Ejecuta `function(attempt)` reintentando con espera exponencial, hasta `retries` veces, mientras la base
+# de datos esté bloqueada por otra escritura.
+def retry_on_lock(function, retries=5, backoff=0.005):
+    # Dentro de una transacción externa no se puede reintentar sin deshacer el trabajo de quien llama.
+    if connection.in_atomic_block:
+        retries = 0
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return function(attempt)
+        except OperationalError as error:
+            if attempt > retries or not is_lock_contention(error):
+                raise
+        time.sleep(backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
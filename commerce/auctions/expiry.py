@@ -0,0 +1,64 @@
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .bidding import closing_values, retry_on_lock
+from .models import AuctionListing
+from .signals import listings_closed
+
+
+# Cierra un lote de subastas vencidas y devuelve sus ids.
+#
+# El ganador ya está desnormalizado en cada subasta (highest_bidder y current_price), así que el lote
+# completo se resuelve y se cierra con un único UPDATE ... WHERE id IN (...) AND is_active. Es idempotente:
+# una subasta ya cerrada no vuelve a cumplir la condición. Con varios procesos a la vez, en PostgreSQL
+# cada uno reclama filas distintas con SKIP LOCKED; en SQLite la transacción toma el bloqueo de escritura
+# antes de leer el lote, así que los procesos se turnan.
+def close_expired_batch(now=None, batch_size=500):
+    now = now or timezone.now()
+
+    def attempt(_):
+        with transaction.atomic():
+            if connection.vendor == "sqlite":
+                _acquire_sqlite_write_lock()
+            expired = AuctionListing.objects.filter(is_active=True, ends_at__lte=now).order_by("ends_at")
+            if connection.features.has_select_for_update_skip_locked:
+                expired = expired.select_for_update(skip_locked=True)
+            listing_ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if not listing_ids:
+                return []
+
+            closed = AuctionListing.objects.filter(id__in=listing_ids, is_active=True).update(**closing_values(now))
+            if closed != len(listing_ids):
+                # Otro proceso cerró parte del lote entre la lectura y la escritura: se reintenta el lote.
+                transaction.set_rollback(True)
+                return None
+            listings_closed.send(sender=AuctionListing, listing_ids=listing_ids)
+            return listing_ids
+
+    while True:
+        listing_ids = retry_on_lock(attempt)
+        if listing_ids is not None:
+            return listing_ids
+
+
+# Una escritura que no modifica filas abre la transacción de escritura de SQLite (bloqueo RESERVED): sin ella,
+# dos procesos que leen el lote a la vez se bloquean mutuamente al intentar escribir.
+def _acquire_sqlite_write_lock():
+    with connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {AuctionListing._meta.db_table} SET is_active = is_active WHERE 0")
+
+
+# Cierra todas las subastas vencidas en lotes; devuelve (subastas cerradas, segundos transcurridos).
+def close_expired(now=None, batch_size=500, max_batches=None):
+    now = now or timezone.now()
+    started = time.perf_counter()
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        listing_ids = close_expired_batch(now, batch_size)
+        if not listing_ids:
+            break
+        total += len(listing_ids)
+        batches += 1
+    return total, time.perf_counter() - started
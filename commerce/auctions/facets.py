@@ -0,0 +1,115 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import AuctionListing, CategoryStats
+
+# Contadores por categoría (CategoryStats). Las altas y bajas se aplican con UPDATE relativos
+# (active_count = active_count + n) en la misma transacción que el cambio de la subasta, así que las
+# escrituras concurrentes nunca se pisan; reconcile() repara la deriva si alguna subasta cambió sin
+# pasar por las señales (por ejemplo, un UPDATE a mano).
+
+
+# Agrupa filas (categoría, oferta inicial) en {categoría: (número, mínimo, máximo)}. Las subastas sin
+# categoría no tienen contador.
+def _group(rows):
+    groups = {}
+    for category, starting_bid in rows:
+        if not category:
+            continue
+        count, low, high = groups.get(category, (0, starting_bid, starting_bid))
+        groups[category] = (count + 1, min(low, starting_bid), max(high, starting_bid))
+    return groups
+
+
+# Suma subastas activas nuevas, dadas como filas (categoría, oferta inicial).
+def listings_added(rows):
+    for category, (count, low, high) in _group(rows).items():
+        values = {
+            "active_count": F("active_count") + count,
+            "min_starting_bid": Least(Coalesce(F("min_starting_bid"), Value(low)), Value(low)),
+            "max_starting_bid": Greatest(Coalesce(F("max_starting_bid"), Value(high)), Value(high)),
+        }
+        if CategoryStats.objects.filter(category=category).update(**values):
+            continue
+        # Primera subasta de una categoría sin fila; si otro proceso la crea a la vez, se suma a la suya.
+        try:
+            with transaction.atomic():
+                CategoryStats.objects.create(category=category, active_count=count, min_starting_bid=low, max_starting_bid=high)
+        except IntegrityError:
+            CategoryStats.objects.filter(category=category).update(**values)
+
+
+# Resta subastas que dejan de estar activas (cerradas o borradas). Si alguna marcaba el mínimo o el
+# máximo, el rango queda desactualizado hasta la siguiente lectura.
+def listings_removed(rows):
+    for category, (count, low, high) in _group(rows).items():
+        CategoryStats.objects.filter(category=category).update(
+            active_count=F("active_count") - count,
+            bounds_stale=Case(
+                When(Q(min_starting_bid__gte=low) | Q(max_starting_bid__lte=high), then=Value(True)),
+                default=F("bounds_stale"),
+            ),
+        )
+
+
+# Recalcula el rango de las categorías indicadas en un solo UPDATE con subconsultas sobre el índice
+# (category, is_active); si otra baja lo vuelve a desactualizar mientras tanto, el flag se mantiene.
+def refresh_bounds(categories):
+    active = AuctionListing.objects.filter(category=OuterRef("category"), is_active=True)
+    CategoryStats.objects.filter(category__in=categories, bounds_stale=True).update(
+        min_starting_bid=Subquery(active.order_by("starting_bid").values("starting_bid")[:1]),
+        max_starting_bid=Subquery(active.order_by("-starting_bid").values("starting_bid")[:1]),
+        bounds_stale=False,
+    )
+
+
+# Una entrada por categoría de CATEGORY_CHOICES: {"category", "label", "count", "min_starting_bid",
+# "max_starting_bid"}. Normalmente es una sola consulta a la tabla de contadores.
+def category_facets():
+    stats = {row.category: row for row in CategoryStats.objects.all()}
+    stale = [category for category, row in stats.items() if row.bounds_stale]
+    if stale:
+        refresh_bounds(stale)
+        stats.update({row.category: row for row in CategoryStats.objects.filter(category__in=stale)})
+
+    facets = []
+    for value, label in AuctionListing.CATEGORY_CHOICES:
+        row = stats.get(value)
+        count = row.active_count if row else 0
+        facets.append({
+            "category": value,
+            "label": label,
+            "count": count,
+            "min_starting_bid": row.min_starting_bid if count else None,
+            "max_starting_bid": row.max_starting_bid if count else None,
+        })
+    return facets
+
+
+# Compara los contadores con las subastas activas y, salvo con check=True, corrige los que difieren.
+# Devuelve [(categoría, número guardado, número real)] de los contadores corregidos o desincronizados.
+# Una subasta que cambie mientras se ejecuta puede quedar fuera del recuento: conviene lanzarlo con poco tráfico.
+def reconcile(check=False):
+    real = {
+        row["category"]: row
+        for row in AuctionListing.objects.filter(is_active=True).exclude(category=None).exclude(category="")
+        .order_by().values("category").annotate(count=Count("id"), low=Min("starting_bid"), high=Max("starting_bid"))
+    }
+    stored = {row.category: row for row in CategoryStats.objects.all()}
+
+    drifted = []
+    for category in real.keys() | stored.keys():
+        expected = real.get(category, {"count": 0, "low": None, "high": None})
+        row = stored.get(category)
+        current = (row.active_count, row.min_starting_bid, row.max_starting_bid) if row else (0, None, None)
+        if current == (expected["count"], expected["low"], expected["high"]) and not (row and row.bounds_stale):
+            continue
+        if current[0] != expected["count"]:
+            drifted.append((category, current[0], expected["count"]))
+        if not check:
+            CategoryStats.objects.update_or_create(category=category, defaults={
+                "active_count": expected["count"], "min_starting_bid": expected["low"],
+                "max_starting_bid": expected["high"], "bounds_stale": False,
+            })
+    return drifted
@@ -1,7 +1,40 @@
 from django import forms
+from django.conf import settings
+from django.utils import timezone
+from .images import image_extension
 from .models import AuctionListing
 
 class ListingForm(forms.ModelForm):
+    # Imagen subida (opcional); la vista la guarda con store_original. No es un campo del modelo para que
+    # la importación en bloque, que usa los campos de Meta, no la espere.
+    upload = forms.FileField(required=False, label='Image (optional)')
+
     class Meta:
         model = AuctionListing
-        fields = ['title', 'description', 'starting_bid', 'image_url', 'category']
+        fields = ['title', 'description', 'starting_bid', 'image_url', 'category', 'ends_at']
+        widgets = {
+            'ends_at': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+        }
+        labels = {
+            'ends_at': 'Ends at (optional)',
+        }
+
+    def clean_upload(self):
+        upload = self.cleaned_data.get('upload')
+        if upload:
+            if upload.size > settings.AUCTIONS_MAX_IMAGE_BYTES:
+                raise forms.ValidationError("The image is too large.")
+            # El formato se reconoce por el contenido, y el archivo se guarda con su extensión y no con la
+            # del nombre que envía el cliente.
+            try:
+                upload.name = f"upload{image_extension(upload)}"
+            except ValueError:
+                raise forms.ValidationError("Upload a JPEG, PNG, GIF or WebP image.")
+        return upload
+
+    # El cierre programado, si se indica, debe estar en el futuro.
+    def clean_ends_at(self):
+        ends_at = self.cleaned_data.get('ends_at')
+        if ends_at and ends_at <= timezone.now():
+            raise forms.ValidationError("The end time must be in the future.")
+        return ends_at
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+# PBKDF2-SHA256 con el número de iteraciones de AUCTIONS_PBKDF2_ITERATIONS. Usa el mismo identificador
+# que el hasher de Django ("pbkdf2_sha256"), así que verifica las contraseñas ya guardadas. Cuando una
+# contraseña guardada tiene otro número de iteraciones, must_update() lo indica y Django la vuelve a
+# calcular con el valor actual al iniciar sesión (ModelBackend llama a User.check_password, que guarda
+# el hash nuevo): se puede subir o bajar el coste sin pedir a nadie que cambie su contraseña.
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.AUCTIONS_PBKDF2_ITERATIONS
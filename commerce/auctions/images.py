@@ -0,0 +1,250 @@
+import hashlib
+import http.client
+import io
+import ipaddress
+import multiprocessing
+import os
+import posixpath
+import re
+import socket
+import urllib.parse
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.templatetags.static import static
+from django.utils import timezone
+
+from . import thumbnails
+from .cache import invalidate_listings
+from .models import AuctionListing
+
+# Imágenes de las subastas. El original (subido o descargado de image_url) se guarda como
+# listings/originals/<sha256>.<ext>; sus miniaturas como listings/thumbs/<sha256>-<ancho>.jpg. Como el
+# nombre depende del contenido, una imagen nunca cambia bajo la misma URL y se puede cachear para
+# siempre, y dos subastas con la misma imagen comparten archivos.
+
+ORIGINALS = "listings/originals"
+THUMBNAILS = "listings/thumbs"
+PLACEHOLDER = "auctions/default-image.svg"
+
+# Formatos de imagen aceptados (subidos o descargados) y la extensión con que se guardan.
+IMAGE_FORMATS = {"JPEG": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp"}
+
+# Firmas de los formatos (al principio del archivo), para reconocerlos sin Pillow.
+SIGNATURES = (
+    (re.compile(rb"\x89PNG\r\n\x1a\n"), "PNG"),
+    (re.compile(rb"\xff\xd8\xff"), "JPEG"),
+    (re.compile(rb"GIF8[79]a"), "GIF"),
+    (re.compile(rb"RIFF.{4}WEBP", re.DOTALL), "WEBP"),
+)
+
+
+def _digest_path(directory, digest, suffix):
+    return f"{directory}/{digest[:2]}/{digest}{suffix}"
+
+
+# Extensión con que se guarda la imagen del archivo `file` según su contenido, no su nombre. Con Pillow
+# la imagen se abre y se verifica; sin él solo se comprueba la firma del formato. Lanza ValueError si no
+# es una imagen de IMAGE_FORMATS. Deja el archivo al principio.
+def image_extension(file):
+    file.seek(0)
+    try:
+        if thumbnails.Image is None:
+            head = file.read(16)
+            image_format = next((name for signature, name in SIGNATURES if signature.match(head)), None)
+        else:
+            thumbnails.Image.MAX_IMAGE_PIXELS = thumbnails.MAX_PIXELS
+            try:
+                with thumbnails.Image.open(file) as image:
+                    image_format = image.format
+                    image.verify()
+            except Exception as error:  # Pillow lanza errores distintos según el formato y el fallo.
+                raise ValueError("The file is not a valid image.") from error
+    finally:
+        file.seek(0)
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format {image_format}.")
+    return IMAGE_FORMATS[image_format]
+
+
+# Guarda el archivo `upload` como imagen de la subasta y la deja pendiente de miniaturas (no guarda la subasta).
+def store_original(listing, upload):
+    extension = os.path.splitext(upload.name)[1].lower()
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    name = _digest_path(ORIGINALS, digest.hexdigest(), extension)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, upload)
+    listing.image.name = name
+    listing.image_status = AuctionListing.IMAGE_PENDING
+    listing.image_widths = []
+
+
+def thumbnail_name(image_name, width):
+    digest = posixpath.splitext(posixpath.basename(image_name))[0]
+    return _digest_path(THUMBNAILS, digest, f"-{width}.jpg")
+
+
+# URL y srcset de la imagen de una subasta, de mejor a peor opción: miniaturas generadas, el original
+# guardado (salvo si no se pudo procesar), la URL externa o, si no hay imagen, la imagen por defecto.
+def image_sources(listing):
+    return _sources(listing.image.name, listing.image_url, listing.image_status, listing.image_widths)
+
+
+# Lo mismo para una fila de AuctionListingQuerySet.card_rows(), donde image es el nombre del archivo.
+# `placeholder` evita calcular la URL de la imagen por defecto en cada tarjeta.
+def row_image_sources(row, placeholder=None):
+    return _sources(row["image"], row["image_url"], row["image_status"], row["image_widths"], placeholder)
+
+
+def _sources(name, image_url, status, widths, placeholder=None):
+    if status == AuctionListing.IMAGE_READY and widths:
+        urls = [(default_storage.url(thumbnail_name(name, width)), width) for width in widths]
+        return urls[-1][0], ", ".join(f"{url} {width}w" for url, width in urls)
+    if name and status != AuctionListing.IMAGE_FAILED:
+        return default_storage.url(name), ""
+    if image_url:
+        return image_url, ""
+    return placeholder or static(PLACEHOLDER), ""
+
+
+# Genera las miniaturas de todas las imágenes pendientes con un grupo de `workers` procesos. Las
+# subastas se leen por lotes de `batch_size` en orden de id y cada lote se confirma con un UPDATE por
+# fila, así que el trabajo se puede interrumpir y reanudar. La memoria no depende del número de
+# imágenes: como mucho hay `workers` imágenes abiertas y un lote de ids en memoria.
+def process_pending(workers=None, batch_size=200, on_batch=None):
+    if thumbnails.Image is None:
+        raise RuntimeError("Generating thumbnails requires Pillow (pip install Pillow).")
+    workers = workers or settings.AUCTIONS_IMAGE_WORKERS or os.cpu_count()
+    widths = settings.AUCTIONS_THUMBNAIL_WIDTHS
+    totals = {"ready": 0, "failed": 0}
+    last_id = 0
+    # "spawn": los procesos no heredan las conexiones a la base de datos; max_tasks_per_child limita
+    # lo que pueda crecer la memoria de un proceso con imágenes grandes.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, max_tasks_per_child=500) as executor:
+        while True:
+            batch = list(
+                AuctionListing.objects.filter(image_status=AuctionListing.IMAGE_PENDING, id__gt=last_id)
+                .order_by("id").values_list("id", "image")[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            futures = {}
+            for listing_id, name in batch:
+                targets = {width: default_storage.path(thumbnail_name(name, width)) for width in widths}
+                futures[executor.submit(thumbnails.make_thumbnails, default_storage.path(name), targets)] = listing_id
+
+            now = timezone.now()
+            for future, listing_id in futures.items():
+                try:
+                    values = {"image_status": AuctionListing.IMAGE_READY, "image_widths": future.result()}
+                except Exception:
+                    values = {"image_status": AuctionListing.IMAGE_FAILED}
+                AuctionListing.objects.filter(id=listing_id).update(**values, updated_at=now)
+                totals[values["image_status"]] += 1
+            invalidate_listings([listing_id for listing_id, _ in batch])
+            if on_batch:
+                on_batch(totals)
+    return totals
+
+
+# Las descargas de image_url (una URL que escribe el usuario) solo se conectan a direcciones públicas:
+# la comprobación se hace con las direcciones resueltas al abrir cada conexión, así que también cubre
+# las redirecciones y los nombres que resuelven a otra dirección en la segunda consulta.
+def _is_public(address):
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def _public_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None, **kwargs):
+    host, port = address
+    resolved = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    if not resolved or not all(_is_public(sockaddr[0]) for *_, sockaddr in resolved):
+        raise ValueError(f"{host} does not resolve to a public address.")
+    return socket.create_connection(resolved[0][4][:2], timeout, source_address)
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, request):
+        return self.do_open(_PublicHTTPConnection, request)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, request):
+        return self.do_open(_PublicHTTPSConnection, request, context=self._context)
+
+
+# Solo http y https, sin proxies del entorno ni otros esquemas (file, ftp, data), tampoco al redirigir.
+_opener = urllib.request.OpenerDirector()
+for _handler in (_PublicHTTPHandler(), _PublicHTTPSHandler(), urllib.request.HTTPRedirectHandler(),
+                 urllib.request.HTTPDefaultErrorHandler(), urllib.request.HTTPErrorProcessor()):
+    _opener.add_handler(_handler)
+
+
+# Descarga una imagen externa y devuelve (datos, extensión). Falla si la URL no es http(s), si el
+# servidor no es público, si pasa de AUCTIONS_MAX_IMAGE_BYTES o si no es una imagen (ver image_extension).
+def _download(url, timeout):
+    if urllib.parse.urlsplit(url).scheme.lower() not in ("http", "https"):
+        raise ValueError("Only http and https image URLs are supported.")
+    request = urllib.request.Request(url, headers={"User-Agent": "auctions-image-ingest"})
+    with _opener.open(request, timeout=timeout) as response:
+        data = response.read(settings.AUCTIONS_MAX_IMAGE_BYTES + 1)
+    if len(data) > settings.AUCTIONS_MAX_IMAGE_BYTES:
+        raise ValueError("Image is too large.")
+    return data, image_extension(io.BytesIO(data))
+
+
+# Descarga a la caché local las imágenes externas (image_url) de las subastas que aún no tienen imagen
+# propia, con `workers` hilos, y las deja pendientes de miniaturas. Las que fallan quedan marcadas
+# como fallidas para no reintentarlas en cada ejecución. Solo se guardan las que Pillow reconoce.
+def ingest_remote(workers=8, batch_size=200, timeout=10):
+    if thumbnails.Image is None:
+        raise RuntimeError("Downloading external images requires Pillow (pip install Pillow).")
+    totals = {"stored": 0, "failed": 0}
+    last_id = 0
+    remote = AuctionListing.objects.filter(image="", image_status="").exclude(Q(image_url=None) | Q(image_url=""))
+    with ThreadPoolExecutor(workers) as executor:
+        while True:
+            batch = list(remote.filter(id__gt=last_id).order_by("id").values_list("id", "image_url")[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            pending = {executor.submit(_download, url, timeout): listing_id for listing_id, url in batch}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    listing_id = pending.pop(future)
+                    listing = AuctionListing(id=listing_id)
+                    try:
+                        data, extension = future.result()
+                        store_original(listing, ContentFile(data, name=f"remote{extension}"))
+                        values = {"image": listing.image.name, "image_status": AuctionListing.IMAGE_PENDING}
+                        totals["stored"] += 1
+                    except Exception:
+                        values = {"image_status": AuctionListing.IMAGE_FAILED}
+                        totals["failed"] += 1
+                    AuctionListing.objects.filter(id=listing_id).update(**values, updated_at=timezone.now())
+            invalidate_listings([listing_id for listing_id, _ in batch])
+    return totals
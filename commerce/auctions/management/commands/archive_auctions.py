@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.archive import archive_closed
+
+
+# Mueve a las tablas de archivo las subastas cerradas hace más de --days días, con sus ofertas y
+# comentarios (ver auctions/archive.py). Cada lote es una transacción: si se interrumpe, volver a
+# lanzarlo continúa donde lo dejó. Se puede ejecutar desde cron.
+class Command(BaseCommand):
+    help = "Move listings closed more than --days days ago, with their bids and comments, to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Archive listings closed more than this many days ago.")
+        parser.add_argument("--batch-size", type=int, default=200, help="Listings archived per transaction.")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        if options["days"] < 0:
+            raise CommandError("--days must not be negative.")
+
+        archived, elapsed = archive_closed(options["days"], options["batch_size"], options["max_batches"])
+        rate = archived / elapsed if elapsed else 0
+        self.stdout.write(f"Archived {archived} auctions in {elapsed:.3f}s ({rate:.0f}/s).")
@@ -0,0 +1,73 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.cache import get_cache
+from auctions.models import AuctionListing, Bid, Comment, User
+
+
+# Compara peticiones por segundo y bytes por respuesta de las vistas HTML con la API JSON equivalente,
+# incluyendo las revalidaciones con If-None-Match que responden 304.
+class Command(BaseCommand):
+    help = "Benchmark the JSON API against the HTML views (requests per second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=2000)
+        parser.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            report = self.run(**options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, listings, requests, **options):
+        owner = User.objects.create_user("bench-owner")
+        bidder = User.objects.create_user("bench-bidder")
+        created = AuctionListing.objects.bulk_create([
+            AuctionListing(
+                title=f"Listing {n}", description="Synthetic listing " * 20, starting_bid=Decimal("1.00"),
+                category="OTHER", owner=owner, current_price=Decimal("5.00"), highest_bidder=bidder, bid_count=5,
+            )
+            for n in range(listings)
+        ])
+        detail = created[-1]
+        Bid.objects.bulk_create([Bid(listing=detail, bidder=bidder, amount=Decimal(n + 1)) for n in range(5)])
+        Comment.objects.bulk_create([Comment(listing=detail, commenter=bidder, content=f"Comment {n}") for n in range(20)])
+
+        client = Client(headers={"accept-encoding": "gzip"})
+        scenarios = {
+            "html_index": reverse("auctions:index"),
+            "api_listings": reverse("auctions:api:listings"),
+            "html_listing_detail": reverse("auctions:listing_detail", args=[detail.id]),
+            "api_listing": reverse("auctions:api:listing", args=[detail.id]),
+            "api_bids": reverse("auctions:api:bids", args=[detail.id]),
+            "api_comments": reverse("auctions:api:comments", args=[detail.id]),
+            "html_categories": reverse("auctions:category_listings", args=["OTHER"]),
+            "api_categories": reverse("auctions:api:categories"),
+        }
+        report = {"vendor": connection.vendor, "listings": listings, "requests": requests, "scenarios": {}}
+        for name, url in scenarios.items():
+            report["scenarios"][name] = self.measure(client, url, requests)
+            if name.startswith("api_"):
+                etag = client.get(url)["ETag"]
+                report["scenarios"][name + "_304"] = self.measure(client, url, requests, {"if-none-match": etag})
+        return report
+
+    def measure(self, client, url, requests, headers=None):
+        get_cache().clear()
+        response = client.get(url, headers=headers)  # Calentamiento (y caché de vistas HTML, como en producción).
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get(url, headers=headers)
+        elapsed = time.perf_counter() - started
+        return {
+            "status": response.status_code,
+            "requests_per_second": round(requests / elapsed),
+            "bytes": len(response.content),
+        }
@@ -0,0 +1,90 @@
+import json
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auctions.benchmarks import isolated_database
+from auctions.bidding import BidResult, place_bid
+from auctions.models import AuctionListing, Bid, User
+
+
+# Benchmark de estrés: miles de ofertas concurrentes sobre una misma subasta desde un pool de hilos.
+# Se ejecuta sobre una base de datos desechable y falla si se viola algún invariante.
+class Command(BaseCommand):
+    help = "Fire concurrent bids at one listing and verify the bid invariants."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bids", type=int, default=5000, help="Total bids to submit.")
+        parser.add_argument("--workers", type=int, default=16, help="Threads in the pool.")
+        parser.add_argument("--bidders", type=int, default=50, help="Distinct bidding users.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for bid amounts.")
+
+    def handle(self, *args, **options):
+        if min(options["bids"], options["workers"], options["bidders"]) < 1:
+            raise CommandError("--bids, --workers and --bidders must be positive.")
+
+        with isolated_database():
+            report = self.run(**options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, bids, workers, bidders, seed, **options):
+        owner = User.objects.create_user("bench-owner")
+        users = [User.objects.create_user(f"bench-bidder-{n}") for n in range(bidders)]
+        listing = AuctionListing.objects.create(
+            title="Benchmark listing", description="", starting_bid=Decimal("1.00"), owner=owner
+        )
+
+        # Los montos crecen con el índice pero con ruido, para mezclar ofertas aceptadas y superadas.
+        rng = random.Random(seed)
+        plan = [
+            (rng.choice(users), Decimal(100 + n + rng.randint(-40, 40)) / 100)
+            for n in range(bids)
+        ]
+        chunks = [plan[n::workers] for n in range(workers)]
+
+        def worker(chunk):
+            try:
+                return [place_bid(listing.id, bidder, amount) for bidder, amount in chunk]
+            finally:
+                connection.close()  # Cada hilo tiene su propia conexión.
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = [result for chunk in pool.map(worker, chunks) for result in chunk]
+        elapsed = time.perf_counter() - started
+
+        statuses = Counter(result.status for result in results)
+        self.check_invariants(listing, statuses[BidResult.ACCEPTED])
+
+        return {
+            "bids": bids,
+            "workers": workers,
+            "vendor": connection.vendor,
+            "elapsed_seconds": round(elapsed, 3),
+            "outcomes": dict(statuses),
+            "retried_bids": sum(1 for result in results if result.attempts > 1),
+            "accepted_per_second": round(statuses[BidResult.ACCEPTED] / elapsed, 1),
+            "attempts_per_second": round(bids / elapsed, 1),
+        }
+
+    def check_invariants(self, listing, accepted):
+        listing.refresh_from_db()
+        amounts = list(Bid.objects.filter(listing=listing).order_by("id").values_list("amount", flat=True))
+        top = Bid.objects.filter(listing=listing).order_by("-amount").first()
+
+        failures = []
+        if len(amounts) != accepted:
+            failures.append(f"{accepted} bids accepted but {len(amounts)} stored")
+        if listing.bid_count != len(amounts):
+            failures.append(f"bid_count is {listing.bid_count}, expected {len(amounts)}")
+        if any(later <= earlier for earlier, later in zip(amounts, amounts[1:])):
+            failures.append("accepted bids are not strictly increasing")
+        if top and (listing.current_price, listing.highest_bidder_id) != (top.amount, top.bidder_id):
+            failures.append("current_price/highest_bidder do not match the highest bid")
+        if failures:
+            raise CommandError("Invariant violated: " + "; ".join(failures))
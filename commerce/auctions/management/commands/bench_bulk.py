@@ -0,0 +1,81 @@
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.benchmarks import isolated_database
+from auctions.bulk import export_chunks, import_listings, read_rows
+from auctions.models import AuctionListing, User
+
+
+# Importa un catálogo sintético desde un archivo CSV o JSON Lines y lo vuelve a exportar, midiendo
+# filas por segundo y la memoria máxima del proceso (que no debe crecer con el número de filas).
+class Command(BaseCommand):
+    help = "Benchmark bulk listing import and streaming export."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="jsonl")
+        parser.add_argument("--invalid-every", type=int, default=100, help="Make one row in N invalid.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix="auctions-bulk-") as tmpdir:
+            path = os.path.join(tmpdir, f"listings.{options['format']}")
+            self.write_file(path, **options)
+            with isolated_database():
+                report = self.run(path, **options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def write_file(self, path, rows, format, invalid_every, seed, **options):
+        rng = random.Random(seed)
+        categories = [value for value, _ in AuctionListing.CATEGORY_CHOICES]
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            if format == "csv":
+                output.write("title,description,starting_bid,image_url,category,ends_at\n")
+            for n in range(rows):
+                row = {
+                    "title": f"Listing {n}", "description": f"Synthetic listing number {n} for the import benchmark.",
+                    "starting_bid": f"{rng.randint(1, 10000) / 100:.2f}", "image_url": "",
+                    "category": rng.choice(categories), "ends_at": "",
+                }
+                if invalid_every and n % invalid_every == invalid_every - 1:
+                    row["starting_bid"] = "not a price"
+                if format == "csv":
+                    output.write(",".join(row.values()) + "\n")
+                else:
+                    output.write(json.dumps(row) + "\n")
+
+    def run(self, path, rows, format, invalid_every, batch_size, **options):
+        owner = User.objects.create_user("bench-owner")
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as stream:
+            result = import_listings(read_rows(stream, format), owner, batch_size)
+        import_seconds = time.perf_counter() - started
+        import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        expected_failed = rows // invalid_every if invalid_every else 0
+        if (result.created, result.failed) != (rows - expected_failed, expected_failed):
+            raise CommandError(f"Imported {result.created} and rejected {result.failed}, expected {expected_failed} rejected.")
+
+        started = time.perf_counter()
+        exported_bytes = sum(len(chunk) for chunk in export_chunks("listings", format))
+        export_seconds = time.perf_counter() - started
+        return {
+            "rows": rows,
+            "format": format,
+            "created": result.created,
+            "rejected": result.failed,
+            "import_seconds": round(import_seconds, 1),
+            "import_rows_per_second": round(rows / import_seconds),
+            "export_seconds": round(export_seconds, 1),
+            "export_rows_per_second": round(result.created / export_seconds),
+            "export_mb": round(exported_bytes / 2 ** 20, 1),
+            "max_rss_mb_after_import": round(import_rss / 1024),
+            "max_rss_mb_after_export": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        }
@@ -0,0 +1,155 @@
+import json
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.db import set_journal_mode
+from auctions.models import AuctionListing, User
+
+# Perfiles comparados para cada motor. "baseline" es la configuración anterior: una conexión nueva por
+# petición y, en SQLite, el diario por defecto (rollback journal) con synchronous=FULL.
+SQLITE_PROFILES = {
+    "baseline": {"CONN_MAX_AGE": 0, "PRAGMAS": {"busy_timeout": 5000, "synchronous": "full"}, "JOURNAL_MODE": "delete"},
+    "tuned": {"CONN_MAX_AGE": 600, "PRAGMAS": None, "JOURNAL_MODE": "wal"},  # AUCTIONS_SQLITE_PRAGMAS de settings.
+}
+POSTGRESQL_PROFILES = {
+    "baseline": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 600},
+    "pooled": {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {"min_size": 2, "max_size": 16}}},
+}
+
+
+# Mide el rendimiento de una carga mixta de lecturas (portada y detalle) y ofertas con varios hilos
+# concurrentes bajo cada perfil de base de datos del motor configurado. Para medir PostgreSQL se lanza
+# con AUCTIONS_DB_PROFILE=postgresql; el perfil "pooled" necesita psycopg[pool].
+class Command(BaseCommand):
+    help = "Benchmark mixed read/bid throughput under each database profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=1000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each profile run.")
+        parser.add_argument("--bid-ratio", type=float, default=0.2, help="Fraction of operations that are bids.")
+        parser.add_argument("--profile", action="append", help="Only run these profiles.")
+
+    def handle(self, *args, **options):
+        profiles = SQLITE_PROFILES if connection.vendor == "sqlite" else POSTGRESQL_PROFILES
+        if connection.vendor == "postgresql" and not self.pool_available():
+            profiles = {name: profile for name, profile in profiles.items() if name != "pooled"}
+        if options["profile"]:
+            unknown = set(options["profile"]) - set(profiles)
+            if unknown:
+                raise CommandError(f"Unknown profiles for {connection.vendor}: {', '.join(sorted(unknown))}.")
+            profiles = {name: profiles[name] for name in options["profile"]}
+
+        with isolated_database():
+            listing_ids, bidders = self.populate(options["listings"], options["threads"])
+            report = {"vendor": connection.vendor, "threads": options["threads"], "profiles": {}}
+            for name, profile in profiles.items():
+                report["profiles"][name] = self.run_profile(profile, listing_ids, bidders, **options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def pool_available(self):
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def populate(self, listings, threads):
+        owner = User.objects.create_user("bench-owner")
+        bidders = [User.objects.create_user(f"bench-bidder-{n}") for n in range(threads)]
+        AuctionListing.objects.bulk_create([
+            AuctionListing(
+                title=f"Listing {n}", description="Synthetic listing " * 10, starting_bid=Decimal("1.00"),
+                category="OTHER", owner=owner,
+            )
+            for n in range(listings)
+        ])
+        return list(AuctionListing.objects.values_list("id", flat=True)), bidders
+
+    def run_profile(self, database_profile, listing_ids, bidders, threads, seconds, bid_ratio, **options):
+        connections.close_all()
+        settings_dict = connection.settings_dict
+        saved = {key: settings_dict.get(key) for key in ("CONN_MAX_AGE", "OPTIONS")}
+        settings_dict["CONN_MAX_AGE"] = database_profile["CONN_MAX_AGE"]
+        if "OPTIONS" in database_profile:
+            settings_dict["OPTIONS"] = {**(saved["OPTIONS"] or {}), **database_profile["OPTIONS"]}
+        pragmas = database_profile.get("PRAGMAS")
+        overrides = {"AUCTIONS_SQLITE_PRAGMAS": pragmas} if pragmas else {}
+
+        latencies = {"read": [], "bid": []}
+        errors = []
+        deadline = time.perf_counter() + seconds
+
+        def worker(number):
+            rng = random.Random(number)
+            client = Client(raise_request_exception=False)
+            client.force_login(bidders[number])
+            samples = {"read": [], "bid": []}
+            try:
+                while time.perf_counter() < deadline:
+                    listing_id = rng.choice(listing_ids)
+                    started = time.perf_counter()
+                    if rng.random() < bid_ratio:
+                        kind = "bid"
+                        response = client.post(reverse("auctions:bid", args=[listing_id]), {"new_bid": f"{rng.randint(2, 100000) / 100:.2f}"})
+                    elif rng.random() < 0.5:
+                        kind = "read"
+                        response = client.get(reverse("auctions:index"))
+                    else:
+                        kind = "read"
+                        response = client.get(reverse("auctions:listing_detail", args=[listing_id]))
+                    samples[kind].append(time.perf_counter() - started)
+                    if response.status_code >= 500:
+                        errors.append(response.status_code)
+            finally:
+                connections.close_all()
+            for kind, values in samples.items():
+                latencies[kind].extend(values)
+
+        try:
+            with override_settings(**overrides):
+                connection.ensure_connection()  # Aplica los PRAGMA del perfil.
+                if "JOURNAL_MODE" in database_profile:
+                    set_journal_mode(database_profile["JOURNAL_MODE"])  # Queda en el archivo para todos los hilos.
+                connection.close()
+                workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+                started = time.perf_counter()
+                for thread in workers:
+                    thread.start()
+                for thread in workers:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+        finally:
+            connections.close_all()
+            settings_dict.update(saved)
+
+        operations = len(latencies["read"]) + len(latencies["bid"])
+        return {
+            "operations_per_second": round(operations / elapsed),
+            "reads": len(latencies["read"]),
+            "bids": len(latencies["bid"]),
+            "errors": len(errors),
+            "read_ms": self.summary(latencies["read"]),
+            "bid_ms": self.summary(latencies["bid"]),
+        }
+
+    def summary(self, samples):
+        if not samples:
+            return {}
+        samples.sort()
+        return {
+            "p50": round(statistics.median(samples) * 1000, 2),
+            "p95": round(samples[int(len(samples) * 0.95)] * 1000, 2),
+            "p99": round(samples[int(len(samples) * 0.99)] * 1000, 2),
+        }
@@ -0,0 +1,84 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from auctions.benchmarks import isolated_database
+from auctions.expiry import close_expired
+from auctions.models import AuctionListing, Bid, User
+
+
+# Cierra miles de subastas vencidas con varios procesos de vencimiento a la vez y verifica que cada
+# subasta se cierre una sola vez y con el ganador correcto.
+class Command(BaseCommand):
+    help = "Benchmark the expiry sweep with concurrent workers and verify the winners."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=20000, help="Expired listings to close.")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent sweepers.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            report = self.run(**options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, listings, workers, batch_size, **options):
+        owner = User.objects.create_user("bench-owner")
+        bidder = User.objects.create_user("bench-bidder")
+        ended = timezone.now() - timedelta(minutes=1)
+        created = []
+        for start in range(0, listings, 5000):
+            created += AuctionListing.objects.bulk_create([
+                AuctionListing(
+                    title=f"Listing {n}", description="", starting_bid=Decimal("1.00"), owner=owner, ends_at=ended,
+                    # La mitad de las subastas tiene ofertas.
+                    current_price=Decimal(n % 100 + 2) if n % 2 else None,
+                    highest_bidder=bidder if n % 2 else None, bid_count=1 if n % 2 else 0,
+                )
+                for n in range(start, min(start + 5000, listings))
+            ])
+        Bid.objects.bulk_create([
+            Bid(bidder=bidder, listing=listing, amount=listing.current_price)
+            for listing in created if listing.current_price
+        ])
+
+        def sweep(_):
+            try:
+                return close_expired(batch_size=batch_size)[0]
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            closed_per_worker = list(pool.map(sweep, range(workers)))
+        elapsed = time.perf_counter() - started
+
+        failures = []
+        if sum(closed_per_worker) != listings:
+            failures.append(f"workers reported {sum(closed_per_worker)} closes for {listings} listings")
+        if AuctionListing.objects.filter(is_active=True).exists():
+            failures.append("some expired listings are still active")
+        wrong_winner = AuctionListing.objects.filter(current_price__isnull=False).exclude(
+            winner=bidder, winning_bid=F("current_price")
+        ).count()
+        if wrong_winner:
+            failures.append(f"{wrong_winner} listings closed with the wrong winner")
+        if failures:
+            raise CommandError("Invariant violated: " + "; ".join(failures))
+
+        return {
+            "vendor": connection.vendor,
+            "listings": listings,
+            "workers": workers,
+            "batch_size": batch_size,
+            "closed_per_worker": closed_per_worker,
+            "elapsed_seconds": round(elapsed, 3),
+            "closed_per_second": round(listings / elapsed),
+        }
@@ -0,0 +1,93 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.benchmarks.runner import percentiles
+from auctions.cache import get_cache
+from auctions.models import User
+
+PASSWORD = "bench-password"
+
+
+# Mide los inicios de sesión por segundo con distintos costes de PBKDF2 (--iterations) y el coste de
+# leer la sesión en cada petición autenticada con cada motor de sesiones (--engines). Con
+# --max-login-ms falla si el coste configurado (AUCTIONS_PBKDF2_ITERATIONS) supera ese p50.
+class Command(BaseCommand):
+    help = "Benchmark login throughput against password hashing cost and session engines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, action="append", help="PBKDF2 iterations to compare (repeatable).")
+        parser.add_argument("--engines", nargs="+", choices=settings.SESSION_ENGINES, default=list(settings.SESSION_ENGINES))
+        parser.add_argument("--logins", type=int, default=10, help="Logins measured per configuration.")
+        parser.add_argument("--requests", type=int, default=200, help="Authenticated requests measured per session engine.")
+        parser.add_argument("--max-login-ms", type=float, help="Fail if a login at the configured cost is slower than this.")
+
+    def handle(self, *args, **options):
+        iterations = sorted(set(options["iterations"] or [settings.AUCTIONS_PBKDF2_ITERATIONS, 600_000, 260_000, 100_000]), reverse=True)
+        report = {"logins": {}, "sessions": {}}
+        with isolated_database(), override_settings(DEBUG=False, AUCTIONS_RATELIMITS={}):
+            for count in iterations:
+                report["logins"][str(count)] = self.logins(count, options["logins"])
+            for engine in options["engines"]:
+                report["sessions"][engine] = self.sessions(engine, options["requests"])
+        self.stdout.write(json.dumps(report, indent=2))
+
+        configured = report["logins"].get(str(settings.AUCTIONS_PBKDF2_ITERATIONS))
+        if options["max_login_ms"] is not None and configured and configured["p50"] > options["max_login_ms"]:
+            raise CommandError(f"Login p50 {configured['p50']} ms exceeds {options['max_login_ms']} ms.")
+
+    # Inicios de sesión completos (POST al formulario, hash, sesión nueva) con `count` iteraciones. La
+    # contraseña se guarda con otro coste para medir también el recálculo transparente del primer inicio.
+    def logins(self, count, logins):
+        username = f"bench-login-{count}"
+        with override_settings(AUCTIONS_PBKDF2_ITERATIONS=count + 1):
+            User.objects.create_user(username, password=PASSWORD)
+        with override_settings(AUCTIONS_PBKDF2_ITERATIONS=count):
+            url = reverse("auctions:login")
+            data = {"username": username, "password": PASSWORD}
+            started = time.perf_counter()
+            status = Client().post(url, data).status_code
+            rehash_ms = round((time.perf_counter() - started) * 1000, 3)
+            rehashed = User.objects.get(username=username).password.split("$")[1] == str(count)
+
+            samples = []
+            for _ in range(logins):
+                client = Client()
+                started = time.perf_counter()
+                if client.post(url, data).status_code != 302:
+                    status = None
+                samples.append(time.perf_counter() - started)
+        return {
+            **percentiles(samples),
+            "logins_per_second": round(len(samples) / sum(samples), 1),
+            "first_login_with_rehash_ms": rehash_ms,
+            "rehashed": rehashed and status == 302,
+        }
+
+    # Peticiones autenticadas con el motor de sesiones `engine`: latencia y consultas por petición.
+    def sessions(self, engine, requests):
+        with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[engine]):
+            get_cache().clear()
+            user = User.objects.get_or_create(username="bench-session")[0]
+            client = Client()
+            client.force_login(user)
+            url = reverse("auctions:watchlist_store")
+            client.get(url)
+            samples = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    client.get(url)
+                    samples.append(time.perf_counter() - started)
+        return {
+            **percentiles(samples),
+            "requests_per_second": round(len(samples) / sum(samples), 1),
+            "queries_per_request": round(len(queries) / requests, 2),
+        }
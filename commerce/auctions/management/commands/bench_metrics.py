@@ -0,0 +1,104 @@
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.metrics import get_registry, sql_timer
+from auctions.models import AuctionListing, Bid, Comment, User
+
+METRICS_MIDDLEWARE = "auctions.metrics.MetricsMiddleware"
+
+
+# Mide el coste de la instrumentación: las mismas peticiones con y sin MetricsMiddleware, el motor de
+# plantillas medido y el wrapper de SQL, en rondas alternas para que el ruido afecte a ambas por igual.
+# Falla si con métricas es más lento en más de --max-overhead por ciento.
+class Command(BaseCommand):
+    help = "Benchmark the overhead of the request metrics middleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=500)
+        parser.add_argument("--rounds", type=int, default=40)
+        parser.add_argument("--requests", type=int, default=20, help="Requests per URL in each round.")
+        parser.add_argument("--max-overhead", type=float, default=2.0, help="Maximum allowed overhead in percent.")
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            report = self.run(**options)
+        self.stdout.write(json.dumps(report, indent=2))
+        if report["overhead_percent"] > options["max_overhead"]:
+            raise CommandError(f"Metrics overhead {report['overhead_percent']}% exceeds {options['max_overhead']}%.")
+
+    def run(self, listings, rounds, requests, **options):
+        owner = User.objects.create_user("bench-owner", password="password")
+        bidder = User.objects.create_user("bench-bidder")
+        created = AuctionListing.objects.bulk_create([
+            AuctionListing(
+                title=f"Listing {n}", description="Synthetic listing " * 20, starting_bid=Decimal("1.00"),
+                category="OTHER", owner=owner, current_price=Decimal("2.00"), highest_bidder=bidder, bid_count=1,
+            )
+            for n in range(listings)
+        ])
+        Bid.objects.bulk_create([Bid(listing=listing, bidder=bidder, amount=Decimal("2.00")) for listing in created])
+        Comment.objects.bulk_create([Comment(listing=listing, commenter=bidder, content="Nice") for listing in created[:50]])
+        urls = [
+            reverse("auctions:index"),
+            reverse("auctions:listing_detail", args=[created[0].id]),
+            reverse("auctions:category_listings", args=["OTHER"]),
+            reverse("auctions:search") + "?q=listing",
+        ]
+
+        plain_middleware = [name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE]
+        plain_templates = [{**engine, "BACKEND": "django.template.backends.django.DjangoTemplates"} for engine in settings.TEMPLATES]
+
+        def measure(instrumented):
+            client = Client()
+            client.force_login(owner)
+            if not instrumented:
+                connection.execute_wrappers.remove(sql_timer)
+            try:
+                started = time.perf_counter()
+                for url in urls:
+                    for _ in range(requests):
+                        client.get(url)
+                return time.perf_counter() - started
+            finally:
+                if not instrumented:
+                    connection.execute_wrappers.append(sql_timer)
+
+        def measure_plain():
+            with override_settings(MIDDLEWARE=plain_middleware, TEMPLATES=plain_templates):
+                return measure(False)
+
+        connection.ensure_connection()
+        measure(True), measure_plain()  # Calentamiento: cachés de plantillas y de subastas.
+        get_registry().reset()
+        timings = {"plain": [], "instrumented": []}
+        for number in range(rounds):
+            order = [("plain", measure_plain), ("instrumented", lambda: measure(True))]
+            for name, function in order if number % 2 else reversed(order):
+                timings[name].append(function())
+
+        plain = statistics.median(timings["plain"])
+        instrumented = statistics.median(timings["instrumented"])
+        # Cada ronda compara las dos variantes medidas una junto a la otra; la mediana de esos cocientes
+        # no se ve afectada por las variaciones lentas de la máquina entre rondas.
+        ratio = statistics.median(with_metrics / without for with_metrics, without in zip(timings["instrumented"], timings["plain"]))
+        per_request = len(urls) * requests
+        return {
+            "vendor": connection.vendor,
+            "urls": urls,
+            "requests_per_round": per_request,
+            "rounds": rounds,
+            "plain_ms_per_request": round(plain / per_request * 1000, 3),
+            "instrumented_ms_per_request": round(instrumented / per_request * 1000, 3),
+            "overhead_percent": round((ratio - 1) * 100, 2),
+            "recorded_views": {name: view["count"] for name, view in get_registry().snapshot().items()},
+        }
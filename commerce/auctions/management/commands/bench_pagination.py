@@ -0,0 +1,82 @@
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from auctions.benchmarks import isolated_database
+from auctions.models import AuctionListing, User
+from auctions.pagination import NEXT, encode_cursor, paginate
+
+
+# Compara la latencia de la página 1 y de una página profunda con paginación por cursor y con OFFSET.
+class Command(BaseCommand):
+    help = "Benchmark page-1 vs deep-page latency for keyset and OFFSET pagination."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=50000, help="Active listings to create.")
+        parser.add_argument("--page-size", type=int, default=24)
+        parser.add_argument("--page", type=int, default=1000, help="Deep page to compare against page 1.")
+        parser.add_argument("--repeat", type=int, default=50, help="Timed requests per measurement.")
+
+    def handle(self, *args, **options):
+        if options["page"] * options["page_size"] > options["listings"]:
+            raise CommandError("--listings is too small to reach --page.")
+
+        with isolated_database():
+            report = self.run(**options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, listings, page_size, page, repeat, **options):
+        owner = User.objects.create_user("bench-owner")
+        for start in range(0, listings, 5000):
+            AuctionListing.objects.bulk_create([
+                AuctionListing(
+                    title=f"Listing {n}", description="x" * 200, starting_bid=Decimal("1.00"),
+                    category="OTHER", owner=owner,
+                )
+                for n in range(start, min(start + 5000, listings))
+            ])
+
+        queryset = AuctionListing.objects.card_rows().filter(is_active=True)
+        # Cursor de la página profunda: la clave de la última fila de la página anterior.
+        boundary = queryset.order_by("-id").values_list("id", flat=True)[(page - 1) * page_size - 1]
+        deep_cursor = encode_cursor(NEXT, [boundary])
+        offset = (page - 1) * page_size
+
+        client = Client()
+        return {
+            "vendor": connection.vendor,
+            "listings": listings,
+            "page_size": page_size,
+            "deep_page": page,
+            "keyset_ms": {
+                "page_1": self.measure(repeat, lambda: paginate(queryset, None, page_size)),
+                f"page_{page}": self.measure(repeat, lambda: paginate(queryset, deep_cursor, page_size)),
+            },
+            "offset_ms": {
+                "page_1": self.measure(repeat, lambda: list(queryset.order_by("-id")[:page_size])),
+                f"page_{page}": self.measure(repeat, lambda: list(queryset.order_by("-id")[offset:offset + page_size])),
+            },
+            "index_view_ms": {
+                "page_1": self.measure(repeat, lambda: client.get("/", {"page_size": page_size})),
+                f"page_{page}": self.measure(repeat, lambda: client.get("/", {"cursor": deep_cursor, "page_size": page_size})),
+            },
+        }
+
+    # Mediana y p95 en milisegundos.
+    def measure(self, repeat, function):
+        function()  # Calentamiento.
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return {
+            "median": round(statistics.median(samples), 3),
+            "p95": round(samples[int(len(samples) * 0.95) - 1], 3),
+        }
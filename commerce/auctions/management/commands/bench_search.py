@@ -0,0 +1,94 @@
+import itertools
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auctions.benchmarks import isolated_database
+from auctions.models import AuctionListing, User
+from auctions.search import get_backend, search_listings
+
+
+# Mide la latencia de la búsqueda (p50/p95/p99) sobre un catálogo sintético y falla si el p95
+# supera el objetivo.
+class Command(BaseCommand):
+    help = "Benchmark listing search latency over a synthetic catalogue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=1000000)
+        parser.add_argument("--queries", type=int, default=1000)
+        parser.add_argument("--vocabulary", type=int, default=20000, help="Distinct words in the catalogue.")
+        parser.add_argument("--target-ms", type=float, default=20.0, help="Maximum allowed p95 latency.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            report = self.run(**options)
+        self.stdout.write(json.dumps(report, indent=2))
+        if report["p95_ms"] > options["target_ms"]:
+            raise CommandError(f"p95 {report['p95_ms']}ms exceeds the {options['target_ms']}ms target.")
+
+    def run(self, listings, queries, vocabulary, seed, target_ms, **options):
+        rng = random.Random(seed)
+        # Palabras inventadas a partir de sílabas, para que los prefijos se comporten como en un texto real.
+        syllables = [consonant + vowel for consonant in "bcdfglmnprstv" for vowel in "aeiou"]
+        words = set()
+        while len(words) < vocabulary:
+            words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+        words = sorted(words)
+        rng.shuffle(words)
+        # Distribución de Zipf: pocas palabras muy frecuentes y una cola larga de palabras raras.
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+        categories = [value for value, _ in AuctionListing.CATEGORY_CHOICES]
+
+        owner = User.objects.create_user("bench-owner")
+        started = time.perf_counter()
+        for start in range(0, listings, 10000):
+            count = min(10000, listings - start)
+            titles = rng.choices(words, cum_weights=weights, k=count * 4)
+            descriptions = rng.choices(words, cum_weights=weights, k=count * 20)
+            AuctionListing.objects.bulk_create([
+                AuctionListing(
+                    title=" ".join(titles[n * 4:n * 4 + 4]),
+                    description=" ".join(descriptions[n * 20:n * 20 + 20]),
+                    starting_bid=Decimal("1.00"), category=rng.choice(categories), owner=owner,
+                    is_active=rng.random() < 0.8,
+                )
+                for n in range(count)
+            ])
+        backend = get_backend()
+        backend.rebuild()
+        load_seconds = time.perf_counter() - started
+
+        # Mezcla de consultas: una palabra, dos palabras, autocompletado por prefijo y filtro por categoría.
+        samples = []
+        for n in range(queries):
+            kind = n % 4
+            terms = rng.choices(words, cum_weights=weights, k=2 if kind == 1 else 1)
+            query = " ".join(terms)
+            kwargs = {}
+            if kind == 2:
+                query = query[:3]
+                kwargs["prefix"] = True
+            elif kind == 3:
+                kwargs["category"] = rng.choice(categories)
+            begin = time.perf_counter()
+            search_listings(query, **kwargs)
+            samples.append((time.perf_counter() - begin) * 1000)
+
+        samples.sort()
+        percentile = lambda p: round(samples[min(len(samples) - 1, int(len(samples) * p))], 3)
+        return {
+            "vendor": connection.vendor,
+            "backend": type(backend).__name__,
+            "listings": listings,
+            "queries": queries,
+            "load_seconds": round(load_seconds, 1),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "target_ms": target_ms,
+        }
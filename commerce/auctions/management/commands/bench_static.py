@@ -0,0 +1,134 @@
+import http.client
+import json
+import re
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.benchmarks.data import SCALES, generate
+from auctions.benchmarks.runner import percentiles, start_server
+from auctions.cache import get_cache
+
+ACCEPT_ENCODING = "br, gzip"
+
+
+# Navegador mínimo: descarga una página y los recursos de STATIC_URL y MEDIA_URL que enlaza, uno tras
+# otro, y guarda lo que permite la caché HTTP. Una visita "en caliente" simula volver cuando max-age ya
+# ha pasado: los recursos inmutables salen de la caché sin petición y el resto se revalidan con
+# If-None-Match o If-Modified-Since.
+class Browser:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cache = {}
+        self.asset_re = re.compile(r'(?:href|src)="((?:%s|%s)[^"]+)"' % (re.escape(settings.STATIC_URL), re.escape(settings.MEDIA_URL)))
+
+    def fetch(self, path):
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        cached = self.cache.get(path)
+        if cached and cached["immutable"]:
+            return None
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        elif cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            started = time.perf_counter()
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            ttfb = time.perf_counter() - started
+            body = response.read()
+        finally:
+            connection.close()
+        header_bytes = sum(len(name) + len(value) + 4 for name, value in response.getheaders())
+        if response.status == 200 and self.asset_re.fullmatch(f'src="{path}"'):
+            self.cache[path] = {
+                "immutable": "immutable" in response.getheader("Cache-Control", ""),
+                "etag": response.getheader("ETag"),
+                "last_modified": response.getheader("Last-Modified"),
+            }
+        return {"status": response.status, "ttfb": ttfb, "bytes": header_bytes + len(body), "body": body}
+
+    def load(self, path):
+        started = time.perf_counter()
+        page = self.fetch(path)
+        load = {"requests": 1, "static_requests": 0, "bytes": page["bytes"]}
+        for asset in dict.fromkeys(self.asset_re.findall(page["body"].decode())):
+            result = self.fetch(asset)
+            if result is not None:
+                load["requests"] += 1
+                load["static_requests"] += asset.startswith(settings.STATIC_URL)
+                load["bytes"] += result["bytes"]
+        return {**load, "ttfb": page["ttfb"], "time": time.perf_counter() - started}
+
+
+# Mide la carga completa de la página principal (HTML y recursos estáticos y de imágenes que enlaza) con
+# un navegador sin caché (cold) y otro que vuelve a la página (warm), con los archivos de collectstatic
+# servidos por StaticFilesMiddleware en un servidor HTTP local. Compara el almacenamiento sin hash ni
+# compresión (plain) con el de nombres con hash y variantes comprimidas (manifest). Falla si con
+# manifest la visita en caliente vuelve a pedir algún archivo estático.
+class Command(BaseCommand):
+    help = "Measure bytes transferred and time to first byte for cold and warm page loads with each static files storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="tiny")
+        parser.add_argument("--loads", type=int, default=20, help="Page loads measured per storage and cache state.")
+        parser.add_argument("--storages", nargs="+", choices=settings.STATIC_STORAGES, default=list(settings.STATIC_STORAGES))
+
+    def handle(self, *args, **options):
+        report = {}
+        with isolated_database(), override_settings(DEBUG=False, AUCTIONS_RATELIMITS={}):
+            generate(SCALES[options["scale"]])
+            for name in options["storages"]:
+                report[name] = self.measure(name, options["loads"])
+        self.stdout.write(json.dumps(report, indent=2))
+
+        manifest = report.get("manifest")
+        if manifest and manifest["warm"]["static_requests"]:
+            raise CommandError(f"Warm loads requested {manifest['warm']['static_requests']} hashed static files.")
+
+    def measure(self, storage, loads):
+        static_root = tempfile.mkdtemp(prefix="auctions-bench-static-")
+        storages = {**settings.STORAGES, "staticfiles": {"BACKEND": settings.STATIC_STORAGES[storage]}}
+        try:
+            with override_settings(STATIC_ROOT=static_root, STORAGES=storages):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                get_cache().clear()  # Los fragmentos cacheados guardan las URL de los archivos estáticos.
+                server, thread = start_server()
+                host, port = server.server_address[:2]
+                try:
+                    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host]):
+                        return self.loads(host, port, loads)
+                finally:
+                    server.shutdown()
+                    server.server_close()
+                    thread.join()
+        finally:
+            shutil.rmtree(static_root, ignore_errors=True)
+
+    def loads(self, host, port, loads):
+        path = reverse("auctions:index")
+        cold, warm = [], []
+        for _ in range(loads):
+            browser = Browser(host, port)
+            cold.append(browser.load(path))
+            warm.append(browser.load(path))
+        return {"cold": self.summary(cold), "warm": self.summary(warm)}
+
+    def summary(self, results):
+        return {
+            "ttfb": percentiles([result["ttfb"] for result in results]),
+            "load": percentiles([result["time"] for result in results]),
+            "requests": round(sum(result["requests"] for result in results) / len(results), 1),
+            "bytes": round(sum(result["bytes"] for result in results) / len(results)),
+            "static_requests": round(sum(result["static_requests"] for result in results) / len(results), 1),
+        }
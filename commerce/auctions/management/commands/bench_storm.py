@@ -0,0 +1,166 @@
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.benchmarks.data import SCALES, generate
+from auctions.benchmarks.loadgen import http_worker
+from auctions.benchmarks.runner import percentiles, start_server
+from auctions.bidding import place_bid
+from auctions.cache import get_cache
+from auctions.metrics import get_registry
+from auctions.models import Bid
+from auctions.ratelimit import get_backend
+
+
+# Consultas SQL y peticiones registradas por la vista desde el último reset de las métricas.
+def _view_load(view_name):
+    view = get_registry().snapshot().get(view_name, {})
+    return view.get("sql_count", 0), view.get("count", 0)
+
+
+# Simula el final de una subasta muy disputada y compara la carga de la base de datos con y sin las
+# protecciones: (1) muchos visitantes anónimos recargando el detalle de una subasta mientras llegan
+# ofertas que invalidan su caché, por HTTP contra un servidor con un hilo por petición, y (2) bots que
+# envían ofertas sin parar. Cada configuración se mide con la misma carga; falla si agrupar las
+# peticiones no reduce las consultas del detalle al menos --min-reduction por ciento.
+class Command(BaseCommand):
+    help = "Measure database load under a synthetic request storm with and without rate limiting and coalescing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="tiny")
+        parser.add_argument("--clients", type=int, default=32, help="Concurrent anonymous clients refreshing the detail page.")
+        parser.add_argument("--bots", type=int, default=4, help="Logged-in clients spamming bids.")
+        parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each storm.")
+        parser.add_argument("--bid-interval", type=float, default=0.02, help="Seconds between real bids during the detail storm.")
+        parser.add_argument("--min-reduction", type=float, default=0.0, help="Required detail query reduction in percent.")
+
+    def handle(self, *args, **options):
+        configurations = {
+            "unprotected": {"AUCTIONS_SINGLE_FLIGHT": False, "AUCTIONS_RATELIMITS": {}},
+            "single_flight": {"AUCTIONS_SINGLE_FLIGHT": True, "AUCTIONS_RATELIMITS": {}},
+            "rate_limited": {"AUCTIONS_SINGLE_FLIGHT": True, "AUCTIONS_RATELIMITS": settings.AUCTIONS_RATELIMITS},
+        }
+        report = {"clients": options["clients"], "bots": options["bots"], "seconds": options["seconds"]}
+        # Importes crecientes en todas las tormentas para que todas las ofertas se acepten.
+        self.amounts = itertools.count(100000)
+        self.amounts_lock = threading.Lock()
+        with isolated_database(), override_settings(DEBUG=False):
+            dataset = generate(SCALES[options["scale"]])
+            report["detail_storm"] = {
+                name: self.detail_storm(dataset, options, overrides) for name, overrides in configurations.items()
+            }
+            report["bid_storm"] = {
+                name: self.bid_storm(dataset, options, configurations[name]) for name in ("unprotected", "rate_limited")
+            }
+
+        unprotected = report["detail_storm"]["unprotected"]["queries_per_request"]
+        coalesced = report["detail_storm"]["single_flight"]["queries_per_request"]
+        reduction = round(100 * (1 - coalesced / unprotected), 1) if unprotected else 0.0
+        report["detail_query_reduction_percent"] = reduction
+        self.stdout.write(json.dumps(report, indent=2))
+        if reduction < options["min_reduction"]:
+            raise CommandError(f"Coalescing reduced detail queries by {reduction}%, below {options['min_reduction']}%.")
+
+    def next_amount(self):
+        with self.amounts_lock:
+            return next(self.amounts)
+
+    def reset(self):
+        get_cache().clear()
+        get_backend().reset()
+        get_registry().reset()
+
+    # Visitantes anónimos recargan una subasta por HTTP mientras otro hilo puja cada --bid-interval segundos.
+    def detail_storm(self, dataset, options, overrides):
+        listing_id = dataset.active_ids[0]
+        bidder = dataset.users[1]
+        path = reverse("auctions:listing_detail", args=[listing_id])
+        stop = threading.Event()
+        accepted = []
+
+        def bid_loop():
+            try:
+                while not stop.wait(options["bid_interval"]):
+                    accepted.append(place_bid(listing_id, bidder, self.next_amount()).accepted)
+            finally:
+                connection.close()
+
+        server, thread = start_server()
+        host, port = server.server_address[:2]
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host], **overrides):
+                self.reset()
+                bidding = threading.Thread(target=bid_loop)
+                bidding.start()
+                with ThreadPoolExecutor(options["clients"]) as executor:
+                    results = list(executor.map(
+                        lambda _: http_worker(host, port, [path], None, options["seconds"], 0, 200), range(options["clients"]),
+                    ))
+                stop.set()
+                bidding.join()
+                queries, requests = _view_load("auctions:listing_detail")
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        samples = [latency for latencies, _ in results for latency in latencies]
+        return {
+            **percentiles(samples),
+            "requests": len(samples),
+            "requests_per_second": round(len(samples) / options["seconds"], 1),
+            "rejected": sum(errors for _, errors in results),
+            "queries": queries,
+            "queries_per_request": round(queries / requests, 3) if requests else None,
+            "bids_accepted": sum(accepted),
+        }
+
+    # Bots con sesión iniciada envían ofertas crecientes sin pausa.
+    def bid_storm(self, dataset, options, overrides):
+        listing_id = dataset.active_ids[1]
+        url = reverse("auctions:bid", args=[listing_id])
+        clients = []
+        for user in dataset.users[1:options["bots"] + 1]:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+
+        def bot(client):
+            statuses = {}
+            deadline = time.perf_counter() + options["seconds"]
+            try:
+                while time.perf_counter() < deadline:
+                    status = client.post(url, {"new_bid": f"{self.next_amount()}.00"}).status_code
+                    statuses[status] = statuses.get(status, 0) + 1
+            finally:
+                connection.close()
+            return statuses
+
+        with override_settings(**overrides):
+            self.reset()
+            bids_before = Bid.objects.filter(listing_id=listing_id).count()
+            with ThreadPoolExecutor(len(clients)) as executor:
+                results = list(executor.map(bot, clients))
+            queries, requests = _view_load("auctions:bid")
+
+        statuses = {}
+        for result in results:
+            for status, count in result.items():
+                statuses[str(status)] = statuses.get(str(status), 0) + count
+        return {
+            "requests": sum(statuses.values()),
+            "statuses": statuses,
+            "bids_written": Bid.objects.filter(listing_id=listing_id).count() - bids_before,
+            "queries": queries,
+            "queries_per_request": round(queries / requests, 3) if requests else None,
+        }
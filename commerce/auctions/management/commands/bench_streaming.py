@@ -0,0 +1,144 @@
+import asyncio
+import gc
+import json
+import threading
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from auctions.benchmarks import isolated_database
+from auctions.models import AuctionListing, User
+from auctions.streaming import get_broker, listing_channel, publish_listing_event
+
+
+# Cliente ASGI simulado: guarda la hora de llegada de cada evento y se queda conectado hasta que se le
+# pide desconectarse. Un cliente lento no termina nunca de recibir, como un socket con el buffer lleno.
+class Client:
+    def __init__(self, loop, slow=False):
+        self.slow = slow
+        self.events = []
+        self.ready = loop.create_future()
+        self.disconnected = loop.create_future()
+        self._stalled = loop.create_future()
+        self._requested = False
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        received = time.perf_counter()
+        for block in message["body"].decode().split("\n\n"):
+            if block.startswith("event: "):
+                self.events.append((block.split("\n", 1)[0][7:], received))
+        if not self.ready.done():
+            self.ready.set_result(None)
+        elif self.slow:
+            await self._stalled
+
+
+# Conecta miles de clientes SSE ociosos a una subasta mediante la aplicación ASGI, mide la memoria por
+# suscriptor y la latencia de reparto de cada oferta, y comprueba que los clientes lentos no acumulan
+# eventos sin límite.
+class Command(BaseCommand):
+    help = "Load test the listing event stream with thousands of idle subscribers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=10000)
+        parser.add_argument("--slow", type=int, default=100, help="Subscribers that never read their events.")
+        parser.add_argument("--events", type=int, default=50, help="Bid events to publish.")
+        parser.add_argument("--max-bytes-per-subscriber", type=int, default=64 * 1024)
+
+    def handle(self, *args, **options):
+        with isolated_database(), override_settings(AUCTIONS_EVENTS_STREAMING=True):
+            report = asyncio.run(self.run(**options))
+        self.stdout.write(json.dumps(report, indent=2))
+        if report["bytes_per_subscriber"] > options["max_bytes_per_subscriber"]:
+            raise CommandError(f"{report['bytes_per_subscriber']} bytes per subscriber exceeds the limit.")
+
+    async def run(self, subscribers, slow, events, **options):
+        owner = await User.objects.acreate(username="bench-owner")
+        listing = await AuctionListing.objects.acreate(
+            title="Streamed listing", description="", starting_bid=Decimal("1.00"), owner=owner,
+        )
+        channel = listing_channel(listing.id)
+        broker = get_broker()
+        application = ASGIHandler()
+        path = reverse("auctions:listing_events", args=[listing.id])
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"accept", b"text/event-stream")],
+            "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+        }
+        loop = asyncio.get_running_loop()
+
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        clients = [Client(loop, slow=n < slow) for n in range(subscribers)]
+        tasks = [asyncio.create_task(application(dict(scope), client.receive, client.send)) for client in clients]
+        await asyncio.gather(*(client.ready for client in clients))
+        connect_seconds = time.perf_counter() - started
+        gc.collect()
+        connected_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()  # El rastreo de memoria ralentiza el resto de la prueba.
+        connected = broker.subscriber_count(channel)
+
+        # Las ofertas se publican desde otro hilo, igual que las publica una vista síncrona tras el commit.
+        fast = clients[slow:]
+        latencies = []
+        for n in range(events):
+            published = time.perf_counter()
+            threading.Thread(
+                target=publish_listing_event, args=(listing.id, {"type": "bid", "amount": Decimal(n + 2)}),
+            ).start()
+            while any(len(client.events) < n + 2 for client in fast):
+                await asyncio.sleep(0.001)
+            latencies.append(max(client.events[n + 1][1] for client in fast) - published)
+
+        # Con suficientes eventos los clientes lentos superan el máximo de descartes y se desconectan.
+        for n in range(broker.max_queue + broker.max_dropped + 1):
+            publish_listing_event(listing.id, {"type": "bid", "amount": Decimal(events + n + 2)})
+            await asyncio.sleep(0)
+        deadline = time.perf_counter() + 30
+        while broker.subscriber_count(channel) > subscribers - slow and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        remaining = broker.subscriber_count(channel)
+
+        for client in clients:
+            client.disconnected.set_result(None)
+        await asyncio.gather(*tasks)
+
+        if connected != subscribers:
+            raise CommandError(f"Only {connected} of {subscribers} subscribers connected.")
+        if remaining != subscribers - slow:
+            raise CommandError(f"{subscribers - remaining} subscribers were dropped, expected {slow} slow ones.")
+        if broker.subscriber_count(channel):
+            raise CommandError("Subscriptions leaked after every client disconnected.")
+
+        latencies.sort()
+        percentile = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+        return {
+            "subscribers": subscribers,
+            "slow_subscribers": slow,
+            "max_queue": broker.max_queue,
+            "connect_seconds": round(connect_seconds, 2),
+            "bytes_per_subscriber": connected_bytes // subscribers,
+            "fan_out_p50_ms": percentile(0.50),
+            "fan_out_p99_ms": percentile(0.99),
+            "slow_subscribers_disconnected": subscribers - remaining,
+            "keepalive_seconds": settings.AUCTIONS_EVENTS_KEEPALIVE,
+        }
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Substr
+from django.template.backends.django import DjangoTemplates
+from django.test.utils import override_settings
+
+from auctions.benchmarks import isolated_database
+from auctions.benchmarks.runner import percentiles
+from auctions.models import AuctionListing, User
+
+# Tarjetas como se renderizaban antes de {% listing_card %}: instancias del modelo, el resumen recortado
+# en la plantilla y get_category_display por tarjeta.
+BEFORE_TEMPLATE = """{% load auction_images %}{% for listing in listings %}
+<div class="listing-card">
+    <a href="{% url 'auctions:listing_detail' listing.id %}">
+        {% listing_image listing "card" %}
+        <div class="listing-details">
+            <h3>{{ listing.title }}</h3>
+            <p>{{ listing.summary|truncatechars:140 }}</p>
+            <p>Starting bid: ${{ listing.starting_bid }}</p>
+            <p>Current price: ${{ listing.display_price }} ({{ listing.bid_count }} bid{{ listing.bid_count|pluralize }})</p>
+            <p>Category: {{ listing.get_category_display }}</p>
+            <p>Owner: {{ listing.owner }}</p>
+        </div>
+    </a>
+</div>{% endfor %}"""
+
+AFTER_TEMPLATE = """{% load auction_cards %}{% for listing in listings %}
+{% listing_card listing %}{% endfor %}"""
+
+BEFORE_FIELDS = [
+    "id", "title", "image_url", "image", "image_status", "image_widths", "category", "starting_bid",
+    "current_price", "bid_count", "winning_bid", "owner__username",
+]
+
+
+# Mide la consulta y el render de --cards tarjetas de subasta (sin la caché de fragmentos) antes y
+# después de {% listing_card %}: antes, instancias del modelo con la plantilla releída y compilada en
+# cada render; después, filas de card_rows() con el cargador de plantillas cacheado. Con --min-speedup
+# falla si el total no mejora al menos esa proporción.
+class Command(BaseCommand):
+    help = "Benchmark rendering listing cards with model instances and uncached templates vs card rows and cached templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20, help="Timed renders per variant.")
+        parser.add_argument("--min-speedup", type=float, help="Required ratio of before to after total time.")
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix="auctions-bench-templates-")
+        try:
+            for name, source in (("before.html", BEFORE_TEMPLATE), ("after.html", AFTER_TEMPLATE)):
+                with open(os.path.join(directory, name), "w") as output:
+                    output.write(source)
+            with isolated_database(), override_settings(DEBUG=False):
+                self.create_listings(options["cards"])
+                listings = AuctionListing.objects.filter(is_active=True).order_by("-id")[:options["cards"]]
+                before = self.measure(
+                    self.engine(directory, cached=False).get_template, "before.html", options["repeat"],
+                    lambda: listings.select_related("owner").only(*BEFORE_FIELDS).annotate(summary=Substr("description", 1, 141)),
+                )
+                after = self.measure(
+                    self.engine(directory, cached=True).get_template, "after.html", options["repeat"],
+                    lambda: listings.card_rows(),
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        speedup = round(before["total"]["p50"] / after["total"]["p50"], 2) if after["total"]["p50"] else None
+        report = {"cards": options["cards"], "before": before, "after": after, "speedup": speedup}
+        self.stdout.write(json.dumps(report, indent=2))
+        if options["min_speedup"] is not None and (speedup or 0) < options["min_speedup"]:
+            raise CommandError(f"Card rendering sped up {speedup}x, below {options['min_speedup']}x.")
+
+    def create_listings(self, count):
+        owner = User.objects.create_user("bench-cards")
+        categories = [value for value, _ in AuctionListing.CATEGORY_CHOICES]
+        AuctionListing.objects.bulk_create([
+            AuctionListing(
+                title=f"Listing {n}", description=f"Listing {n} " + "lorem ipsum " * (n % 40), starting_bid=Decimal("5.00"),
+                current_price=Decimal("7.50") if n % 2 else None, bid_count=n % 2, category=categories[n % len(categories)],
+                image_url=f"https://example.com/{n}.jpg" if n % 3 == 0 else None, owner=owner,
+            )
+            for n in range(count)
+        ])
+
+    # Motor de plantillas como el de settings.TEMPLATES, con o sin el cargador cacheado.
+    def engine(self, directory, cached):
+        loaders = [("django.template.loaders.cached.Loader", settings.TEMPLATE_LOADERS)] if cached else settings.TEMPLATE_LOADERS
+        return DjangoTemplates({
+            "NAME": f"bench-{'cached' if cached else 'uncached'}", "DIRS": [directory], "APP_DIRS": False,
+            "OPTIONS": {"loaders": loaders},
+        })
+
+    def measure(self, get_template, name, repeat, rows):
+        samples = {"query": [], "render": [], "total": []}
+        get_template(name).render({"listings": list(rows())})  # Calentamiento.
+        for _ in range(repeat):
+            started = time.perf_counter()
+            listings = list(rows())
+            queried = time.perf_counter()
+            get_template(name).render({"listings": listings})
+            rendered = time.perf_counter()
+            samples["query"].append(queried - started)
+            samples["render"].append(rendered - queried)
+            samples["total"].append(rendered - started)
+        return {kind: percentiles(values) for kind, values in samples.items()}
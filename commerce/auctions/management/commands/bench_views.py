@@ -0,0 +1,67 @@
+import dataclasses
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from auctions.benchmarks import isolated_database
+from auctions.benchmarks.data import SCALES, generate
+from auctions.benchmarks.runner import compare, run_client, run_http
+from auctions.benchmarks.scenarios import SCENARIOS, uncovered_url_names
+
+
+# Benchmark de todas las vistas de auctions/urls.py sobre datos generados de forma determinista:
+# latencia p50/p95/p99, peticiones por segundo y consultas por petición, con el cliente de pruebas de
+# Django y/o con un generador de carga HTTP de varios procesos. Con --baseline compara el informe con
+# uno guardado antes (--output) y falla si alguna vista empeora más de --threshold por ciento.
+class Command(BaseCommand):
+    help = "Benchmark every auctions view and compare the results with a stored baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--mode", choices=["client", "http", "both"], default="client")
+        parser.add_argument("--requests", type=int, default=50, help="Requests per scenario with the test client.")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--processes", type=int, default=4, help="HTTP load generator processes.")
+        parser.add_argument("--seconds", type=float, default=3.0, help="HTTP load per scenario, in seconds.")
+        parser.add_argument("--scenario", action="append", help="Only run these scenarios.")
+        parser.add_argument("--output", help="Write the JSON report to this file (use it later as --baseline).")
+        parser.add_argument("--baseline", help="Compare with a previous JSON report.")
+        parser.add_argument("--threshold", type=float, default=25.0, help="Allowed regression in percent.")
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options["scenario"]:
+            unknown = set(options["scenario"]) - {scenario.name for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}.")
+            scenarios = [scenario for scenario in SCENARIOS if scenario.name in options["scenario"]]
+        missing = uncovered_url_names()
+        if missing:
+            self.stderr.write(f"URLs without a benchmark scenario: {', '.join(sorted(missing))}.")
+
+        scale = SCALES[options["scale"]]
+        report = {"vendor": connection.vendor, "scale": {"name": options["scale"], **dataclasses.asdict(scale)}, "seed": options["seed"]}
+        # Sin DEBUG, como en producción: con DEBUG Django guarda cada consulta en memoria. Sin límites de
+        # peticiones, que rechazarían la carga del propio benchmark (ver bench_storm).
+        with isolated_database(), override_settings(DEBUG=False, AUCTIONS_RATELIMITS={}):
+            dataset = generate(scale, options["seed"])
+            if options["mode"] in ("client", "both"):
+                report["client"] = run_client(scenarios, dataset, options["requests"], options["warmup"])
+            if options["mode"] in ("http", "both"):
+                report["http"] = run_http(scenarios, dataset, options["processes"], options["seconds"])
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                regressions = compare(report, json.load(file), options["threshold"] / 100)
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
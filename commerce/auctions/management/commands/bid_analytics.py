@@ -0,0 +1,40 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from auctions import analytics
+from auctions.models import Bid
+
+
+# Análisis por lotes de las ofertas con NumPy: exporta las ofertas a arrays (opcionalmente a un .npz para
+# analizarlas más tarde o en otra máquina) y calcula estadísticas por subasta y los pujadores más activos.
+class Command(BaseCommand):
+    help = "Compute batch bid analytics over exported NumPy arrays."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Only bids from the last N days.")
+        parser.add_argument("--top", type=int, default=10, help="Listings and bidders to report.")
+        parser.add_argument("--window", type=int, default=analytics.HOT_WINDOW, help="Recent window in seconds.")
+        parser.add_argument("--save", help="Also write the exported arrays to this .npz file.")
+        parser.add_argument("--load", help="Analyze arrays from a .npz file instead of the database.")
+
+    def handle(self, *args, **options):
+        numpy = analytics.numpy
+        if numpy is None:
+            raise CommandError("bid_analytics requires NumPy (pip install numpy).")
+
+        if options["load"]:
+            with numpy.load(options["load"]) as saved:
+                arrays = {name: saved[name] for name in analytics.BID_ARRAYS}
+        else:
+            queryset = Bid.objects.all()
+            if options["days"]:
+                queryset = queryset.filter(bid_time__gte=timezone.now() - timedelta(days=options["days"]))
+            arrays = analytics.bid_arrays(queryset)
+        if options["save"]:
+            numpy.savez_compressed(options["save"], **arrays)
+
+        report = analytics.analyze_bids(arrays, window=options["window"], top=options["top"])
+        self.stdout.write(json.dumps(report, indent=2))
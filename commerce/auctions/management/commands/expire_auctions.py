@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.expiry import close_expired
+
+
+# Cierra las subastas cuyo cierre programado ya pasó. Se puede ejecutar desde cron o, con --loop, como
+# un proceso permanente; es seguro lanzar varias instancias a la vez.
+class Command(BaseCommand):
+    help = "Close expired auctions in batches and report how many were closed per second."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Listings closed per transaction.")
+        parser.add_argument("--loop", action="store_true", help="Keep running, sweeping every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between sweeps with --loop.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        while True:
+            closed, elapsed = close_expired(batch_size=options["batch_size"])
+            if closed or not options["loop"]:
+                rate = closed / elapsed if elapsed else 0
+                self.stdout.write(f"Closed {closed} auctions in {elapsed:.3f}s ({rate:.0f}/s).")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
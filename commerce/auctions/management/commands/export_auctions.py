@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from auctions.bulk import EXPORTS, FORMATS, export_chunks
+
+
+# Exporta subastas, ofertas o comentarios en CSV o JSON Lines, leyendo la base de datos por bloques.
+class Command(BaseCommand):
+    help = "Export listings, bids or comments as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(EXPORTS))
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", help="File to write; defaults to standard output.")
+
+    def handle(self, *args, **options):
+        chunks = export_chunks(options["kind"], options["format"])
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as output:
+            output.writelines(chunks)
@@ -0,0 +1,53 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.bulk import FORMATS, format_from_name, import_listings, read_rows
+from auctions.models import User
+
+
+# Importa subastas desde un archivo CSV o JSON Lines con las columnas de ListingForm. Las filas
+# inválidas se informan una a una (número de fila y errores) sin detener la importación.
+class Command(BaseCommand):
+    help = "Import listings for a user from a CSV or JSON Lines file ('-' reads standard input)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--owner", required=True, help="Username that will own the imported listings.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, or csv.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Listings inserted per transaction.")
+        parser.add_argument("--errors", help="Write rejected rows as JSON Lines to this file instead of stderr.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['owner']}' does not exist.")
+
+        path = options["path"]
+        format = options["format"] or format_from_name(path)
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        errors = open(options["errors"], "w", encoding="utf-8") if options["errors"] else self.stderr
+
+        def report(number, row_errors):
+            errors.write(json.dumps({"row": number, "errors": row_errors}) + "\n")
+
+        started = time.perf_counter()
+        try:
+            result = import_listings(read_rows(stream, format), owner, options["batch_size"], on_error=report)
+        except UnicodeDecodeError:
+            raise CommandError("The file must be UTF-8 encoded; listings in batches already committed were imported.")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if options["errors"]:
+                errors.close()
+        elapsed = time.perf_counter() - started
+        rate = result.created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} listings in {elapsed:.1f}s ({rate:.0f}/s); {result.failed} rows rejected."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions import thumbnails
+from auctions.images import ingest_remote, process_pending
+
+
+# Comando para generar las miniaturas de las imágenes pendientes con un grupo de procesos. Con
+# --ingest antes descarga las imágenes externas (image_url) que aún no están guardadas. Se puede
+# interrumpir y volver a lanzar: cada lote confirmado no se vuelve a procesar.
+class Command(BaseCommand):
+    help = "Generate listing thumbnails (and with --ingest, download external images first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ingest", action="store_true", help="Download external image_url images first.")
+        parser.add_argument("--workers", type=int, help="Thumbnail processes (default: AUCTIONS_IMAGE_WORKERS or one per CPU).")
+        parser.add_argument("--download-workers", type=int, default=8, help="Threads downloading external images.")
+        parser.add_argument("--batch-size", type=int, default=200, help="Listings read per batch.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or (options["workers"] is not None and options["workers"] < 1):
+            raise CommandError("--batch-size and --workers must be positive integers.")
+        if thumbnails.Image is None:
+            raise CommandError("Generating thumbnails requires Pillow (pip install Pillow).")
+
+        if options["ingest"]:
+            ingested = ingest_remote(options["download_workers"], options["batch_size"])
+            self.stdout.write(f"Downloaded {ingested['stored']} external images ({ingested['failed']} failed).")
+
+        totals = process_pending(
+            options["workers"], options["batch_size"],
+            on_batch=lambda totals: self.stdout.write(f"{totals['ready']} ready, {totals['failed']} failed..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Generated thumbnails for {totals['ready']} listings ({totals['failed']} failed)."))
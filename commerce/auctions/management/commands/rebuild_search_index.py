@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.search import get_backend
+
+
+# Comando para reconstruir en bloque el índice de búsqueda de subastas. En SQLite reconstruye la tabla
+# FTS5; en otras bases de datos el índice vive en la memoria de cada proceso y se carga al primer uso.
+class Command(BaseCommand):
+    help = "Rebuild the listing search index from the listings table."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        started = time.perf_counter()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {type(backend).__name__} index in {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.facets import reconcile
+
+
+# Comando para recalcular (o verificar con --check) los contadores por categoría a partir de las subastas activas.
+class Command(BaseCommand):
+    help = "Repair or verify the per-category active listing counts and starting bid ranges."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report categories whose counters drifted.")
+
+    def handle(self, *args, **options):
+        drifted = reconcile(check=options["check"])
+        for category, stored, real in drifted:
+            self.stdout.write(f"{category}: stored {stored}, actual {real}.")
+        if options["check"]:
+            if drifted:
+                raise CommandError(f"{len(drifted)} category counters are out of sync.")
+            self.stdout.write(self.style.SUCCESS("All category counters are in sync."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} category counters."))
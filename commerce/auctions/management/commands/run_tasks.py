@@ -0,0 +1,31 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.tasks import work
+
+
+# Worker de la cola de tareas: ejecuta las tareas vencidas con --concurrency hilos, reclamando lotes de
+# --batch-size tareas. Es seguro lanzar varias instancias a la vez. Con --burst termina cuando la cola
+# queda vacía (para cron o pruebas); si no, espera --poll-interval segundos entre comprobaciones.
+class Command(BaseCommand):
+    help = "Run queued background tasks (notifications) with retries and backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=1, help="Worker threads.")
+        parser.add_argument("--batch-size", type=int, default=100, help="Tasks claimed per transaction.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--burst", action="store_true", help="Exit once no tasks are due.")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--concurrency and --batch-size must be positive integers.")
+
+        stop = threading.Event()
+        try:
+            totals = work(options["concurrency"], options["batch_size"], options["poll_interval"], options["burst"], stop)
+        except KeyboardInterrupt:
+            stop.set()
+            self.stdout.write("Stopping after the current batch...")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Ran {totals['done']} tasks ({totals['failed']} failed attempts)."))
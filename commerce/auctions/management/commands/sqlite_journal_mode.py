@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auctions.db import set_journal_mode
+
+JOURNAL_MODES = ("wal", "delete")
+
+
+# Cambia el modo del diario de la base de datos SQLite. El modo queda guardado en el archivo, así que se
+# ejecuta una vez por base de datos (por ejemplo, al desplegar) y no en cada conexión.
+class Command(BaseCommand):
+    help = "Switch the SQLite database to WAL (or back to the rollback journal with 'delete')."
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", choices=JOURNAL_MODES)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError(f"The journal mode only applies to SQLite, not {connection.vendor}.")
+        mode = set_journal_mode(options["mode"])
+        if mode != options["mode"]:
+            raise CommandError(f"SQLite kept the '{mode}' journal mode.")
+        self.stdout.write(self.style.SUCCESS(f"Journal mode is now '{mode}'."))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from auctions.analytics import rebuild_hot_keys
+from auctions.models import AuctionListing, Bid
+
+
+# Comando para verificar con --check el resumen desnormalizado de ofertas de cada subasta (la migración
+# 0004 lo rellena; place_bid lo mantiene) o corregir las que se desviaron. Cada corrección es un UPDATE
+# condicionado a los valores leídos que recalcula el resumen en la misma sentencia: si entretanto llega
+# una oferta, la subasta no se sobrescribe con valores antiguos. Al corregir también reconstruye la clave
+# del ranking de subastas más activas con las ofertas recientes.
+class Command(BaseCommand):
+    help = "Verify (--check) or repair current_price, highest_bidder and bid_count on every listing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report listings whose summary is out of sync.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Listings read per query and repaired per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        # La oferta más alta y el número de ofertas se resuelven con subconsultas sobre el índice (listing, -amount).
+        top_bids = Bid.objects.filter(listing=OuterRef("pk")).order_by("-amount", "id")
+        bid_counts = (
+            Bid.objects.filter(listing=OuterRef("pk"))
+            .order_by()
+            .values("listing")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        summary = {
+            "current_price": Subquery(top_bids.values("amount")[:1]),
+            "highest_bidder": Subquery(top_bids.values("bidder")[:1]),
+            "bid_count": Coalesce(Subquery(bid_counts), Value(0)),
+        }
+        listings = (
+            AuctionListing.objects.order_by("id")
+            .annotate(real_price=summary["current_price"], real_bidder=summary["highest_bidder"], real_count=summary["bid_count"])
+            .values_list("id", "current_price", "highest_bidder", "bid_count", "real_price", "real_bidder", "real_count")
+        )
+
+        stale = []
+        checked = 0
+        for listing_id, *stored, real_price, real_bidder, real_count in listings.iterator(chunk_size=batch_size):
+            checked += 1
+            if tuple(stored) != (real_price, real_bidder, real_count):
+                stale.append((listing_id, *stored))
+
+        if options["check"]:
+            for listing_id, *_ in stale:
+                self.stdout.write(f"Listing {listing_id} is out of sync.")
+            if stale:
+                raise CommandError(f"{len(stale)} of {checked} listings are out of sync.")
+            self.stdout.write(self.style.SUCCESS(f"All {checked} listings are in sync."))
+            return
+
+        now = timezone.now()
+        updated = 0
+        for start in range(0, len(stale), batch_size):
+            with transaction.atomic():
+                for listing_id, price, bidder, count in stale[start:start + batch_size]:
+                    updated += AuctionListing.objects.filter(
+                        id=listing_id, current_price=price, highest_bidder=bidder, bid_count=count,
+                    ).update(**summary, updated_at=now)
+        hot = rebuild_hot_keys(now, batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} of {checked} listings ({len(stale) - updated} changed meanwhile, {hot} with recent bids)."
+        ))
@@ -0,0 +1,216 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger("auctions.slow_requests")
+
+# Medidas de la petición en curso; es una ContextVar para que funcione igual con hilos y con asyncio.
+_current = contextvars.ContextVar("auctions_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("sql_count", "sql_seconds", "template_seconds", "queries")
+
+    def __init__(self, capture_sql):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.queries = [] if capture_sql else None  # [(sql, segundos)] solo si el registro de lentas está activo.
+
+
+# Acumulados por nombre de URL desde que arrancó el proceso.
+class ViewMetrics:
+    __slots__ = ("buckets", "count", "seconds", "sql_count", "sql_seconds", "template_seconds", "response_bytes")
+
+    def __init__(self, bucket_count):
+        self.buckets = [0] * (bucket_count + 1)  # El último es +Inf.
+        self.count = 0
+        self.seconds = 0.0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.response_bytes = 0
+
+
+class Registry:
+    def __init__(self, buckets=None):
+        self.bucket_bounds = tuple(buckets or settings.AUCTIONS_METRICS_BUCKETS)
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: ViewMetrics(len(self.bucket_bounds)))
+
+    def observe(self, view_name, seconds, metrics, response_bytes):
+        bucket = bisect.bisect_left(self.bucket_bounds, seconds)
+        with self._lock:
+            view = self._views[view_name]
+            view.buckets[bucket] += 1
+            view.count += 1
+            view.seconds += seconds
+            view.sql_count += metrics.sql_count
+            view.sql_seconds += metrics.sql_seconds
+            view.template_seconds += metrics.template_seconds
+            view.response_bytes += response_bytes
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {name: {slot: getattr(view, slot) for slot in ViewMetrics.__slots__} for name, view in self._views.items()}
+
+    # Métricas en el formato de texto de Prometheus.
+    def prometheus_lines(self):
+        views = self.snapshot()
+        lines = [
+            "# HELP auctions_request_duration_seconds Request latency by URL name.",
+            "# TYPE auctions_request_duration_seconds histogram",
+        ]
+        for name, view in sorted(views.items()):
+            cumulative = 0
+            for bound, count in zip((*self.bucket_bounds, "+Inf"), view["buckets"]):
+                cumulative += count
+                lines.append(f'auctions_request_duration_seconds_bucket{{view="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'auctions_request_duration_seconds_sum{{view="{name}"}} {view["seconds"]:.6f}')
+            lines.append(f'auctions_request_duration_seconds_count{{view="{name}"}} {view["count"]}')
+        counters = [
+            ("sql_queries_total", "sql_count", "SQL queries executed by URL name."),
+            ("sql_seconds_total", "sql_seconds", "Time spent in SQL by URL name."),
+            ("template_seconds_total", "template_seconds", "Time spent rendering templates by URL name."),
+            ("response_bytes_total", "response_bytes", "Response body bytes by URL name (streaming responses excluded)."),
+        ]
+        for metric, key, description in counters:
+            lines.append(f"# HELP auctions_{metric} {description}")
+            lines.append(f"# TYPE auctions_{metric} counter")
+            for name, view in sorted(views.items()):
+                value = view[key]
+                lines.append(f'auctions_{metric}{{view="{name}"}} {value:.6f}' if isinstance(value, float) else f'auctions_{metric}{{view="{name}"}} {value}')
+        return lines
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = Registry()
+    return _registry
+
+
+# Se instala en cada conexión nueva a la base de datos. Fuera de una petición medida no hace nada más
+# que consultar la ContextVar.
+def sql_timer(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.sql_count += 1
+        metrics.sql_seconds += elapsed
+        if metrics.queries is not None:
+            metrics.queries.append((sql, elapsed))
+
+
+@receiver(connection_created)
+def install_sql_timer(sender, connection, **kwargs):
+    if sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_timer)
+
+
+# Motor de plantillas de Django que mide el tiempo de render de la plantilla principal de cada respuesta
+# (las incluidas y las que hereda se renderizan dentro de ella).
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    @property
+    def origin(self):
+        return self.template.origin
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - started
+
+
+# Middleware que mide cada petición: latencia, consultas SQL y su tiempo, tiempo de plantillas y bytes de
+# la respuesta, agrupados por nombre de URL. Con AUCTIONS_SLOW_REQUEST_SECONDS registra además las
+# peticiones lentas con sus consultas más costosas en el logger "auctions.slow_requests".
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = settings.AUCTIONS_SLOW_REQUEST_SECONDS
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics(capture_sql=self.slow_seconds is not None)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - started, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(capture_sql=self.slow_seconds is not None)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - started, metrics)
+        return response
+
+    def record(self, request, response, elapsed, metrics):
+        match = request.resolver_match
+        view_name = match.view_name if match else "<unresolved>"
+        response_bytes = 0 if response.streaming else len(response.content)
+        get_registry().observe(view_name, elapsed, metrics, response_bytes)
+        if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+            self.log_slow_request(request, view_name, elapsed, metrics)
+
+    def log_slow_request(self, request, view_name, elapsed, metrics):
+        slowest = sorted(metrics.queries, key=lambda query: query[1], reverse=True)[:10]
+        logger.warning(
+            "Slow request %s %s (%s) took %.3fs: %d queries in %.3fs, templates %.3fs\n%s",
+            request.method, request.path, view_name, elapsed, metrics.sql_count, metrics.sql_seconds,
+            metrics.template_seconds, "\n".join(f"  {seconds * 1000:.1f}ms {sql}" for sql, seconds in slowest),
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+# Rellena el precio actual, el mejor postor y el número de ofertas de las subastas que ya existen.
+def fill_bid_summary(apps, schema_editor):
+    AuctionListing = apps.get_model('auctions', 'AuctionListing')
+    Bid = apps.get_model('auctions', 'Bid')
+    top_bids = Bid.objects.filter(listing=OuterRef('pk')).order_by('-amount', 'id')
+    counts = Bid.objects.filter(listing=OuterRef('pk')).order_by().values('listing').annotate(total=Count('id')).values('total')
+    AuctionListing.objects.update(
+        current_price=Subquery(top_bids.values('amount')[:1]),
+        highest_bidder=Subquery(top_bids.values('bidder')[:1]),
+        bid_count=Coalesce(Subquery(counts), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0003_auctionlisting_winner_auctionlisting_winning_bid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='current_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='highest_bidder',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leading_listings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', '-amount'], name='bid_listing_amount_idx'),
+        ),
+        migrations.RunPython(fill_bid_summary, migrations.RunPython.noop),
+    ]
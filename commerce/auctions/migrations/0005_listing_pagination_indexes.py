@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0004_listing_bid_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auctionlisting',
+            index=models.Index(fields=['is_active', '-id'], name='listing_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auctionlisting',
+            index=models.Index(fields=['category', 'is_active', '-id'], name='listing_category_active_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations
+
+FTS_TABLE = 'auctions_listing_search'
+
+
+# La tabla FTS5 solo existe en SQLite; en otras bases de datos se usa el índice invertido en memoria.
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "title, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+        "SELECT id, title, description FROM auctions_auctionlisting"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0005_listing_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
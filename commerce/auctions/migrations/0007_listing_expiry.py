@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0006_listing_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='auctionlisting',
+            index=models.Index(fields=['is_active', 'ends_at'], name='listing_expiry_idx'),
+        ),
+    ]
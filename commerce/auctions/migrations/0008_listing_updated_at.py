@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0007_listing_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0008_listing_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='hot_key',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='auctionlisting',
+            index=models.Index(fields=['is_active', '-hot_key'], name='listing_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', 'bid_time'], name='bid_listing_time_idx'),
+        ),
+    ]
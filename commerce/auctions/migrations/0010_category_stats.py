@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:04
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+# Rellena los contadores con las subastas activas que ya existen.
+def fill_category_stats(apps, schema_editor):
+    AuctionListing = apps.get_model('auctions', 'AuctionListing')
+    CategoryStats = apps.get_model('auctions', 'CategoryStats')
+    rows = (
+        AuctionListing.objects.filter(is_active=True).exclude(category=None).exclude(category='')
+        .order_by().values('category')
+        .annotate(count=Count('id'), low=Min('starting_bid'), high=Max('starting_bid'))
+    )
+    CategoryStats.objects.bulk_create([
+        CategoryStats(category=row['category'], active_count=row['count'], min_starting_bid=row['low'], max_starting_bid=row['high'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0009_bid_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('active_count', models.IntegerField(default=0)),
+                ('min_starting_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_starting_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('bounds_stale', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RunPython(fill_category_stats, migrations.RunPython.noop),
+    ]
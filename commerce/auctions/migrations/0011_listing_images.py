@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0010_category_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='image',
+            field=models.FileField(blank=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='image_widths',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='auctionlisting',
+            index=models.Index(fields=['image_status', 'id'], name='listing_image_status_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+# Rellena el número de comentarios de las subastas que ya existen.
+def fill_comment_counts(apps, schema_editor):
+    AuctionListing = apps.get_model('auctions', 'AuctionListing')
+    Comment = apps.get_model('auctions', 'Comment')
+    counts = Comment.objects.filter(listing=OuterRef('pk')).order_by().values('listing').annotate(total=Count('id')).values('total')
+    AuctionListing.objects.update(comment_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0011_listing_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionlisting',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['listing', '-created_at', '-id'], name='comment_listing_time_idx'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
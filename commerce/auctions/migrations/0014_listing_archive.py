@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0013_task_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBid',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('bid_time', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedListing',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=64)),
+                ('description', models.TextField()),
+                ('starting_bid', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('category', models.CharField(blank=True, choices=[('SPORTS', 'Sports'), ('ELECTRONICS', 'Electronics'), ('FASHION', 'Fashion'), ('HOME', 'Home'), ('OTHER', 'Other')], max_length=64, null=True)),
+                ('winning_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('current_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('image', models.FileField(blank=True, upload_to='')),
+                ('image_status', models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', max_length=8)),
+                ('image_widths', models.JSONField(blank=True, default=list)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='auctionlisting',
+            index=models.Index(fields=['is_active', 'closed_at'], name='listing_archive_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedbid',
+            name='bidder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bids', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='commenter',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedlisting',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_listings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedlisting',
+            name='winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_wins', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='listing',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='auctions.archivedlisting'),
+        ),
+        migrations.AddField(
+            model_name='archivedbid',
+            name='listing',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to='auctions.archivedlisting'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0014_listing_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('read_at', None)), fields=['user'], name='notification_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.db import migrations
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Rellena closed_at de las subastas cerradas antes de que existiera el campo (0007) con la hora de su
+# última oferta, o con updated_at si no tuvieron ofertas, para que el archivo las tenga en cuenta.
+def fill_closed_at(apps, schema_editor):
+    AuctionListing = apps.get_model('auctions', 'AuctionListing')
+    Bid = apps.get_model('auctions', 'Bid')
+    last_bids = Bid.objects.filter(listing=OuterRef('pk')).order_by().values('listing').annotate(last=Max('bid_time')).values('last')
+    AuctionListing.objects.filter(is_active=False, closed_at=None).update(
+        closed_at=Coalesce(Subquery(last_bids), F('updated_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0015_notification_unread'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_closed_at, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,40 @@
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
 from django.contrib.auth.models import User, AbstractUser
 
 # Model para usuario
 class User(AbstractUser):
     watchlist = models.ManyToManyField('AuctionListing', blank=True, related_name='watchlisted_by')
 
+# Consultas reutilizables para las vistas que muestran subastas.
+class AuctionListingQuerySet(models.QuerySet):
+    # Columnas que muestra una tarjeta de subasta; la descripción completa nunca se carga.
+    CARD_FIELDS = [
+        "id", "title", "image_url", "image", "image_status", "image_widths", "starting_bid", "current_price", "bid_count",
+        "winning_bid",
+    ]
+    SUMMARY_LENGTH = 140
+
+    # Subastas como filas (dicts) listas para la etiqueta {% listing_card %}, en una consulta con el
+    # propietario en el mismo JOIN. La base de datos calcula el resumen ya recortado (como truncatechars,
+    # con "…" si la descripción es más larga, leyendo solo un carácter de más) y el nombre de la categoría.
+    def card_rows(self):
+        head = Substr("description", 1, self.SUMMARY_LENGTH + 1)
+        labels = [When(category=value, then=Value(label)) for value, label in self.model._meta.get_field("category").choices]
+        return self.values(
+            *self.CARD_FIELDS,
+            summary=Case(
+                When(GreaterThan(Length(head), self.SUMMARY_LENGTH), then=Concat(Substr("description", 1, self.SUMMARY_LENGTH - 1), Value("…"))),
+                default=head,
+            ),
+            category_label=Case(*labels, default=Value(""), output_field=models.CharField()),
+            owner_username=F("owner__username"),
+        )
+
+
 class AuctionListing(models.Model):
     CATEGORY_CHOICES = [
         ('SPORTS', 'Sports'),
@@ -24,9 +54,75 @@ class AuctionListing(models.Model):
     winner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="won_auctions")
     winning_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    # Resumen desnormalizado de las ofertas, mantenido al ofertar para no ordenar todas las ofertas en cada lectura.
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    highest_bidder = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="leading_listings")
+    bid_count = models.PositiveIntegerField(default=0)
+
+    # Número de comentarios, mantenido por las señales de alta y borrado de Comment.
+    comment_count = models.PositiveIntegerField(default=0)
+
+    # Cierre programado (opcional) y momento en que la subasta se cerró.
+    ends_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    # Versión de la subasta para las respuestas condicionales de la API (ETag / Last-Modified). Los UPDATE
+    # por queryset (ofertas y cierres) no aplican auto_now, así que la asignan explícitamente.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Imagen subida o descargada de image_url, guardada con un nombre derivado de su contenido, y estado de
+    # sus miniaturas (ver auctions/images.py).
+    IMAGE_PENDING = "pending"
+    IMAGE_READY = "ready"
+    IMAGE_FAILED = "failed"
+    IMAGE_STATUS_CHOICES = [(IMAGE_PENDING, "Pending"), (IMAGE_READY, "Ready"), (IMAGE_FAILED, "Failed")]
+    image = models.FileField(blank=True)
+    image_status = models.CharField(max_length=8, choices=IMAGE_STATUS_CHOICES, blank=True, default="")
+    image_widths = models.JSONField(default=list, blank=True)  # Anchos de las miniaturas generadas.
+
+    # Clave de las subastas más activas, actualizada en cada oferta aceptada (ver auctions/analytics.py).
+    hot_key = models.FloatField(null=True, blank=True)
+
+    objects = AuctionListingQuerySet.as_manager()
+
+    class Meta:
+        # Índices para la paginación por cursor de los listados activos (ver auctions/pagination.py).
+        indexes = [
+            models.Index(fields=["is_active", "-id"], name="listing_active_idx"),
+            models.Index(fields=["category", "is_active", "-id"], name="listing_category_active_idx"),
+            # Índice para que el proceso de vencimiento encuentre las subastas vencidas (ver auctions/expiry.py).
+            models.Index(fields=["is_active", "ends_at"], name="listing_expiry_idx"),
+            # Ranking de subastas por velocidad de ofertas: se leen las primeras k entradas.
+            models.Index(fields=["is_active", "-hot_key"], name="listing_hot_idx"),
+            # Cola de imágenes pendientes de miniaturas, recorrida por id.
+            models.Index(fields=["image_status", "id"], name="listing_image_status_idx"),
+            # Subastas cerradas pendientes de archivar, por antigüedad del cierre (ver auctions/archive.py).
+            models.Index(fields=["is_active", "closed_at"], name="listing_archive_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    # Precio a mostrar: la oferta más alta o, si no hay ofertas, la oferta inicial.
+    @property
+    def display_price(self):
+        return self.current_price if self.current_price is not None else self.starting_bid
+
+
+
+# Resumen por categoría de las subastas activas: cuántas hay y el rango de sus ofertas iniciales.
+# Lo mantienen las señales de alta, cierre y borrado (ver auctions/facets.py), así que la página de
+# categorías no recorre las subastas. Si se cierra o borra la subasta que marcaba el mínimo o el máximo,
+# el rango se marca como desactualizado y se recalcula en la siguiente lectura.
+class CategoryStats(models.Model):
+    category = models.CharField(max_length=64, primary_key=True)
+    active_count = models.IntegerField(default=0)
+    min_starting_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_starting_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    bounds_stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.category}: {self.active_count}"
 
 
 # Model para ofertas
@@ -36,15 +132,153 @@ class Bid(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     bid_time = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["listing", "-amount"], name="bid_listing_amount_idx"),
+            # Historial de precios y ofertas recientes de una subasta.
+            models.Index(fields=["listing", "bid_time"], name="bid_listing_time_idx"),
+        ]
+
     def __str__(self):
         return f"{self.bidder.username} - {self.amount}"
 
 
+# Consultas reutilizables para mostrar comentarios.
+class CommentQuerySet(models.QuerySet):
+    # Comentarios de una subasta como filas listas para mostrar, con el autor en el mismo JOIN.
+    def rows(self, listing_id):
+        return self.filter(listing_id=listing_id).values(
+            "id", "content", "created_at", commenter_username=F("commenter__username"),
+        )
+
+
 # Model para comentarios realizados en listados de subastas.
 class Comment(models.Model):
+    # Orden de las páginas de comentarios (los más recientes primero), respaldado por comment_listing_time_idx.
+    PAGE_ORDERING = ("-created_at", "-id")
+
     commenter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     listing = models.ForeignKey(AuctionListing, on_delete=models.CASCADE, related_name="comments")
     content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["listing", "-created_at", "-id"], name="comment_listing_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.commenter.username} on {self.listing.title}"
+
+
+# Aviso a un usuario sobre una subasta: le superaron la oferta, la ganó o se cerró una subasta suya.
+# Las crean las tareas de auctions/notifications.py, fuera de la petición que las provoca.
+class Notification(models.Model):
+    OUTBID = "outbid"
+    WON = "won"
+    CLOSED = "closed"
+    KIND_CHOICES = [(OUTBID, "Outbid"), (WON, "Won"), (CLOSED, "Closed")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    listing = models.ForeignKey(AuctionListing, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="notification_user_time_idx"),
+            # Solo los avisos sin leer: el contador de la barra de navegación es una búsqueda en este índice.
+            models.Index(fields=["user"], condition=Q(read_at=None), name="notification_unread_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} notification for {self.user_id} on {self.listing_id}"
+
+
+# Tarea pendiente de la cola de tareas (ver auctions/tasks.py). Una tarea completada se borra; una que
+# agota sus intentos queda como fallida para revisarla. dedup_key es única: encolar otra vez una tarea
+# con la misma clave mientras la primera sigue pendiente no hace nada.
+class Task(models.Model):
+    QUEUED = "queued"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Los workers leen las tareas vencidas en orden de run_after.
+            models.Index(fields=["status", "run_after", "id"], name="task_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+
+# Archivo de subastas cerradas (ver auctions/archive.py). El comando archive_auctions mueve aquí las
+# subastas cerradas hace tiempo, con sus ofertas y comentarios, para que las tablas y los índices de las
+# subastas en curso no crezcan indefinidamente. Las filas conservan su id, así que las URL siguen
+# valiendo: el detalle y las subastas ganadas las leen de aquí si ya no están en AuctionListing. Nada
+# más escribe en estas tablas.
+class ArchivedListing(models.Model):
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=64)
+    description = models.TextField()
+    starting_bid = models.DecimalField(max_digits=10, decimal_places=2)
+    image_url = models.URLField(blank=True, null=True)
+    category = models.CharField(max_length=64, choices=AuctionListing.CATEGORY_CHOICES, blank=True, null=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_listings")
+    winner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="archived_wins")
+    winning_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    bid_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    image = models.FileField(blank=True)
+    image_status = models.CharField(max_length=8, choices=AuctionListing.IMAGE_STATUS_CHOICES, blank=True, default="")
+    image_widths = models.JSONField(default=list, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # Las plantillas de subastas tratan una archivada como una cerrada.
+    is_active = False
+
+    objects = AuctionListingQuerySet.as_manager()
+
+    def __str__(self):
+        return self.title
+
+    display_price = AuctionListing.display_price
+
+
+class ArchivedBid(models.Model):
+    id = models.IntegerField(primary_key=True)
+    bidder = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_bids")
+    listing = models.ForeignKey(ArchivedListing, on_delete=models.CASCADE, related_name="bids")
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    bid_time = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.bidder.username} - {self.amount}"
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    commenter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_comments")
+    listing = models.ForeignKey(ArchivedListing, on_delete=models.CASCADE, related_name="comments")
+    content = models.TextField()
+    created_at = models.DateTimeField()
 
     def __str__(self):
-        return f"Comment by {self.commenter.username} on {self.listing.title}"
\ No newline at end of file
+        return f"Comment by {self.commenter.username} on {self.listing.title}"
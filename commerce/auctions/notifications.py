@@ -0,0 +1,39 @@
+from django.db.models import OuterRef, Subquery
+
+from .models import AuctionListing, Bid, Notification
+from .tasks import task
+
+# Manejadores de las tareas que crean avisos para los usuarios. Los encolan los receptores de
+# auctions/signals.py al confirmar una oferta o un cierre. Cada uno recibe el lote completo de payloads y
+# crea todos sus avisos con un único INSERT.
+
+
+# Payloads {"bid": id}: avisa a quien tenía la oferta más alta antes de cada oferta nueva. La oferta
+# anterior de cada una se busca en la misma consulta, con una subconsulta por el índice (listing, -amount).
+@task("notify_outbid", batch=True)
+def notify_outbid(payloads):
+    previous = (
+        Bid.objects.filter(listing_id=OuterRef("listing_id"), amount__lt=OuterRef("amount"))
+        .order_by("-amount", "id").values("bidder_id")[:1]
+    )
+    bids = (
+        Bid.objects.filter(id__in=[payload["bid"] for payload in payloads])
+        .values("listing_id", "bidder_id", "amount").annotate(previous_bidder=Subquery(previous))
+    )
+    Notification.objects.bulk_create([
+        Notification(user_id=bid["previous_bidder"], listing_id=bid["listing_id"], kind=Notification.OUTBID, amount=bid["amount"])
+        for bid in bids
+        if bid["previous_bidder"] is not None and bid["previous_bidder"] != bid["bidder_id"]
+    ])
+
+
+# Payloads {"listing": id}: avisa al ganador de cada subasta cerrada y a su propietario.
+@task("notify_closed", batch=True)
+def notify_closed(payloads):
+    closed = AuctionListing.objects.filter(id__in=[payload["listing"] for payload in payloads], is_active=False)
+    notifications = []
+    for listing in closed.values("id", "owner_id", "winner_id", "winning_bid"):
+        if listing["winner_id"] is not None:
+            notifications.append(Notification(user_id=listing["winner_id"], listing_id=listing["id"], kind=Notification.WON, amount=listing["winning_bid"]))
+        notifications.append(Notification(user_id=listing["owner_id"], listing_id=listing["id"], kind=Notification.CLOSED, amount=listing["winning_bid"]))
+    Notification.objects.bulk_create(notifications)
@@ -0,0 +1,139 @@
+import base64
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+# Página de resultados paginados por cursor (keyset): cada página se pide a partir de la clave
+# de la última fila vista, así que una página profunda cuesta lo mismo que la primera (sin OFFSET).
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None, page_size=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    # Query strings para los enlaces "siguiente" y "anterior", conservando el tamaño de página pedido.
+    def _query(self, cursor):
+        params = {"cursor": cursor}
+        if self.page_size:
+            params["page_size"] = self.page_size
+        return "?" + urlencode(params)
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor) if self.has_next else None
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor) if self.has_previous else None
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+# Devuelve (dirección, valores) o None si el cursor no es válido, en cuyo caso se muestra la primera página.
+def decode_cursor(token, model, ordering):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in (NEXT, PREVIOUS) or len(values) != len(ordering):
+            return None
+        fields = [model._meta.get_field(name.lstrip("-")) for name in ordering]
+        return direction, [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, AttributeError, ValidationError):
+        return None
+
+
+# Filtro "fila posterior a `values`" en el orden dado; por ejemplo para ("-created_at", "-id"):
+# created_at < v0 OR (created_at = v0 AND id < v1).
+def _after(ordering, values, reverse=False):
+    condition = Q()
+    for position, name in enumerate(ordering):
+        field = name.lstrip("-")
+        descending = name.startswith("-") != reverse
+        step = Q(**{f"{field}__{'lt' if descending else 'gt'}": values[position]})
+        for previous, value in zip(ordering[:position], values):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+def _reversed(ordering):
+    return [name[1:] if name.startswith("-") else f"-{name}" for name in ordering]
+
+
+def _key(item, ordering):
+    names = [name.lstrip("-") for name in ordering]
+    if isinstance(item, dict):
+        return [item[name] for name in names]
+    return [getattr(item, name) for name in names]
+
+
+# Pagina `queryset` por cursor. `ordering` debe terminar en una columna única (normalmente "-id")
+# y estar respaldado por un índice para que cada página sea una búsqueda por rango.
+def paginate(queryset, cursor=None, page_size=None, ordering=("-id",)):
+    ordering = list(ordering)
+    page_size = page_size or settings.AUCTIONS_PAGE_SIZE
+    decoded = decode_cursor(cursor, queryset.model, ordering) if cursor else None
+
+    if decoded and decoded[0] == PREVIOUS:
+        # Hacia atrás se recorre el índice en sentido inverso y luego se invierte la página.
+        rows = list(queryset.filter(_after(ordering, decoded[1], reverse=True)).order_by(*_reversed(ordering))[:page_size + 1])
+        has_previous = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if decoded:
+            queryset = queryset.filter(_after(ordering, decoded[1]))
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_next = len(rows) > page_size
+        items = rows[:page_size]
+        has_previous = decoded is not None
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(NEXT, _key(items[-1], ordering)) if items and has_next else None,
+        previous_cursor=encode_cursor(PREVIOUS, _key(items[0], ordering)) if items and has_previous else None,
+    )
+
+
+# Lee `cursor` y `page_size` de la petición; el tamaño de página se limita a AUCTIONS_MAX_PAGE_SIZE.
+# Sin page_size se usa `default_size` o, si no se indica, AUCTIONS_PAGE_SIZE.
+def paginate_request(request, queryset, ordering=("-id",), default_size=None):
+    try:
+        requested_size = int(request.GET.get("page_size", ""))
+    except ValueError:
+        requested_size = None
+    page_size = None
+    if requested_size and requested_size > 0:
+        page_size = min(requested_size, settings.AUCTIONS_MAX_PAGE_SIZE)
+
+    page = paginate(queryset, request.GET.get("cursor"), page_size or default_size, ordering)
+    page.page_size = page_size
+    return page
@@ -0,0 +1,122 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+# Límite de peticiones por cliente con un cubo de fichas (token bucket): cada cliente tiene hasta `burst`
+# fichas, cada petición gasta una y se recuperan `rate` fichas por segundo. Así se admiten ráfagas cortas
+# (recargar la página, pujar varias veces seguidas) pero no un ritmo sostenido mayor que `rate`.
+#
+# Los límites se configuran por nombre de vista en AUCTIONS_RATELIMITS. El cliente es el usuario si ha
+# iniciado sesión y, si no, su IP. El estado de los cubos lo guarda el backend de
+# AUCTIONS_RATELIMIT_BACKEND: en la memoria del proceso o en una caché compartida entre procesos.
+
+
+# Fichas tras recargar desde `updated` hasta `now`; el cubo nunca tiene más de `burst`.
+def refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + (now - updated) * rate)
+
+
+# Gasta una ficha del cubo (tokens, updated) si hay. Devuelve (admitida, segundos hasta la próxima ficha,
+# nuevo estado del cubo).
+def take(bucket, now, rate, burst):
+    tokens = refill(*bucket, now, rate, burst) if bucket else burst
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / rate, (tokens, now)
+
+
+# Cubos en la memoria del proceso, protegidos por un cerrojo. Guarda como mucho `max_keys` clientes:
+# los que llevan más tiempo sin peticiones se descartan (un cubo descartado vuelve lleno).
+class MemoryBackend:
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            allowed, retry_after, self._buckets[key] = take(self._buckets.get(key), now, rate, burst)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Cubos en la caché de Django (AUCTIONS_RATELIMIT_CACHE_ALIAS), compartidos por todos los procesos.
+# Leer y escribir el cubo no es atómico: dos peticiones simultáneas del mismo cliente en procesos
+# distintos pueden gastar la misma ficha, así que en el peor caso se admite alguna petición de más.
+class CacheBackend:
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.AUCTIONS_RATELIMIT_CACHE_ALIAS]
+
+    def consume(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        key = f"auctions:ratelimit:{key}"
+        allowed, retry_after, bucket = take(self.cache.get(key), now, rate, burst)
+        # La entrada caduca cuando el cubo se habría vuelto a llenar: a partir de ahí no aporta nada.
+        self.cache.set(key, bucket, timeout=math.ceil(burst / rate) + 1)
+        return allowed, retry_after
+
+    def reset(self):
+        pass
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.AUCTIONS_RATELIMIT_BACKEND)()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting in ("AUCTIONS_RATELIMIT_BACKEND", "AUCTIONS_RATELIMIT_CACHE_ALIAS"):
+        _backend = None
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+# Aplica AUCTIONS_RATELIMITS a la vista resuelta de cada petición y responde 429 (con Retry-After) a los
+# clientes sin fichas, antes de ejecutar la vista. Debe ir después de AuthenticationMiddleware.
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        limit = settings.AUCTIONS_RATELIMITS.get(view_name)
+        if not limit or request.method not in limit.get("methods", (request.method,)):
+            return None
+        allowed, retry_after = get_backend().consume(f"{view_name}:{client_key(request)}", limit["rate"], limit["burst"])
+        if allowed:
+            return None
+        response = HttpResponse("Too many requests. Please slow down.", status=429, content_type="text/plain")
+        response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
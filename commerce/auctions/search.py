@@ -0,0 +1,271 @@
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+
+from .models import AuctionListing
+
+# Tabla virtual FTS5 con el título y la descripción de cada subasta; su rowid es el id de la subasta.
+FTS_TABLE = "auctions_listing_search"
+
+# Peso del título frente a la descripción en el ranking BM25.
+TITLE_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+# Palabras en minúsculas y sin tildes, igual que el tokenizador unicode61 de FTS5.
+def tokenize(text):
+    words = []
+    for word in _WORD.findall(text or ""):
+        decomposed = unicodedata.normalize("NFKD", word.lower())
+        words.append("".join(char for char in decomposed if not unicodedata.combining(char)))
+    return words
+
+
+# Índice de búsqueda sobre SQLite FTS5: se actualiza en la misma transacción que la subasta.
+#
+# bm25() recorre la lista completa de documentos de cada término para calcular su IDF, y evalúa cada fila
+# que coincide; con palabras muy frecuentes eso crece con el catálogo. Por eso solo se rankean los términos
+# que aparecen en como mucho `ranked_document_frequency` subastas; los más frecuentes se usan solo como
+# filtro y, si no queda ningún término selectivo, se devuelven las coincidencias más recientes. Así el
+# coste de una búsqueda está acotado.
+class SQLiteFTSBackend:
+    RANKED_DOCUMENT_FREQUENCY = 3000
+
+    def __init__(self, ranked_document_frequency=None):
+        self.ranked_document_frequency = ranked_document_frequency or self.RANKED_DOCUMENT_FREQUENCY
+
+    def index(self, listings):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)",
+                [(listing.pk, listing.title, listing.description) for listing in listings],
+            )
+
+    def remove(self, listing_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in listing_ids])
+
+    def rebuild(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+                f"SELECT id, title, description FROM {AuctionListing._meta.db_table}"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+    # Cada palabra se busca como frase literal para que la entrada del usuario no se interprete como
+    # sintaxis de FTS5; las marcadas como prefijo también encuentran las palabras que empiezan por ellas.
+    def _match_expression(self, phrases):
+        return " ".join('"' + term.replace('"', '""') + '"' + ("*" if prefix else "") for term, prefix in phrases)
+
+    # Número de subastas que contienen la frase, contando como mucho hasta `cap`: el coste queda acotado
+    # aunque la palabra aparezca en casi todo el catálogo.
+    def _document_frequency(self, cursor, phrase, cap):
+        cursor.execute(
+            f"SELECT count(*) FROM (SELECT rowid FROM {FTS_TABLE}(%s) LIMIT %s)",
+            [self._match_expression([phrase]), cap],
+        )
+        return cursor.fetchone()[0]
+
+    def search(self, terms, category=None, active_only=True, prefix=False, limit=20):
+        phrases = [(term, prefix and position == len(terms) - 1) for position, term in enumerate(terms)]
+        listing_table = AuctionListing._meta.db_table
+        filters, filter_params = [], []
+        if active_only:
+            filters.append("AND l.is_active")
+        if category:
+            filters.append("AND l.category = %s")
+            filter_params.append(category)
+
+        with connection.cursor() as cursor:
+            cap = self.ranked_document_frequency + 1
+            frequencies = [self._document_frequency(cursor, phrase, cap) for phrase in phrases]
+            if not all(frequencies):
+                return []  # Algún término no aparece en ninguna subasta.
+            ranked = [phrase for phrase, frequency in zip(phrases, frequencies) if frequency <= self.ranked_document_frequency]
+
+            if ranked:
+                sql = [
+                    f"SELECT s.rowid, bm25({FTS_TABLE}, %s, %s) AS score FROM {FTS_TABLE} s",
+                    f"JOIN {listing_table} l ON l.id = s.rowid",
+                    f"WHERE {FTS_TABLE} MATCH %s",
+                ]
+                params = [TITLE_WEIGHT, DESCRIPTION_WEIGHT, self._match_expression(ranked)]
+                if len(ranked) < len(phrases):
+                    # Los términos frecuentes se exigen con una búsqueda sin ranking, que no calcula su IDF.
+                    # El "+" evita que SQLite recorra la lista con búsquedas por rowid, que recalcularían bm25.
+                    sql.append(f"AND +s.rowid IN (SELECT rowid FROM {FTS_TABLE}(%s))")
+                    params.append(self._match_expression(phrases))
+                order = "ORDER BY score"
+            else:
+                sql = [
+                    f"SELECT s.rowid, 0.0 AS score FROM {FTS_TABLE} s",
+                    f"JOIN {listing_table} l ON l.id = s.rowid",
+                    f"WHERE {FTS_TABLE} MATCH %s",
+                ]
+                params = [self._match_expression(phrases)]
+                order = "ORDER BY s.rowid DESC"
+
+            cursor.execute(" ".join([*sql, *filters, order, "LIMIT %s"]), [*params, *filter_params, limit])
+            # bm25() devuelve valores negativos: cuanto menor, más relevante.
+            return [(listing_id, -score) for listing_id, score in cursor.fetchall()]
+
+
+# Índice invertido en memoria para bases de datos sin FTS5. Se construye de forma perezosa desde la
+# base de datos y se mantiene con las señales de este proceso.
+class InvertedIndexBackend:
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._postings = defaultdict(dict)  # término -> {id de subasta: frecuencia ponderada}
+        self._lengths = {}  # id de subasta -> longitud ponderada del documento
+        self._doc_terms = {}  # id de subasta -> términos del documento, para poder quitarlo
+        self._terms = []  # términos ordenados, para búsquedas por prefijo
+        self._total_length = 0.0
+
+    def _add(self, listing_id, title, description):
+        frequencies = Counter()
+        for term in tokenize(title):
+            frequencies[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            frequencies[term] += DESCRIPTION_WEIGHT
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                bisect.insort(self._terms, term)
+            self._postings[term][listing_id] = frequency
+        self._lengths[listing_id] = sum(frequencies.values())
+        self._total_length += self._lengths[listing_id]
+        self._doc_terms[listing_id] = list(frequencies)
+
+    def _discard(self, listing_id):
+        length = self._lengths.pop(listing_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(listing_id):
+            del self._postings[term][listing_id]
+            if not self._postings[term]:
+                del self._postings[term]
+                self._terms.pop(bisect.bisect_left(self._terms, term))
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.rebuild()
+
+    def index(self, listings):
+        listings = [(listing.pk, listing.title, listing.description) for listing in listings]
+
+        def apply():
+            with self._lock:
+                if not self._loaded:
+                    return
+                for listing_id, title, description in listings:
+                    self._discard(listing_id)
+                    self._add(listing_id, title, description)
+
+        transaction.on_commit(apply)
+
+    def remove(self, listing_ids):
+        listing_ids = list(listing_ids)
+
+        def apply():
+            with self._lock:
+                for listing_id in listing_ids:
+                    self._discard(listing_id)
+
+        transaction.on_commit(apply)
+
+    def rebuild(self):
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._doc_terms.clear()
+            self._terms.clear()
+            self._total_length = 0.0
+            rows = AuctionListing.objects.values_list("id", "title", "description").order_by()
+            for listing_id, title, description in rows.iterator(chunk_size=2000):
+                self._add(listing_id, title, description)
+            self._loaded = True
+
+    def _expand(self, term, prefix):
+        if not prefix:
+            return [term] if term in self._postings else []
+        start = bisect.bisect_left(self._terms, term)
+        end = bisect.bisect_left(self._terms, term + "\uffff")
+        return self._terms[start:end]
+
+    def search(self, terms, category=None, active_only=True, prefix=False, limit=20):
+        with self._lock:
+            self._ensure_loaded()
+            total = len(self._lengths)
+            if not total:
+                return []
+            average_length = self._total_length / total
+
+            # BM25: todas las palabras deben aparecer (igual que FTS5), la última como prefijo si se pide.
+            scores = None
+            for position, term in enumerate(terms):
+                term_scores = Counter()
+                for expanded in self._expand(term, prefix and position == len(terms) - 1):
+                    postings = self._postings[expanded]
+                    idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for listing_id, frequency in postings.items():
+                        norm = self.K1 * (1 - self.B + self.B * self._lengths[listing_id] / average_length)
+                        term_scores[listing_id] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = Counter({pk: scores[pk] + term_scores[pk] for pk in scores.keys() & term_scores.keys()})
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+        # Los filtros se aplican en la base de datos por lotes, en orden de relevancia.
+        results = []
+        for start in range(0, len(ranked), 500):
+            batch = ranked[start:start + 500]
+            queryset = AuctionListing.objects.filter(id__in=[pk for pk, _ in batch])
+            if active_only:
+                queryset = queryset.filter(is_active=True)
+            if category:
+                queryset = queryset.filter(category=category)
+            allowed = set(queryset.values_list("id", flat=True))
+            results.extend(item for item in batch if item[0] in allowed)
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+
+_fallback_backend = InvertedIndexBackend()
+_fts_tables = {}
+
+
+# Indica si la base de datos actual tiene la tabla FTS5 (creada por la migración solo en SQLite).
+def fts_available():
+    if connection.vendor != "sqlite":
+        return False
+    name = connection.settings_dict["NAME"]
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def get_backend():
+    return SQLiteFTSBackend() if fts_available() else _fallback_backend
+
+
+# Busca subastas por título y descripción; devuelve [(id, puntuación)] de mayor a menor relevancia.
+def search_listings(query, category=None, active_only=True, prefix=False, limit=20):
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search(terms, category=category, active_only=active_only, prefix=prefix, limit=limit)
@@ -0,0 +1,128 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import facets, tasks
+from .cache import invalidate_listings
+from .models import AuctionListing, Bid, Comment
+from .search import get_backend as get_search_backend
+from .streaming import publish_listing_event
+
+# Se envía cuando una o más subastas se cierran con un UPDATE (que no dispara post_save).
+# Argumentos: listing_ids.
+listings_closed = Signal()
+
+# Se envía cuando se mueven subastas cerradas a las tablas de archivo (ver auctions/archive.py).
+# Argumentos: listing_ids.
+listings_archived = Signal()
+
+
+# La invalidación se hace al confirmar la transacción para no dejar en caché datos sin confirmar.
+def _invalidate_on_commit(listing_ids):
+    listing_ids = list(listing_ids)
+    transaction.on_commit(lambda: invalidate_listings(listing_ids))
+
+
+@receiver([post_save, post_delete], sender=AuctionListing)
+def invalidate_listing(sender, instance, **kwargs):
+    _invalidate_on_commit([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Bid)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_listing_of_child(sender, instance, **kwargs):
+    _invalidate_on_commit([instance.listing_id])
+
+
+@receiver([listings_closed, listings_archived])
+def invalidate_closed_listings(sender, listing_ids, **kwargs):
+    _invalidate_on_commit(listing_ids)
+
+
+# Mantiene el índice de búsqueda al crear, editar o borrar subastas.
+@receiver(post_save, sender=AuctionListing)
+def index_listing(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not {"title", "description"} & set(update_fields)):
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=AuctionListing)
+def unindex_listing(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(listings_archived)
+def unindex_archived_listings(sender, listing_ids, **kwargs):
+    get_search_backend().remove(listing_ids)
+
+
+# Mantiene los contadores por categoría dentro de la misma transacción que el alta, el cierre o el borrado.
+@receiver(post_save, sender=AuctionListing)
+def count_created_listing(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.is_active:
+        facets.listings_added([(instance.category, instance.starting_bid)])
+
+
+# La instancia que se borra puede haberse cargado antes de que un UPDATE cerrara la subasta, así que
+# se consulta (y bloquea) la fila antes del DELETE, dentro de su transacción.
+@receiver(pre_delete, sender=AuctionListing)
+def count_deleted_listing(sender, instance, **kwargs):
+    active = AuctionListing.objects.select_for_update().filter(pk=instance.pk, is_active=True)
+    facets.listings_removed(active.values_list("category", "starting_bid"))
+
+
+@receiver(listings_closed)
+def count_closed_listings(sender, listing_ids, **kwargs):
+    facets.listings_removed(AuctionListing.objects.filter(id__in=listing_ids).values_list("category", "starting_bid"))
+
+
+# Mantiene el número de comentarios de la subasta en la misma transacción que el alta o el borrado. El
+# UPDATE no aplica auto_now: updated_at se asigna para que cambie la versión de la subasta en la API.
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuctionListing.objects.filter(id=instance.listing_id).update(comment_count=F("comment_count") + 1, updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    AuctionListing.objects.filter(id=instance.listing_id).update(comment_count=F("comment_count") - 1, updated_at=timezone.now())
+
+
+# Publica las ofertas y los cierres a los clientes conectados al stream de la subasta, tras confirmar.
+@receiver(post_save, sender=Bid)
+def publish_bid(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    event = {"type": "bid", "amount": instance.amount, "bidder": instance.bidder.username}
+    transaction.on_commit(lambda: publish_listing_event(instance.listing_id, event))
+
+
+@receiver(listings_closed)
+def publish_closed(sender, listing_ids, **kwargs):
+    def publish():
+        closed = AuctionListing.objects.filter(id__in=listing_ids).values("id", "winning_bid", "winner__username")
+        for listing in closed:
+            publish_listing_event(listing["id"], {
+                "type": "closed", "winning_bid": listing["winning_bid"], "winner": listing["winner__username"],
+            })
+
+    transaction.on_commit(publish)
+
+
+# Encola los avisos de oferta superada, subasta ganada y subasta cerrada al confirmar la transacción:
+# la petición solo añade una inserción en la cola y un worker (run_tasks) crea los avisos. La clave de
+# deduplicación evita avisar dos veces por la misma oferta o el mismo cierre.
+@receiver(post_save, sender=Bid)
+def notify_outbid(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tasks.enqueue_on_commit("notify_outbid", [{"bid": instance.pk}], key=lambda payload: f"outbid:{payload['bid']}")
+
+
+@receiver(listings_closed)
+def notify_closed(sender, listing_ids, **kwargs):
+    payloads = [{"listing": listing_id} for listing_id in listing_ids]
+    tasks.enqueue_on_commit("notify_closed", payloads, key=lambda payload: f"closed:{payload['listing']}")
@@ -0,0 +1,46 @@
+import threading
+
+# Agrupa llamadas concurrentes idénticas (single-flight): mientras una llamada con una clave está en curso,
+# las demás con la misma clave esperan su resultado en vez de repetir el trabajo. Cuando termina, la
+# siguiente llamada vuelve a ejecutarse; no es una caché. Solo agrupa los hilos de este proceso.
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    # Ejecuta `function()` o espera a la llamada en curso con la misma clave. Devuelve (resultado,
+    # compartido); si la llamada falla, todas las que esperaban reciben la misma excepción.
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -0,0 +1,258 @@
+import gzip
+import mimetypes
+import os
+import re
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Archivos estáticos servidos por la propia aplicación, sin un servidor web delante. collectstatic copia
+# los archivos a STATIC_ROOT con el hash de su contenido en el nombre (styles.css -> styles.3f2a….css,
+# según staticfiles.json) y junto a cada archivo comprimible guarda sus variantes .gz y, si brotli está
+# instalado, .br. StaticFilesMiddleware sirve STATIC_URL desde STATIC_ROOT: elige la variante según
+# Accept-Encoding, atiende peticiones Range y condicionales, y marca como inmutables los nombres con hash.
+
+# Variantes precomprimidas por orden de preferencia: (Content-Encoding, extensión).
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def compress(data):
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}  # mtime=0: misma salida para el mismo archivo.
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data)
+    return variants
+
+
+# ManifestStaticFilesStorage que además escribe las variantes comprimidas de los archivos con las
+# extensiones de AUCTIONS_STATIC_COMPRESS_EXTENSIONS, tanto del nombre original como del nombre con
+# hash. Una variante que no ahorra al menos un 5% no se guarda.
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hashed_names = None
+
+    # Nombres con hash del manifiesto: su contenido no cambia nunca.
+    @property
+    def hashed_names(self):
+        if self._hashed_names is None:
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return self._hashed_names
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self._hashed_names = None
+        if dry_run:
+            return
+        for name in sorted({*paths, *self.hashed_files.values()}):
+            if self.should_compress(name):
+                for compressed in self.compress_file(name):
+                    yield name, compressed, True
+
+    def should_compress(self, name):
+        extension = os.path.splitext(name)[1].lstrip(".").lower()
+        return extension in settings.AUCTIONS_STATIC_COMPRESS_EXTENSIONS and self.exists(name)
+
+    # Escribe las variantes de `name` que falten o sean más antiguas que el archivo y devuelve sus nombres.
+    def compress_file(self, name):
+        path = self.path(name)
+        modified = os.stat(path).st_mtime
+        with open(path, "rb") as source:
+            data = source.read()
+        if len(data) < settings.AUCTIONS_STATIC_COMPRESS_MIN_BYTES:
+            return []
+        written = []
+        for extension, compressed in compress(data).items():
+            target = path + extension
+            if len(compressed) > len(data) * 0.95:
+                continue
+            if not os.path.exists(target) or os.stat(target).st_mtime < modified:
+                with open(target, "wb") as output:
+                    output.write(compressed)
+            written.append(name + extension)
+        return written
+
+
+# Un archivo servible: la versión sin comprimir y sus variantes, cada una como (ruta, tamaño, mtime).
+@dataclass(frozen=True)
+class StaticFile:
+    content_type: str
+    identity: tuple
+    variants: dict
+
+    @classmethod
+    def load(cls, path):
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        variants = {}
+        for encoding, extension in ENCODINGS:
+            try:
+                variant = os.stat(path + extension)
+            except FileNotFoundError:
+                continue
+            variants[encoding] = (path + extension, variant.st_size, variant.st_mtime)
+        content_type, _ = mimetypes.guess_type(path)
+        return cls(content_type or "application/octet-stream", (path, stat.st_size, stat.st_mtime), variants)
+
+
+# Codificaciones aceptadas por el cliente según Accept-Encoding (las que tienen q=0 se excluyen).
+def accepted_encodings(header):
+    accepted = set()
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+# Interpreta una cabecera Range de un único intervalo. Devuelve (inicio, fin) inclusivos, None si la
+# cabecera no se entiende (se sirve el archivo completo) o False si el intervalo no cabe en el archivo.
+def parse_range(header, size):
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+# Lee como mucho `length` bytes de `file` desde la posición actual. FileResponse lo sirve por
+# wsgi.file_wrapper igual que un archivo.
+class FileRange:
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+# Sirve las peticiones GET y HEAD bajo STATIC_URL desde STATIC_ROOT antes que el resto de middleware
+# (sin sesión ni usuario). Las rutas que no corresponden a un archivo siguen su curso. Los archivos con
+# hash se sirven con caché inmutable de un año y sus datos se guardan en memoria; el resto, con
+# AUCTIONS_STATIC_MAX_AGE segundos y se comprueban en cada petición. Debe ir justo después de
+# SecurityMiddleware.
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._files = {}
+
+    def __call__(self, request):
+        prefix = urlsplit(settings.STATIC_URL).path
+        if request.method in ("GET", "HEAD") and settings.STATIC_ROOT and request.path_info.startswith(prefix):
+            response = self.serve(request, request.path_info[len(prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def find(self, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None, False
+        immutable = name in getattr(staticfiles_storage, "hashed_names", ())
+        if not immutable:
+            return StaticFile.load(path), False
+        found = self._files.get(path)
+        if found is None:
+            found = self._files[path] = StaticFile.load(path)
+        return found, True
+
+    def serve(self, request, name):
+        static_file, immutable = self.find(name)
+        if static_file is None:
+            return None
+
+        # Las peticiones Range se responden sobre la versión sin comprimir.
+        range_header = request.headers.get("Range")
+        encoding = None
+        if not range_header:
+            accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+            encoding = next((encoding for encoding, _ in ENCODINGS if encoding in accepted and encoding in static_file.variants), None)
+        path, size, modified = static_file.variants[encoding] if encoding else static_file.identity
+        etag = f'"{size:x}-{int(modified * 1000):x}"'
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(modified))
+        if response is None:
+            response = self.respond(request, path, size, etag, range_header)
+        if response.status_code in (200, 206):
+            response["Content-Type"] = static_file.content_type
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(modified)
+        response["Accept-Ranges"] = "bytes"
+        if static_file.variants:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        if immutable:
+            patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=settings.AUCTIONS_STATIC_MAX_AGE)
+        return response
+
+    def respond(self, request, path, size, etag, range_header):
+        byte_range = None
+        if range_header and request.headers.get("If-Range", etag) == etag:
+            byte_range = parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        start, end = byte_range or (0, size - 1)
+        length = max(0, end - start + 1)
+        if request.method == "HEAD":
+            response = HttpResponse(status=206 if byte_range else 200)
+        else:
+            file = open(path, "rb")
+            if byte_range:
+                file.seek(start)
+                response = FileResponse(FileRange(file, length), status=206)
+            else:
+                response = FileResponse(file)
+                del response["Content-Disposition"]  # FileResponse lo deduce del nombre en disco (p. ej. styles.css.gz).
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+        return response
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def listing_channel(listing_id):
+    return f"listing:{listing_id}"
+
+
+# Suscripción de un cliente a un canal. Los eventos se guardan en una cola acotada: si el cliente es
+# lento y la cola se llena se descartan los eventos más antiguos (el último precio es el que importa), y
+# si acumula demasiados descartes se le desconecta para que vuelva a pedir el estado completo.
+class Subscription:
+    __slots__ = ("broker", "channel", "loop", "dropped", "closed", "_events", "_waiter")
+
+    def __init__(self, broker, channel, loop, max_queue):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.dropped = 0
+        self.closed = False
+        self._events = deque(maxlen=max_queue)
+        self._waiter = None
+
+    # Se ejecuta siempre en el event loop del suscriptor.
+    def _deliver(self, event):
+        if self.closed:
+            return
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+            if self.dropped > self.broker.max_dropped:
+                self.close()
+                return
+        self._events.append(event)
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    # Siguiente evento, o None si pasan `timeout` segundos sin eventos o la suscripción se cerró.
+    async def get(self, timeout=None):
+        while not self._events:
+            if self.closed:
+                return None
+            self._waiter = self.loop.create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._waiter = None
+        return self._events.popleft()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+            self._wake()
+
+
+# Interfaz de los brokers de eventos. Un broker distribuido (por ejemplo sobre Redis pub/sub) debe
+# implementar `publish` reenviando el evento a los demás procesos y entregarlo localmente con `fan_out`.
+class Broker:
+    def __init__(self, max_queue=None, max_dropped=None):
+        self.max_queue = max_queue or settings.AUCTIONS_EVENTS_MAX_QUEUE
+        self.max_dropped = max_dropped or settings.AUCTIONS_EVENTS_MAX_DROPPED
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+
+# Broker en memoria: reparte cada evento a los suscriptores del canal en este proceso. Se puede publicar
+# desde cualquier hilo; la entrega se agenda en el event loop de cada suscriptor.
+class InProcessBroker(Broker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+    def publish(self, channel, event):
+        self.fan_out(channel, event)
+
+    def fan_out(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        # Un solo call_soon_threadsafe por event loop, no uno por suscriptor.
+        by_loop = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, group, event)
+            except RuntimeError:
+                pass  # El event loop ya terminó; sus suscripciones se cierran al salir.
+
+
+def _deliver_all(subscriptions, event):
+    for subscription in subscriptions:
+        subscription._deliver(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.AUCTIONS_EVENTS_BROKER)()
+    return _broker
+
+
+def publish_listing_event(listing_id, event):
+    get_broker().publish(listing_channel(listing_id), {"listing_id": listing_id, **event})
+
+
+# Formato de un evento de Server-Sent Events.
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str, separators=(',', ':'))}\n\n"
@@ -0,0 +1,187 @@
+import logging
+import random
+import threading
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .db import retry_on_lock
+from .models import Task
+
+logger = logging.getLogger("auctions.tasks")
+
+# Cola de tareas en segundo plano guardada en la base de datos, sin servicios externos. Las vistas
+# encolan con enqueue_on_commit, que inserta las tareas al confirmar la transacción, y el comando
+# run_tasks las ejecuta. La entrega es "al menos una vez": una tarea puede repetirse si el worker muere
+# entre ejecutarla y borrarla, así que los manejadores deben tolerarlo.
+#
+# Un worker reclama un lote de tareas vencidas con un único UPDATE que aplaza su run_after en
+# AUCTIONS_TASK_LEASE segundos: mientras tanto ningún otro worker las ve, y si el worker muere vuelven a
+# la cola sin intervención. Las tareas del lote con el mismo nombre se pasan juntas a los manejadores
+# registrados con batch=True.
+
+TASKS = {}
+
+
+# Función registrada para un nombre de tarea. Con batch=True recibe la lista de payloads del lote.
+@dataclass(frozen=True)
+class Handler:
+    function: object
+    batch: bool = False
+    max_attempts: int = None
+
+
+# Registra la función decorada como manejador de las tareas `name`:
+# @task("notify_outbid", batch=True)
+def task(name, batch=False, max_attempts=None):
+    def register(function):
+        TASKS[name] = Handler(function, batch, max_attempts)
+        return function
+    return register
+
+
+# Encola una tarea `name` por cada payload (un dict serializable en JSON). Con `key`, una función que
+# da la clave de deduplicación de cada payload, las tareas que ya están en la cola se ignoran.
+def enqueue(name, payloads, key=None, delay=0):
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}.")
+    run_after = timezone.now() + timedelta(seconds=delay)
+    Task.objects.bulk_create(
+        [Task(name=name, payload=payload, dedup_key=key(payload) if key else None, run_after=run_after) for payload in payloads],
+        ignore_conflicts=True,
+    )
+
+
+# Encola las tareas al confirmar la transacción en curso: si se deshace, no se encola nada, y un worker
+# nunca ve una tarea antes que los datos que la originan.
+def enqueue_on_commit(name, payloads, key=None, delay=0):
+    payloads = list(payloads)
+    transaction.on_commit(lambda: enqueue(name, payloads, key, delay))
+
+
+# Espera exponencial con variación aleatoria antes del intento `attempts` + 1.
+def backoff(attempts):
+    delay = min(settings.AUCTIONS_TASK_BACKOFF * 2 ** (attempts - 1), settings.AUCTIONS_TASK_MAX_BACKOFF)
+    return delay * random.uniform(0.5, 1.5)
+
+
+# Reclama hasta `batch_size` tareas vencidas y las devuelve. En PostgreSQL cada worker bloquea filas
+# distintas con SKIP LOCKED; en SQLite la transacción toma el bloqueo de escritura antes de leer, así
+# que los workers se turnan (como en auctions/expiry.py).
+def claim(batch_size, now=None):
+    now = now or timezone.now()
+    tasks = retry_on_lock(lambda _: _claim(batch_size, now), retries=10)
+    for claimed in tasks:
+        claimed.attempts += 1
+    return tasks
+
+
+def _claim(batch_size, now):
+    with transaction.atomic():
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"UPDATE {Task._meta.db_table} SET attempts = attempts WHERE 0")
+        due = Task.objects.filter(status=Task.QUEUED, run_after__lte=now).order_by("run_after", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        tasks = list(due[:batch_size])
+        if tasks:
+            lease = now + timedelta(seconds=settings.AUCTIONS_TASK_LEASE)
+            Task.objects.filter(id__in=[claimed.id for claimed in tasks]).update(run_after=lease, attempts=F("attempts") + 1)
+    return tasks
+
+
+# Ejecuta las tareas reclamadas, agrupadas por nombre. Cada llamada a un manejador va en su propia
+# transacción: un manejador por lotes que falla hace reintentar todas las tareas de su grupo.
+def execute(tasks):
+    groups = {}
+    for claimed in tasks:
+        groups.setdefault(claimed.name, []).append(claimed)
+
+    done, failed = [], []
+    for name, group in groups.items():
+        handler = TASKS.get(name)
+        calls = [group] if handler and handler.batch else [[claimed] for claimed in group]
+        for call in calls:
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for task {name!r}.")
+                with transaction.atomic():
+                    if handler.batch:
+                        handler.function([claimed.payload for claimed in call])
+                    else:
+                        handler.function(call[0].payload)
+            except Exception:
+                logger.exception("Task %s failed (%d tasks).", name, len(call))
+                error = traceback.format_exc()
+                failed += [(claimed, handler, error) for claimed in call]
+            else:
+                done += call
+
+    retry_on_lock(lambda _: _finish(done, failed), retries=10)
+    return len(done), len(failed)
+
+
+# Borra las tareas completadas y reprograma (o da por fallidas) las que fallaron, en una transacción.
+def _finish(done, failed):
+    now = timezone.now()
+    with transaction.atomic():
+        Task.objects.filter(id__in=[claimed.id for claimed in done]).delete()
+        for claimed, handler, error in failed:
+            max_attempts = (handler and handler.max_attempts) or settings.AUCTIONS_TASK_MAX_ATTEMPTS
+            if claimed.attempts >= max_attempts:
+                # La clave se libera para que la misma tarea pueda volver a encolarse.
+                values = {"status": Task.FAILED, "dedup_key": None}
+            else:
+                values = {"run_after": now + timedelta(seconds=backoff(claimed.attempts))}
+            Task.objects.filter(id=claimed.id).update(**values, last_error=error)
+
+
+# Reclama y ejecuta un lote; devuelve (completadas, fallidas).
+def run_batch(batch_size=100):
+    tasks = claim(batch_size)
+    return execute(tasks) if tasks else (0, 0)
+
+
+# Procesa la cola con `concurrency` hilos hasta que se activa `stop` o, con burst=True, hasta que no
+# quedan tareas vencidas. Cada hilo usa su propia conexión a la base de datos. Devuelve los totales.
+def work(concurrency=1, batch_size=100, poll_interval=1.0, burst=False, stop=None):
+    stop = stop or threading.Event()
+    totals = {"done": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def loop():
+        try:
+            while not stop.is_set():
+                try:
+                    done, failed = run_batch(batch_size)
+                except OperationalError:
+                    # La base de datos sigue bloqueada tras los reintentos: las tareas reclamadas vuelven
+                    # a la cola al vencer su plazo.
+                    logger.exception("Could not claim or finish tasks; retrying.")
+                    stop.wait(poll_interval)
+                    continue
+                with lock:
+                    totals["done"] += done
+                    totals["failed"] += failed
+                if not done and not failed:
+                    if burst:
+                        return
+                    stop.wait(poll_interval)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=loop, name=f"auctions-task-worker-{n}") for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        stop.set()
+    return totals
@@ -0,0 +1,32 @@
+from django import template
+
+from ..cache import FRAGMENT_KINDS, get_or_compute, listing_key
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, kind, listing_id):
+        self.nodelist = nodelist
+        self.kind = kind
+        self.listing_id = listing_id
+
+    def render(self, context):
+        key = listing_key(self.kind, self.listing_id.resolve(context))
+        return get_or_compute(self.kind, key, lambda: self.nodelist.render(context))
+
+
+# Cachea el HTML de un fragmento por subasta hasta que una señal lo invalida:
+# {% cachedfragment "card" listing.id %} ... {% endcachedfragment %}
+@register.tag
+def cachedfragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment kind and a listing id.")
+    kind = bits[1].strip("\"'")
+    if kind not in FRAGMENT_KINDS:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' kind must be one of {', '.join(FRAGMENT_KINDS)}.")
+
+    nodelist = parser.parse(("endcachedfragment",))
+    parser.delete_first_token()
+    return CachedFragmentNode(nodelist, kind, parser.compile_filter(bits[2]))
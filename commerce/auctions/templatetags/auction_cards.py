@@ -0,0 +1,24 @@
+from django import template
+from django.templatetags.static import static
+
+from ..images import PLACEHOLDER, row_image_sources
+from .auction_images import image_tag
+
+register = template.Library()
+
+
+# Tarjeta de una subasta a partir de una fila de AuctionListingQuerySet.card_rows(); con "won" muestra
+# la oferta ganadora en lugar de los precios:
+# {% listing_card listing %} o {% listing_card listing "won" %}
+# La URL de la imagen por defecto se calcula una vez por render de la página, no por tarjeta.
+@register.inclusion_tag("auctions/listing_card.html", takes_context=True)
+def listing_card(context, card, variant="active"):
+    placeholder = context.render_context.get(PLACEHOLDER)
+    if placeholder is None:
+        placeholder = context.render_context[PLACEHOLDER] = static(PLACEHOLDER)
+    return {
+        "card": card,
+        "won": variant == "won",
+        "price": card["current_price"] if card["current_price"] is not None else card["starting_bid"],
+        "image": image_tag(*row_image_sources(card, placeholder), card["title"], "card", placeholder),
+    }
@@ -0,0 +1,30 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from ..images import PLACEHOLDER, image_sources
+
+register = template.Library()
+
+# Tamaño en pantalla de cada tipo de imagen, para que el navegador elija del srcset la miniatura más
+# pequeña que basta. Las tarjetas se cargan en diferido; la imagen del detalle no, porque se ve al abrir la página.
+PRESETS = {
+    "card": {"class": "listing-image", "sizes": "150px", "loading": "lazy"},
+    "detail": {"class": "listing-details__image", "sizes": "(max-width: 640px) 100vw, 640px", "loading": "eager"},
+}
+
+
+# Imagen de una subasta con srcset de miniaturas y la imagen por defecto si falla la carga:
+# {% listing_image listing "card" %}
+@register.simple_tag
+def listing_image(listing, preset):
+    return image_tag(*image_sources(listing), listing.title, preset)
+
+
+def image_tag(src, srcset, alt, preset, placeholder=None):
+    options = PRESETS[preset]
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async" '
+        "onerror=\"this.onerror=null;this.srcset='';this.src='{}'\">",
+        src, srcset, options["sizes"] if srcset else "", alt, options["class"], options["loading"], placeholder or static(PLACEHOLDER),
+    )
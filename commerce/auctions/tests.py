@@ -1,3 +1,1256 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.template.defaultfilters import truncatechars
+from django.templatetags.static import static
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics
+from .analytics import hottest, rebuild_hot_keys
+from .archive import archive_closed
+from .benchmarks.data import PIXEL, SCALES, generate
+from .benchmarks.runner import compare, run_client
+from .benchmarks.scenarios import SCENARIOS, uncovered_url_names
+from .bidding import BidResult, close_listing, place_bid, retry_on_lock
+from .bulk import export_chunks, import_listings, read_rows
+from .cache import DETAIL, detail_key, get_cache, get_or_compute, invalidate_listings, stats
+from .expiry import close_expired
+from .facets import category_facets, reconcile
+from .images import image_sources, store_original, thumbnail_name
+from .metrics import get_registry
+from .notifications import notify_outbid
+from .models import ArchivedBid, ArchivedComment, ArchivedListing, AuctionListing, Bid, Comment, Notification, Task, User
+from .pagination import paginate
+from .ratelimit import MemoryBackend, get_backend as get_ratelimit_backend
+from .singleflight import SingleFlight
+from .search import InvertedIndexBackend, SQLiteFTSBackend, search_listings, tokenize
+from .streaming import InProcessBroker, get_broker, listing_channel, publish_listing_event
+from . import images
+from . import staticfiles
+from . import tasks
+from . import thumbnails
+
+
+# Presupuesto de consultas SQL por página: el número de consultas no debe crecer con el número de filas.
+class QueryBudgetTests(TestCase):
+    SIZES = [10, 1000, 10000]
+
+    # Máximo de consultas permitido por página, incluyendo sesión, usuario autenticado y avisos sin leer.
+    BUDGETS = {
+        "index": 6,  # Con las subastas ganadas activas y archivadas.
+        "category_listings": 4,
+        "categories": 4,
+        "watchlist_store": 4,
+        "listing_detail": 6,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.viewer = User.objects.create_user("viewer", "viewer@example.com", "password")
+        cls.detail_listing = AuctionListing.objects.create(
+            title="Detail", description="Detail listing", starting_bid=Decimal("1.00"), owner=cls.owner
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.viewer)
+
+    # Crea filas hasta alcanzar `size` subastas activas, con comentarios de distintos usuarios.
+    def grow_to(self, size):
+        existing = AuctionListing.objects.filter(category="SPORTS").count()
+        owners = [self.owner, self.viewer]
+        listings = AuctionListing.objects.bulk_create([
+            AuctionListing(
+                title=f"Listing {n}", description="x" * 500, starting_bid=Decimal("5.00"),
+                category="SPORTS", owner=owners[n % 2], winner=self.viewer if n % 50 == 0 else None,
+            )
+            for n in range(existing, size)
+        ])
+        self.viewer.watchlist.add(*listings)
+        Comment.objects.bulk_create([
+            Comment(commenter=owners[n % 2], listing=self.detail_listing, content=f"Comment {n}")
+            for n in range(existing, size)
+        ])
+
+    def assert_budget(self, name, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), self.BUDGETS[name],
+            f"{name} ran {len(queries)} queries:\n" + "\n".join(q["sql"] for q in queries),
+        )
+        # La descripción completa de las subastas no debe cargarse en las páginas de listados, solo su resumen.
+        if name != "listing_detail":
+            for query in queries:
+                sql = query["sql"].replace('SUBSTR("auctions_auctionlisting"."description"', "")
+                self.assertNotIn('"auctions_auctionlisting"."description"', sql)
+
+    def test_pages_stay_within_query_budget(self):
+        pages = {
+            "index": reverse("auctions:index"),
+            "category_listings": reverse("auctions:category_listings", args=["SPORTS"]),
+            "categories": reverse("auctions:categories"),
+            "watchlist_store": reverse("auctions:watchlist_store"),
+            "listing_detail": reverse("auctions:listing_detail", args=[self.detail_listing.id]),
+        }
+        for size in self.SIZES:
+            self.grow_to(size)
+            for name, url in pages.items():
+                with self.subTest(page=name, listings=size):
+                    self.assert_budget(name, url)
+
+
+# Paginación por cursor: recorrer hacia adelante y hacia atrás devuelve las mismas páginas sin repetir filas.
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", "owner@example.com", "password")
+        AuctionListing.objects.bulk_create([
+            AuctionListing(title=f"Listing {n}", description="", starting_bid=Decimal("1.00"), owner=owner)
+            for n in range(25)
+        ])
+
+    def test_walk_forward_and_back(self):
+        queryset = AuctionListing.objects.filter(is_active=True)
+        pages = [paginate(queryset, page_size=10)]
+        while pages[-1].has_next:
+            pages.append(paginate(queryset, pages[-1].next_cursor, page_size=10))
+
+        ids = [listing.id for page in pages for listing in page]
+        self.assertEqual(ids, list(queryset.order_by("-id").values_list("id", flat=True)))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous)
+
+        back = paginate(queryset, pages[2].previous_cursor, page_size=10)
+        self.assertEqual([listing.id for listing in back], [listing.id for listing in pages[1]])
+        self.assertTrue(back.has_previous and back.has_next)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse("auctions:index"), {"cursor": "not-a-cursor", "page_size": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["active_listings"]), 5)
+        self.assertContains(response, "cursor=")
+
+    def test_cursor_with_values_of_the_wrong_type_falls_back_to_first_page(self):
+        cursor = base64.urlsafe_b64encode(json.dumps(["n", ["abc"]]).encode()).decode().rstrip("=")
+        response = self.client.get(reverse("auctions:index"), {"cursor": cursor, "page_size": 5})
+        self.assertEqual(len(response.context["active_listings"]), 5)
+        response = self.client.get(reverse("auctions:api:listings"), {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+
+
+# Caché de tarjetas y del detalle: se sirve desde la caché hasta que una señal invalida la subasta.
+class ListingCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.bidder = User.objects.create_user("bidder", "bidder@example.com", "password")
+        cls.listing = AuctionListing.objects.create(
+            title="Cached", description="", starting_bid=Decimal("1.00"), owner=cls.owner
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        self.url = reverse("auctions:listing_detail", args=[self.listing.id])
+
+    def test_detail_is_cached_until_a_bid_invalidates_it(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        self.client.force_login(self.bidder)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(self.listing.id, self.bidder, Decimal("7.00"))
+        self.assertContains(self.client.get(self.url), "$7.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(commenter=self.bidder, listing=self.listing, content="Fresh comment")
+        self.assertContains(self.client.get(self.url), "Fresh comment")
+
+    def test_values_computed_before_an_invalidation_are_never_served(self):
+        def compute_while_a_write_commits():
+            invalidate_listings([self.listing.id])
+            return "stale"
+
+        self.assertEqual(get_or_compute(DETAIL, detail_key(self.listing.id), compute_while_a_write_commits), "stale")
+        self.assertEqual(get_or_compute(DETAIL, detail_key(self.listing.id), lambda: "fresh"), "fresh")
+
+    def test_cards_are_invalidated_when_the_listing_closes(self):
+        index = reverse("auctions:index")
+        self.assertContains(self.client.get(index), "Cached")
+        hits = stats()["hits"].get("card", 0)
+        self.client.get(index)
+        self.assertEqual(stats()["hits"]["card"], hits + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            close_listing(self.listing.id)
+        self.assertNotContains(self.client.get(index), "Cached")
+        self.client.force_login(self.owner)
+        self.assertContains(self.client.get(self.url), "Winning Bid")
+
+
+# Búsqueda de subastas: ranking, filtros y prefijos, con FTS5 y con el índice invertido en memoria.
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.bike = AuctionListing.objects.create(
+            title="Mountain bike", description="Aluminium frame", starting_bid=Decimal("100.00"),
+            category="SPORTS", owner=owner,
+        )
+        cls.helmet = AuctionListing.objects.create(
+            title="Helmet", description="Fits any bike rider", starting_bid=Decimal("20.00"),
+            category="SPORTS", owner=owner,
+        )
+        cls.closed = AuctionListing.objects.create(
+            title="Old bike", description="", starting_bid=Decimal("5.00"),
+            category="OTHER", owner=owner, is_active=False,
+        )
+
+    def assert_backend(self, backend):
+        ids = lambda results: [listing_id for listing_id, _ in results]
+        self.assertEqual(ids(backend.search(tokenize("bike"))), [self.bike.id, self.helmet.id])
+        self.assertEqual(ids(backend.search(tokenize("bike"), active_only=False, category="OTHER")), [self.closed.id])
+        self.assertEqual(ids(backend.search(tokenize("mountain bi"), prefix=True)), [self.bike.id])
+        self.assertEqual(backend.search(tokenize('"bike" OR')), [])
+
+    def test_fts_backend(self):
+        self.assert_backend(SQLiteFTSBackend())
+
+    def test_fts_backend_treats_frequent_terms_as_filters(self):
+        backend = SQLiteFTSBackend(ranked_document_frequency=1)
+        self.assertEqual([pk for pk, _ in backend.search(tokenize("bike"))], [self.helmet.id, self.bike.id])
+        self.assertEqual([pk for pk, _ in backend.search(tokenize("bike mountain"))], [self.bike.id])
+        self.assertEqual(backend.search(tokenize("bike unknownword")), [])
+
+    def test_inverted_index_backend(self):
+        self.assert_backend(InvertedIndexBackend())
+
+    def test_index_follows_saves_and_deletes(self):
+        self.helmet.title = "Skateboard"
+        self.helmet.description = ""
+        self.helmet.save()
+        self.assertEqual([pk for pk, _ in search_listings("skate", prefix=True)], [self.helmet.id])
+        self.helmet.delete()
+        self.assertEqual(search_listings("skateboard"), [])
+
+    def test_search_views(self):
+        self.assertContains(self.client.get(reverse("auctions:search"), {"q": "bike"}), "Mountain bike")
+        response = self.client.get(reverse("auctions:search_suggest"), {"q": "hel"})
+        self.assertEqual(response.json(), {"results": [{"id": self.helmet.id, "title": "Helmet"}]})
+
+
+# Vencimiento programado: las subastas vencidas se cierran en lote con el ganador correcto.
+class ExpiryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.bidder = User.objects.create_user("bidder", "bidder@example.com", "password")
+
+    def create_listing(self, ends_in):
+        return AuctionListing.objects.create(
+            title="Timed", description="", starting_bid=Decimal("1.00"), owner=self.owner,
+            ends_at=timezone.now() + ends_in,
+        )
+
+    def test_close_expired_is_idempotent_and_resolves_winners(self):
+        expired = [self.create_listing(timedelta(minutes=-1)) for _ in range(5)]
+        running = self.create_listing(timedelta(hours=1))
+        AuctionListing.objects.filter(pk=expired[0].pk).update(current_price=Decimal("9.00"), highest_bidder=self.bidder)
+
+        self.assertEqual(close_expired(batch_size=2)[0], 5)
+        self.assertEqual(close_expired(batch_size=2)[0], 0)
+
+        winner = AuctionListing.objects.get(pk=expired[0].pk)
+        self.assertEqual((winner.winner, winner.winning_bid, winner.is_active), (self.bidder, Decimal("9.00"), False))
+        self.assertIsNotNone(winner.closed_at)
+        self.assertEqual(AuctionListing.objects.filter(is_active=True).get(), running)
+
+    def test_bids_after_the_end_time_are_rejected(self):
+        listing = self.create_listing(timedelta(seconds=-1))
+        self.assertEqual(place_bid(listing.id, self.bidder, Decimal("5.00")).status, BidResult.CLOSED)
+
+
+class ListingEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.listing = AuctionListing.objects.create(
+            title="Streamed", description="", starting_bid=Decimal("1.00"), owner=cls.owner,
+        )
+
+    async def test_slow_subscribers_keep_the_latest_events_and_are_dropped(self):
+        broker = InProcessBroker(max_queue=2, max_dropped=3)
+        subscription = broker.subscribe("channel")
+        for amount in range(4):
+            broker.publish("channel", {"amount": amount})
+        await asyncio.sleep(0)
+        self.assertEqual(subscription.dropped, 2)
+        self.assertEqual([await subscription.get(), await subscription.get()], [{"amount": 2}, {"amount": 3}])
+
+        for amount in range(6):
+            broker.publish("channel", {"amount": amount})
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.closed)
+        self.assertEqual(broker.subscriber_count("channel"), 0)
+
+    @override_settings(AUCTIONS_EVENTS_STREAMING=True)
+    async def test_stream_sends_state_then_bids_until_closed(self):
+        response = await self.async_client.get(reverse("auctions:listing_events", args=[self.listing.id]))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b"event: state", await anext(chunks))
+
+        publish_listing_event(self.listing.id, {"type": "bid", "amount": Decimal("5.00"), "bidder": "bidder"})
+        self.assertIn(b'"amount":"5.00"', await anext(chunks))
+        publish_listing_event(self.listing.id, {"type": "closed", "winning_bid": Decimal("5.00"), "winner": "bidder"})
+        self.assertIn(b"event: closed", await anext(chunks))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(chunks)
+
+    async def test_unknown_listing_is_not_found(self):
+        response = await self.async_client.get(reverse("auctions:listing_events", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(AUCTIONS_EVENTS_STREAMING=True)
+    def test_wsgi_requests_get_the_state_and_a_retry_hint(self):
+        response = self.client.get(reverse("auctions:listing_events", args=[self.listing.id]))
+        body = response.content.decode()
+        self.assertTrue(body.startswith(f"retry: {settings.AUCTIONS_EVENTS_RETRY * 1000}\n\n"))
+        self.assertIn("event: state", body)
+        self.assertEqual(get_broker().subscriber_count(listing_channel(self.listing.id)), 0)
+
+    def test_detail_page_opens_an_event_source_only_when_streaming(self):
+        url = reverse("auctions:listing_detail", args=[self.listing.id])
+        self.assertNotContains(self.client.get(url), "EventSource(")
+        with override_settings(AUCTIONS_EVENTS_STREAMING=True):
+            self.assertContains(self.client.get(url), "EventSource(")
+
+
+class BulkImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+
+    def test_import_creates_valid_rows_and_reports_the_rest(self):
+        lines = [
+            json.dumps({"title": "Lamp", "description": "Desk lamp", "starting_bid": "10.00", "category": "HOME"}),
+            json.dumps({"title": "", "description": "No title", "starting_bid": "5"}),
+            "{not json",
+            json.dumps({"title": "Bike", "description": "Road bike", "starting_bid": 120, "category": "SPORTS"}),
+        ]
+        result = import_listings(read_rows(lines, "jsonl"), self.owner, batch_size=1)
+
+        self.assertEqual((result.created, result.failed), (2, 2))
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+        self.assertIn("title", result.errors[0][1])
+        self.assertQuerySetEqual(
+            AuctionListing.objects.filter(owner=self.owner).order_by("id").values_list("title", "starting_bid"),
+            [("Lamp", Decimal("10.00")), ("Bike", Decimal("120.00"))],
+        )
+        self.assertEqual([pk for pk, _ in search_listings("bike")], [AuctionListing.objects.get(title="Bike").pk])
+
+    def test_exported_listings_can_be_imported_again(self):
+        AuctionListing.objects.create(title="Chair", description="Oak, \"vintage\"", starting_bid=Decimal("30.00"), owner=self.owner)
+        exported = "".join(export_chunks("listings", "csv", rows_per_chunk=1))
+
+        row = next(csv.DictReader(io.StringIO(exported)))
+        self.assertEqual((row["title"], row["description"], row["owner_username"]), ("Chair", 'Oak, "vintage"', "owner"))
+        result = import_listings(read_rows(io.StringIO(exported), "csv"), self.owner)
+        self.assertEqual((result.created, result.failed), (1, 0))
+
+    def test_http_import_and_streaming_export(self):
+        self.client.force_login(self.owner)
+        upload = SimpleUploadedFile("listings.csv", b"title,description,starting_bid\r\nVase,Blue vase,8.50\r\n,,\r\n")
+        response = self.client.post(reverse("auctions:bulk_import"), {"file": upload})
+        self.assertEqual((response.json()["created"], response.json()["failed"]), (1, 1))
+
+        upload = SimpleUploadedFile("listings.csv", "title,description,starting_bid\r\nCafé,Crème,3\r\n".encode("latin-1"))
+        response = self.client.post(reverse("auctions:bulk_import"), {"file": upload})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse("auctions:bulk_export", args=["listings", "jsonl"]))
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Vase"])
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.listing = AuctionListing.objects.create(title="Measured", description="", starting_bid=Decimal("1.00"), owner=cls.owner)
+        cls.staff = User.objects.create_user("staff", "staff@example.com", "password", is_staff=True)
+
+    def setUp(self):
+        get_cache().clear()
+        get_registry().reset()
+
+    def test_records_sql_templates_and_bytes_per_url_name(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("auctions:listing_detail", args=[self.listing.id]))
+
+        view = get_registry().snapshot()["auctions:listing_detail"]
+        self.assertEqual(view["count"], 1)
+        self.assertEqual(view["sql_count"], len(queries))
+        self.assertGreater(view["template_seconds"], 0)
+        self.assertEqual(view["response_bytes"], len(response.content))
+
+        with self.settings(AUCTIONS_METRICS_ALLOWED_IPS=["127.0.0.1"]):
+            metrics = self.client.get(reverse("auctions:metrics")).content.decode()
+        self.assertIn('auctions_request_duration_seconds_count{view="auctions:listing_detail"} 1', metrics)
+        self.assertIn('auctions_request_duration_seconds_bucket{view="auctions:listing_detail",le="+Inf"} 1', metrics)
+
+    def test_metrics_are_only_shown_to_staff_and_allowed_ips(self):
+        for name in ("auctions:metrics", "auctions:cache_metrics"):
+            with self.subTest(url=name):
+                self.client.logout()
+                self.assertEqual(self.client.get(reverse(name)).status_code, 404)
+                self.client.force_login(self.owner)
+                self.assertEqual(self.client.get(reverse(name)).status_code, 404)
+                with self.settings(AUCTIONS_METRICS_ALLOWED_IPS=["127.0.0.1"]):
+                    self.assertEqual(self.client.get(reverse(name), REMOTE_ADDR="10.0.0.1").status_code, 404)
+                    self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+                self.client.force_login(self.staff)
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+
+    @override_settings(AUCTIONS_SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs("auctions.slow_requests", "WARNING") as logs:
+            self.client.get(reverse("auctions:listing_detail", args=[self.listing.id]))
+        self.assertIn("auctions:listing_detail", logs.output[0])
+        self.assertIn("auctions_auctionlisting", logs.output[0])
+
+
+class WatchlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.viewer = User.objects.create_user("viewer", "viewer@example.com", "password")
+        cls.listings = AuctionListing.objects.bulk_create([
+            AuctionListing(title=f"Listing {n}", description="", starting_bid=Decimal("1.00"), owner=cls.owner)
+            for n in range(5)
+        ])
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.viewer)
+
+    def watched_ids(self):
+        return set(self.viewer.watchlist.values_list("id", flat=True))
+
+    def test_watch_and_unwatch_actions_are_idempotent(self):
+        listing = self.listings[0]
+        url = reverse("auctions:watchlist", args=[listing.id])
+        for _ in range(2):
+            self.client.post(url, {"action": "watch"})
+        self.assertEqual(self.watched_ids(), {listing.id})
+        self.assertContains(self.client.get(reverse("auctions:listing_detail", args=[listing.id])), "Remove from Watchlist")
+
+        for _ in range(2):
+            self.client.post(url, {"action": "unwatch"})
+        self.assertEqual(self.watched_ids(), set())
+
+        self.client.post(url)
+        self.assertEqual(self.watched_ids(), {listing.id})
+        self.client.post(url)
+        self.assertEqual(self.watched_ids(), set())
+
+    def test_membership_check_does_not_load_the_watchlist(self):
+        self.viewer.watchlist.add(*self.listings)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("auctions:listing_detail", args=[self.listings[0].id]))
+        watchlist_queries = [query["sql"] for query in queries if "auctions_user_watchlist" in query["sql"]]
+        self.assertEqual(len(watchlist_queries), 1)
+        self.assertIn("LIMIT 1", watchlist_queries[0])
+
+    def test_bulk_watch_and_unwatch(self):
+        ids = [listing.id for listing in self.listings]
+        response = self.client.post(
+            reverse("auctions:watchlist_bulk"), json.dumps({"watch": ids + [0]}), content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"watching": 5})
+
+        response = self.client.post(
+            reverse("auctions:watchlist_bulk"), json.dumps({"watch": ids[:1], "unwatch": ids[1:]}), content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"watching": 1})
+        self.assertEqual(self.watched_ids(), {ids[0]})
+
+        for body in ([1, 2], {"watch": "123"}, {"unwatch": {"1": 1}}, {"watch": ["1"]}, {"watch": [1.5]}, {"watch": [True]}):
+            with self.subTest(body=body):
+                response = self.client.post(reverse("auctions:watchlist_bulk"), json.dumps(body), content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.watched_ids(), {ids[0]})
+
+    def test_watchlist_page_shows_live_prices(self):
+        listing = self.listings[0]
+        self.viewer.watchlist.add(listing)
+        place_bid(listing.id, self.owner, Decimal("12.00"))
+        self.assertContains(self.client.get(reverse("auctions:watchlist_store")), "Current price: $12.00")
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.bidder = User.objects.create_user("bidder", "bidder@example.com", "password")
+        cls.listing = AuctionListing.objects.create(
+            title="Camera", description="Film camera", starting_bid=Decimal("10.00"), category="ELECTRONICS", owner=cls.owner,
+        )
+
+    def test_list_detail_bids_comments_and_categories(self):
+        place_bid(self.listing.id, self.bidder, Decimal("15.00"))
+        Comment.objects.create(listing=self.listing, commenter=self.bidder, content="Does it work?")
+
+        results = self.client.get(reverse("auctions:api:listings")).json()["results"]
+        self.assertEqual([(row["id"], row["current_price"], row["owner_username"]) for row in results], [(self.listing.id, "15.00", "owner")])
+        detail = self.client.get(reverse("auctions:api:listing", args=[self.listing.id])).json()
+        self.assertEqual((detail["description"], detail["bid_count"]), ("Film camera", 1))
+        bids = self.client.get(reverse("auctions:api:bids", args=[self.listing.id])).json()["results"]
+        self.assertEqual([(bid["amount"], bid["bidder_username"]) for bid in bids], [("15.00", "bidder")])
+        comments = self.client.get(reverse("auctions:api:comments", args=[self.listing.id])).json()["results"]
+        self.assertEqual([comment["content"] for comment in comments], ["Does it work?"])
+        categories = self.client.get(reverse("auctions:api:categories")).json()["results"]
+        self.assertIn(("ELECTRONICS", 1, "10.00"), [(row["category"], row["count"], row["min_starting_bid"]) for row in categories])
+        self.assertEqual(self.client.get(reverse("auctions:api:listing", args=[0])).status_code, 404)
+
+    def test_conditional_get_returns_304_until_a_bid_changes_the_listing(self):
+        url = reverse("auctions:api:listing", args=[self.listing.id])
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        place_bid(self.listing.id, self.bidder, Decimal("20.00"))
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_responses_are_gzipped_when_accepted(self):
+        AuctionListing.objects.bulk_create([
+            AuctionListing(title=f"Listing {n}", description="", starting_bid=Decimal("1.00"), owner=self.owner) for n in range(20)
+        ])
+        response = self.client.get(reverse("auctions:api:listings"), headers={"accept-encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+class CommentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.listing = AuctionListing.objects.create(title="Camera", description="Film camera", starting_bid=Decimal("10.00"), owner=cls.owner)
+
+    def setUp(self):
+        get_cache().clear()
+
+    # `count` comentarios con created_at creciente; varios comparten instante para probar el desempate por id.
+    def add_comments(self, count):
+        start = timezone.now() - timedelta(hours=1)
+        comments = Comment.objects.bulk_create([
+            Comment(listing=self.listing, commenter=self.owner, content=f"Comment {n}") for n in range(count)
+        ])
+        for n, comment in enumerate(comments):
+            comment.created_at = start + timedelta(seconds=n // 3)
+        Comment.objects.bulk_update(comments, ["created_at"])
+        return comments
+
+    def test_comment_count_follows_creates_and_deletes(self):
+        self.client.force_login(self.owner)
+        self.client.post(reverse("auctions:comment", args=[self.listing.id]), {"comment": "First"})
+        Comment.objects.create(listing=self.listing, commenter=self.owner, content="Second")
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.comment_count, 2)
+
+        Comment.objects.filter(content="First").get().delete()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.comment_count, 1)
+
+    def test_first_page_is_one_query_at_any_size(self):
+        self.add_comments(500)
+        with self.assertNumQueries(1):
+            page = paginate(Comment.objects.rows(self.listing.id), page_size=20, ordering=Comment.PAGE_ORDERING)
+        self.assertEqual([row["content"] for row in page][:2], ["Comment 499", "Comment 498"])
+
+        response = self.client.get(reverse("auctions:listing_detail", args=[self.listing.id]))
+        self.assertEqual(len(response.context["comments"]), 20)
+
+    def test_fragment_pages_walk_every_comment_newest_first(self):
+        comments = self.add_comments(50)
+        url = reverse("auctions:listing_comments", args=[self.listing.id])
+        seen, query = [], "?page_size=7"
+        while query:
+            response = self.client.get(url + query)
+            seen += [row["id"] for row in response.context["comments"]]
+            query = response.context["comments"].next_query
+        self.assertEqual(seen, [comment.id for comment in reversed(comments)])
+        self.assertContains(self.client.get(url), "Load more comments")
+        self.assertEqual(self.client.get(reverse("auctions:listing_comments", args=[0])).status_code, 404)
+
+
+class BidAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.bidder = User.objects.create_user("bidder", "bidder@example.com", "password")
+        cls.listings = AuctionListing.objects.bulk_create([
+            AuctionListing(title=f"Listing {n}", description="", starting_bid=Decimal("1.00"), owner=cls.owner) for n in range(3)
+        ])
+        cls.now = timezone.now().replace(minute=30, second=0, microsecond=0)  # Lejos del cambio de hora.
+
+    def setUp(self):
+        get_cache().clear()
+
+    # Ofertas con precios crecientes en los instantes indicados (relativos a self.now).
+    def bid_at(self, listing, *offsets):
+        for number, offset in enumerate(offsets, start=1):
+            with mock.patch("django.utils.timezone.now", return_value=self.now + offset):
+                place_bid(listing.id, self.bidder, Decimal(f"{number + 1}.00"))
+
+    def test_leaderboard_ranks_by_recent_bids_and_reads_k_rows(self):
+        old, hot, _ = self.listings
+        self.bid_at(old, *[timedelta(hours=-2)] * 3)
+        self.bid_at(hot, timedelta(minutes=-5), timedelta(0))
+
+        with self.assertNumQueries(1):
+            ranking = hottest(10, now=self.now)
+        self.assertEqual([row["id"] for row in ranking], [hot.id, old.id])
+        self.assertAlmostEqual(ranking[1]["bid_velocity"], 3 * math.exp(-2), places=3)
+
+        incremental = dict(AuctionListing.objects.values_list("id", "hot_key"))
+        rebuild_hot_keys(now=self.now)
+        for listing_id, hot_key in AuctionListing.objects.values_list("id", "hot_key"):
+            if hot_key is None:
+                self.assertIsNone(incremental[listing_id])
+            else:
+                self.assertAlmostEqual(hot_key, incremental[listing_id], places=2)  # bid_time va unos µs detrás.
+
+        close_listing(hot.id)
+        self.assertEqual([row["id"] for row in hottest(10, now=self.now)], [old.id])
+
+    def test_rebuild_clears_listings_without_recent_bids(self):
+        stale, recent, _ = self.listings
+        self.bid_at(recent, timedelta(minutes=-5))
+        AuctionListing.objects.filter(id=stale.id).update(hot_key=1.0)
+        self.assertEqual(rebuild_hot_keys(now=self.now), 1)
+        self.assertEqual(dict(AuctionListing.objects.exclude(hot_key=None).values_list("id", "hot_key")).keys(), {recent.id})
+
+    def test_sync_bid_summary_reports_and_repairs_drift(self):
+        listing = self.listings[0]
+        self.bid_at(listing, timedelta(minutes=-5), timedelta(0))
+        AuctionListing.objects.filter(id=listing.id).update(current_price=None, highest_bidder=None, bid_count=0)
+
+        with self.assertRaisesMessage(CommandError, "1 of 3 listings are out of sync."):
+            call_command("sync_bid_summary", check=True, stdout=io.StringIO())
+        call_command("sync_bid_summary", stdout=io.StringIO())
+        listing.refresh_from_db()
+        self.assertEqual((listing.current_price, listing.highest_bidder, listing.bid_count), (Decimal("3.00"), self.bidder, 2))
+
+    def test_bid_history_is_bucketed_by_time(self):
+        listing = self.listings[0]
+        self.bid_at(listing, timedelta(hours=-3), timedelta(hours=-3, minutes=1), timedelta(0))
+        url = reverse("auctions:api:bid_history", args=[listing.id])
+
+        results = self.client.get(url, {"bucket": "hour"}).json()["results"]
+        self.assertEqual([(row["bids"], row["low"], row["high"]) for row in results], [(2, "2.00", "3.00"), (1, "4.00", "4.00")])
+        self.assertEqual(self.client.get(url, {"bucket": "week"}).status_code, 400)
+
+    @skipUnless(analytics.numpy, "NumPy is not installed.")
+    def test_batch_analytics_over_bid_arrays(self):
+        first, second, _ = self.listings
+        self.bid_at(first, timedelta(hours=-3), timedelta(hours=-2), timedelta(minutes=-10))
+        self.bid_at(second, timedelta(minutes=-1))
+
+        report = analytics.analyze_bids(analytics.bid_arrays(), now=self.now)
+        self.assertEqual(report["bids"], 4)
+        stats_by_id = {row["id"]: row for row in report["listings"]}
+        self.assertEqual((stats_by_id[first.id]["bids"], stats_by_id[first.id]["bids_last_window"]), (3, 1))
+        self.assertEqual(stats_by_id[first.id]["price_growth"], 2.0)
+        self.assertAlmostEqual(stats_by_id[first.id]["mean_seconds_between_bids"], (3 * 3600 - 600) / 2, delta=1)
+        self.assertEqual(report["top_bidders"], [{"id": self.bidder.id, "bids": 4}])
+
+
+class CategoryFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+
+    def create_listing(self, starting_bid, category="HOME"):
+        return AuctionListing.objects.create(
+            title="Item", description="", starting_bid=Decimal(starting_bid), category=category, owner=self.owner,
+        )
+
+    def facet(self, category="HOME"):
+        row = next(row for row in category_facets() if row["category"] == category)
+        return row["count"], row["min_starting_bid"], row["max_starting_bid"]
+
+    def test_counts_and_ranges_follow_creates_closes_and_deletes(self):
+        cheap, _, dear = self.create_listing("5.00"), self.create_listing("10.00"), self.create_listing("50.00")
+        import_listings([{"title": "Lamp", "description": "Desk lamp", "starting_bid": "2.00", "category": "HOME"}], self.owner)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.facet(), (4, Decimal("2.00"), Decimal("50.00")))
+
+        close_listing(dear.id)
+        dear.delete()  # Ya cerrada: no vuelve a restar.
+        cheap.delete()
+        self.assertEqual(self.facet(), (2, Decimal("2.00"), Decimal("10.00")))
+        self.assertEqual(self.facet("SPORTS"), (0, None, None))
+
+        response = self.client.get(reverse("auctions:categories"))
+        self.assertContains(response, "2 active")
+
+        # Un cambio que no pasa por las señales se repara con reconcile().
+        AuctionListing.objects.filter(category="HOME").update(is_active=False)
+        self.assertEqual(reconcile(check=True), [("HOME", 2, 0)])
+        reconcile()
+        self.assertEqual(self.facet(), (0, None, None))
+        self.assertEqual(reconcile(check=True), [])
+
+
+# Los contadores se actualizan con UPDATE relativos: altas y cierres concurrentes no pierden ninguna.
+class CategoryFacetConcurrencyTests(TransactionTestCase):
+    THREADS = 4
+    PER_THREAD = 20
+
+    def test_counts_stay_exact_under_concurrent_creates_and_closes(self):
+        owner = User.objects.create_user("owner")
+        closed = []
+
+        def worker(number):
+            try:
+                for n in range(self.PER_THREAD):
+                    def create(_):
+                        with transaction.atomic():
+                            return AuctionListing.objects.create(
+                                title=f"Item {number}-{n}", description="", starting_bid=Decimal(n + 1), category="SPORTS", owner=owner,
+                            )
+
+                    listing = retry_on_lock(create, retries=50)
+                    if n % 2:
+                        retry_on_lock(lambda _: close_listing(listing.id), retries=50)
+                        closed.append(listing.id)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        active = AuctionListing.objects.filter(category="SPORTS", is_active=True).count()
+        self.assertEqual(active, self.THREADS * self.PER_THREAD - len(closed))
+        self.assertEqual(self.facet_count(), active)
+        self.assertEqual(reconcile(check=True), [])
+
+    def facet_count(self):
+        return next(row["count"] for row in category_facets() if row["category"] == "SPORTS")
+
+
+# Guarda las imágenes de la prueba en un directorio temporal.
+class TemporaryMediaMixin:
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings = self.settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class BenchmarkSuiteTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+
+    def test_every_url_has_a_scenario(self):
+        self.assertEqual(uncovered_url_names(), set())
+
+    def test_every_scenario_runs_against_generated_data(self):
+        dataset = generate(SCALES["tiny"])
+        self.assertTrue(dataset.closed_ids and dataset.owned_active_ids)
+
+        report = run_client(SCENARIOS, dataset, requests=1, warmup=0)
+        self.assertEqual({name: result["errors"] for name, result in report.items() if result["errors"]}, {})
+        self.assertEqual(report["categories"]["queries"], 1)
+
+    def test_compare_reports_regressions_past_the_threshold(self):
+        baseline = {"client": {"index": {"p50": 2.0, "p95": 4.0, "p99": 5.0, "requests_per_second": 400, "queries": 2, "errors": 0}}}
+        noisy = {"client": {"index": {**baseline["client"]["index"], "p95": 4.8, "requests_per_second": 350}}}
+        self.assertEqual(compare(noisy, baseline, threshold=0.25), [])
+
+        slower = {"client": {"index": {**baseline["client"]["index"], "p95": 6.0, "queries": 3}}}
+        self.assertEqual(compare(slower, baseline, threshold=0.25), [
+            "client/index: p95 4.0 -> 6.0 ms", "client/index: queries 2 -> 3 per request",
+        ])
+
+
+class ListingImageTests(TemporaryMediaMixin, TestCase):
+    PNG = PIXEL
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+
+    def create_listing(self, **fields):
+        fields = {"title": "Camera", "description": "Old camera", "starting_bid": Decimal("1.00"), "owner": self.owner, **fields}
+        return AuctionListing.objects.create(**fields)
+
+    def test_uploads_are_stored_by_content_and_left_pending(self):
+        self.client.force_login(self.owner)
+        for title in ("First", "Second"):
+            response = self.client.post(reverse("auctions:create_listing"), {
+                "title": title, "description": "With image", "starting_bid": "5.00", "category": "HOME",
+                "upload": SimpleUploadedFile("photo.PNG", self.PNG, content_type="image/png"),
+            })
+            self.assertEqual(response.status_code, 302)
+
+        first, second = AuctionListing.objects.order_by("id")
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.endswith(".png"))
+        self.assertEqual(first.image_status, AuctionListing.IMAGE_PENDING)
+        self.assertEqual(len(os.listdir(os.path.dirname(first.image.path))), 1)
+
+    def test_rejects_unsupported_uploads(self):
+        self.client.force_login(self.owner)
+        response = self.client.post(reverse("auctions:create_listing"), {
+            "title": "Script", "description": "Not an image", "starting_bid": "5.00", "category": "HOME",
+            "upload": SimpleUploadedFile("photo.svg", b"<svg/>", content_type="image/svg+xml"),
+        })
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(reverse("auctions:create_listing"), {
+            "title": "Disguised", "description": "Not an image", "starting_bid": "5.00", "category": "HOME",
+            "upload": SimpleUploadedFile("photo.png", b"<script>alert(1)</script>", content_type="image/png"),
+        })
+        self.assertContains(response, "Upload a JPEG, PNG, GIF or WebP image.")
+        self.assertFalse(AuctionListing.objects.exists())
+
+    def test_uploads_are_stored_with_the_extension_of_their_content(self):
+        self.client.force_login(self.owner)
+        self.client.post(reverse("auctions:create_listing"), {
+            "title": "Renamed", "description": "PNG named .gif", "starting_bid": "5.00", "category": "HOME",
+            "upload": SimpleUploadedFile("photo.gif", self.PNG, content_type="image/gif"),
+        })
+        self.assertTrue(AuctionListing.objects.get().image.name.endswith(".png"))
+
+    def test_cards_use_lazy_srcset_with_placeholder_fallback(self):
+        listing = self.create_listing()
+        store_original(listing, SimpleUploadedFile("photo.png", self.PNG))
+        listing.image_status, listing.image_widths = AuctionListing.IMAGE_READY, [160, 320]
+        listing.save()
+        self.create_listing(title="No image")
+
+        response = self.client.get(reverse("auctions:index"))
+        self.assertContains(response, 'loading="lazy"', count=2)
+        self.assertContains(response, f"{thumbnail_name(listing.image.name, 160)} 160w, ")
+        self.assertContains(response, "default-image.svg", count=3)  # Dos onerror y la subasta sin imagen.
+        self.assertEqual(image_sources(listing)[0], f"/media/{thumbnail_name(listing.image.name, 320)}")
+
+    def test_media_is_served_with_immutable_cache_headers(self):
+        listing = self.create_listing()
+        store_original(listing, SimpleUploadedFile("photo.png", self.PNG))
+
+        response = self.client.get(reverse("auctions:media", args=[listing.image.name]))
+        self.assertEqual(b"".join(response.streaming_content), self.PNG)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+    @skipUnless(thumbnails.Image, "Pillow is not installed.")
+    def test_process_images_generates_thumbnails(self):
+        from PIL import Image
+
+        upload = io.BytesIO()
+        Image.new("RGB", (800, 600), "red").save(upload, "PNG")
+        listing = self.create_listing()
+        store_original(listing, SimpleUploadedFile("photo.png", upload.getvalue()))
+        listing.save()
+
+        call_command("process_images", "--workers", "1", stdout=io.StringIO())
+        listing.refresh_from_db()
+        self.assertEqual(listing.image_status, AuctionListing.IMAGE_READY)
+        self.assertEqual(listing.image_widths, [160, 320, 640])
+        with Image.open(os.path.join(self.media_root, thumbnail_name(listing.image.name, 320))) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 240))
+
+    def test_failed_originals_are_not_served(self):
+        listing = self.create_listing()
+        store_original(listing, SimpleUploadedFile("photo.png", self.PNG))
+        listing.image_status = AuctionListing.IMAGE_FAILED
+        self.assertEqual(image_sources(listing), (static("auctions/default-image.svg"), ""))
+
+    def test_remote_images_are_only_fetched_from_public_http_servers(self):
+        for url in ("file:///etc/passwd", "ftp://example.com/photo.png", "http://127.0.0.1/photo.png",
+                    "http://169.254.169.254/latest/meta-data/", "http://10.0.0.1/", "http://[::1]/", "http://[::ffff:127.0.0.1]/"):
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                images._download(url, timeout=1)
+
+    @skipUnless(thumbnails.Image, "Pillow is not installed.")
+    def test_ingest_stores_only_images(self):
+        listing = self.create_listing(image_url="https://example.com/photo.png")
+        with mock.patch.object(images._opener, "open", return_value=io.BytesIO(b'{"secret": "token"}')):
+            self.assertEqual(images.ingest_remote(workers=1), {"stored": 0, "failed": 1})
+        listing.refresh_from_db()
+        self.assertEqual((listing.image.name, listing.image_status), ("", AuctionListing.IMAGE_FAILED))
+
+
+class TaskQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.first = User.objects.create_user("first", "first@example.com", "password")
+        cls.second = User.objects.create_user("second", "second@example.com", "password")
+        cls.listing = AuctionListing.objects.create(title="Camera", description="Film camera", starting_bid=Decimal("10.00"), owner=cls.owner)
+
+    def notifications(self):
+        return sorted(Notification.objects.values_list("user__username", "kind", "amount"))
+
+    def test_bids_and_closing_notify_after_commit_through_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(self.listing.id, self.first, Decimal("15.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(self.listing.id, self.second, Decimal("20.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            close_listing(self.listing.id)
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(self.notifications(), [])
+
+        self.assertEqual(tasks.run_batch(), (3, 0))
+        self.assertEqual(self.notifications(), [
+            ("first", Notification.OUTBID, Decimal("20.00")),
+            ("owner", Notification.CLOSED, Decimal("20.00")),
+            ("second", Notification.WON, Decimal("20.00")),
+        ])
+        self.assertFalse(Task.objects.exists())
+
+    def test_outbid_notifications_are_batched_in_one_query(self):
+        bids = [place_bid(self.listing.id, bidder, Decimal(amount)) for bidder, amount in ((self.first, "11"), (self.second, "12"), (self.first, "13"))]
+        with self.assertNumQueries(2):
+            notify_outbid([{"bid": result.bid.id} for result in bids])
+        self.assertEqual(self.notifications(), [("first", Notification.OUTBID, Decimal("12.00")), ("second", Notification.OUTBID, Decimal("13.00"))])
+
+    def test_users_see_their_notifications_and_unread_count(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.first, listing=self.listing, kind=Notification.OUTBID, amount=Decimal("20.00")),
+            Notification(user=self.second, listing=self.listing, kind=Notification.WON, amount=Decimal("20.00")),
+        ])
+        self.client.force_login(self.first)
+        self.assertContains(self.client.get(reverse("auctions:index")), "Notifications (1)")
+        response = self.client.get(reverse("auctions:notifications"))
+        self.assertContains(response, "You were outbid on")
+        self.assertNotContains(response, "You won")
+
+        self.client.post(reverse("auctions:notifications_read"))
+        self.assertContains(self.client.get(reverse("auctions:index")), "Notifications</a>")
+        self.assertEqual(Notification.objects.filter(read_at=None).count(), 1)
+
+    def test_dedup_keys_ignore_tasks_already_queued(self):
+        for _ in range(2):
+            tasks.enqueue("notify_closed", [{"listing": self.listing.id}], key=lambda payload: f"closed:{payload['listing']}")
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failures_retry_with_backoff_until_max_attempts(self):
+        def broken(payload):
+            raise RuntimeError("boom")
+
+        with mock.patch.dict(tasks.TASKS, {"broken": tasks.Handler(broken, max_attempts=2)}):
+            tasks.enqueue("broken", [{}], key=lambda payload: "broken")
+            with self.assertLogs("auctions.tasks", "ERROR"):
+                self.assertEqual(tasks.run_batch(), (0, 1))
+            task = Task.objects.get()
+            self.assertEqual((task.status, task.attempts), (Task.QUEUED, 1))
+            self.assertGreater(task.run_after, timezone.now())
+            self.assertIn("boom", task.last_error)
+            self.assertEqual(tasks.run_batch(), (0, 0))  # Aún no ha vencido la espera.
+
+            Task.objects.update(run_after=timezone.now())
+            with self.assertLogs("auctions.tasks", "ERROR"):
+                self.assertEqual(tasks.run_batch(), (0, 1))
+            task.refresh_from_db()
+            self.assertEqual((task.status, task.attempts, task.dedup_key), (Task.FAILED, 2, None))
+
+
+class TaskWorkerConcurrencyTests(TransactionTestCase):
+    def test_concurrent_workers_run_each_task_once(self):
+        seen = []
+        lock = threading.Lock()
+
+        def record(payloads):
+            with lock:
+                seen.extend(payload["n"] for payload in payloads)
+
+        with mock.patch.dict(tasks.TASKS, {"record": tasks.Handler(record, batch=True)}):
+            tasks.enqueue("record", [{"n": n} for n in range(300)])
+            totals = tasks.work(concurrency=4, batch_size=25, poll_interval=0.01, burst=True)
+        self.assertEqual(totals, {"done": 300, "failed": 0})
+        self.assertEqual(sorted(seen), list(range(300)))
+        self.assertFalse(Task.objects.exists())
+
+
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.listing = AuctionListing.objects.create(title="Camera", description="Film camera", starting_bid=Decimal("10.00"), owner=cls.owner)
+
+    def setUp(self):
+        get_ratelimit_backend().reset()
+
+    def test_token_bucket_allows_bursts_then_refills_at_rate(self):
+        backend = MemoryBackend()
+        self.assertEqual([backend.consume("client", 1.0, 2, now=0)[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(backend.consume("client", 1.0, 2, now=0), (False, 1.0))
+        self.assertEqual(backend.consume("client", 1.0, 2, now=1.5), (True, 0.0))
+        self.assertTrue(backend.consume("other", 1.0, 2, now=1.5)[0])
+
+    @override_settings(AUCTIONS_RATELIMITS={"auctions:listing_detail": {"rate": 0.01, "burst": 2}})
+    def test_middleware_rejects_clients_over_their_limit(self):
+        url = reverse("auctions:listing_detail", args=[self.listing.id])
+        self.assertEqual([self.client.get(url).status_code for _ in range(3)], [200, 200, 429])
+        response = self.client.get(url)
+        self.assertEqual(int(response["Retry-After"]), 100)
+
+        self.client.force_login(self.owner)  # Otro cliente: su propio cubo.
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(reverse("auctions:categories")).status_code, 200)
+
+    def test_single_flight_shares_one_call_between_concurrent_callers(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "page"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do("key", slow)))
+        leader.start()
+        while not calls:
+            time.sleep(0.001)
+        followers = [threading.Thread(target=lambda: results.append(flights.do("key", slow))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in (leader, *followers):
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("page", False), ("page", True), ("page", True), ("page", True)])
+        self.assertEqual(flights.do("key", lambda: "fresh"), ("fresh", False))
+
+
+class AuthenticationTests(TestCase):
+    @override_settings(AUCTIONS_PBKDF2_ITERATIONS=1000)
+    def setUp(self):
+        self.user = User.objects.create_user("bidder", "bidder@example.com", "secret-password")
+
+    @override_settings(AUCTIONS_PBKDF2_ITERATIONS=2000)
+    def test_login_rehashes_passwords_stored_with_another_cost(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+        response = self.client.post(reverse("auctions:login"), {"username": "bidder", "password": "secret-password"})
+        self.assertRedirects(response, reverse("auctions:index"))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(self.user.check_password("secret-password"))
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions_never_touch_the_session_table(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("auctions:watchlist_store"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if "django_session" in query["sql"]])
+
+    def test_bid_messages_are_stored_in_a_cookie(self):
+        listing = AuctionListing.objects.create(title="Camera", description="Film camera", starting_bid=Decimal("10.00"), owner=self.user)
+        self.client.force_login(User.objects.create_user("other", password="secret-password"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("auctions:bid", args=[listing.id]), {"new_bid": "5.00"})
+        self.assertIn("messages", response.cookies)
+        self.assertFalse([query for query in queries if query["sql"].startswith(("UPDATE \"django_session\"", "INSERT INTO \"django_session\""))])
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = {**settings.STORAGES, "staticfiles": {"BACKEND": settings.STATIC_STORAGES["manifest"]}}
+        static_settings = self.settings(STATIC_ROOT=root.name, STORAGES=storages)
+        static_settings.enable()
+        self.addCleanup(static_settings.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.url = static("auctions/styles.css")
+        with open(os.path.join(root.name, "auctions", "styles.css"), "rb") as source:
+            self.content = source.read()
+
+    def get(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_hashed_files_are_served_gzipped_and_immutable(self):
+        self.assertRegex(self.url, r"^/static/auctions/styles\.[0-9a-f]{12}\.css$")
+        response, body = self.get(self.url, accept_encoding="gzip, deflate")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(gzip.decompress(body), self.content)
+
+        response, body = self.get(self.url, accept_encoding="gzip;q=0")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(body, self.content)
+
+    def test_unhashed_names_are_revalidated(self):
+        response, _ = self.get("/static/auctions/styles.css")
+        self.assertEqual(response["Cache-Control"], f"public, max-age={settings.AUCTIONS_STATIC_MAX_AGE}")
+        response, body = self.get("/static/auctions/styles.css", if_none_match=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b"")
+
+    def test_range_requests(self):
+        response, body = self.get(self.url, range="bytes=10-19", accept_encoding="gzip")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(body, self.content[10:20])
+
+        response, body = self.get(self.url, range="bytes=-5")
+        self.assertEqual(body, self.content[-5:])
+
+        response, _ = self.get(self.url, range=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+        # If-Range con otra versión: se sirve el archivo completo.
+        response, body = self.get(self.url, range="bytes=10-19", if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+    def test_missing_files_fall_through_to_the_urlconf(self):
+        self.assertEqual(self.client.get("/static/auctions/missing.css").status_code, 404)
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+    @skipUnless(staticfiles.brotli, "brotli is not installed.")
+    def test_brotli_is_preferred(self):
+        response, body = self.get(self.url, accept_encoding="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(staticfiles.brotli.decompress(body), self.content)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.owner = User.objects.create_user("owner", password="secret-password")
+        self.winner = User.objects.create_user("winner", password="secret-password")
+        self.old = [self.closed_listing(f"Old camera {n}", days_ago=100) for n in range(3)]
+        self.recent = self.closed_listing("Recent lamp", days_ago=5)
+
+    # Subasta con una oferta y un comentario, cerrada hace `days_ago` días y ganada por self.winner.
+    def closed_listing(self, title, days_ago):
+        listing = AuctionListing.objects.create(title=title, description=f"{title} description", starting_bid=Decimal("10.00"), owner=self.owner)
+        place_bid(listing.id, self.winner, Decimal("12.00"))
+        Comment.objects.create(commenter=self.winner, listing=listing, content="Nice")
+        self.winner.watchlist.add(listing)
+        close_listing(listing.id)
+        AuctionListing.objects.filter(id=listing.id).update(closed_at=timezone.now() - timedelta(days=days_ago))
+        return listing
+
+    def test_moves_old_closed_listings_with_their_bids_and_comments(self):
+        archived, _ = archive_closed(days=30, batch_size=2)
+        self.assertEqual(archived, 3)
+        old_ids = [listing.id for listing in self.old]
+        self.assertFalse(AuctionListing.objects.filter(id__in=old_ids).exists())
+        self.assertFalse(Bid.objects.filter(listing_id__in=old_ids).exists())
+        self.assertFalse(self.winner.watchlist.filter(id__in=old_ids).exists())
+        self.assertTrue(AuctionListing.objects.filter(id=self.recent.id).exists())
+
+        listing = ArchivedListing.objects.get(id=self.old[0].id)
+        self.assertEqual((listing.winner, listing.winning_bid, listing.bid_count, listing.comment_count), (self.winner, Decimal("12.00"), 1, 1))
+        self.assertEqual(ArchivedBid.objects.filter(listing_id__in=old_ids).count(), 3)
+        self.assertEqual(ArchivedComment.objects.filter(listing_id__in=old_ids).count(), 3)
+        self.assertEqual(search_listings("camera", active_only=False), [])
+
+    def test_is_resumable_batch_by_batch(self):
+        self.assertEqual(archive_closed(days=30, batch_size=2, max_batches=1)[0], 2)
+        self.assertEqual(archive_closed(days=30, batch_size=2)[0], 1)
+        self.assertEqual(archive_closed(days=30)[0], 0)
+        self.assertEqual(ArchivedListing.objects.count(), 3)
+
+    def test_archived_listings_stay_readable(self):
+        url = reverse("auctions:listing_detail", args=[self.old[0].id])
+        self.client.get(url)  # Deja el detalle en caché: archivar debe invalidarlo.
+        call_command("archive_auctions", days=30, stdout=io.StringIO())
+
+        response = self.client.get(url)
+        self.assertContains(response, "Old camera 0")
+        self.assertContains(response, "Winner: winner")
+        self.assertEqual(self.client.get(reverse("auctions:listing_detail", args=[999999])).status_code, 404)
+
+        self.client.force_login(self.winner)
+        response = self.client.get(reverse("auctions:index"))
+        self.assertContains(response, "Old camera 2")
+        self.assertContains(response, "Recent lamp")
+
+
+class ListingCardTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.owner = User.objects.create_user("owner", password="secret-password")
+
+    def test_card_rows_are_computed_in_the_query(self):
+        descriptions = ["Short description", "ñ" * 140, "Long description " * 20]
+        for n, description in enumerate(descriptions):
+            AuctionListing.objects.create(title=f"Listing {n}", description=description, starting_bid=Decimal("5.00"), category="HOME", owner=self.owner)
+        rows = list(AuctionListing.objects.card_rows().order_by("id"))
+        self.assertEqual([row["summary"] for row in rows], [truncatechars(description, 140) for description in descriptions])
+        self.assertEqual((rows[0]["category_label"], rows[0]["owner_username"]), ("Home", "owner"))
+
+    def test_index_renders_active_and_won_cards(self):
+        bidder = User.objects.create_user("bidder", password="secret-password")
+        active = AuctionListing.objects.create(title="Lamp", description="Desk lamp", starting_bid=Decimal("5.00"), category="HOME", owner=self.owner)
+        won = AuctionListing.objects.create(title="Chair", description="Old chair", starting_bid=Decimal("8.00"), owner=self.owner)
+        place_bid(active.id, bidder, Decimal("6.00"))
+        place_bid(won.id, bidder, Decimal("9.00"))
+        close_listing(won.id)
+
+        self.client.force_login(bidder)
+        response = self.client.get(reverse("auctions:index"))
+        self.assertContains(response, "Current price: $6.00 (1 bid)")
+        self.assertContains(response, "Category: Home")
+        self.assertContains(response, "Winning bid: $9.00")
+        self.assertContains(response, static("auctions/default-image.svg"))
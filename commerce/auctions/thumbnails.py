@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él las imágenes se guardan pero no se generan miniaturas.
+    Image = ImageOps = None
+
+# Trabajo de los procesos que generan miniaturas. No usa Django (solo Pillow y rutas de archivo) para
+# que los procesos arranquen con "spawn" sin configurar Django ni abrir conexiones a la base de datos.
+
+JPEG_OPTIONS = {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}
+MAX_PIXELS = 50_000_000  # Imágenes mayores se rechazan en vez de descomprimirlas en memoria.
+
+
+# Genera una miniatura JPEG por cada ancho de `targets` ({ancho: ruta}) y devuelve los anchos
+# generados, de menor a mayor. No amplía imágenes: los anchos mayores que el original se omiten,
+# salvo el menor, para que siempre haya al menos una miniatura.
+def make_thumbnails(source, targets):
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    widths = sorted(targets, reverse=True)
+    with Image.open(source) as image:
+        # En JPEG, draft() decodifica directamente a una escala reducida: menos memoria y CPU.
+        image.draft("RGB", (widths[0], widths[0] * 4))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        made = []
+        for width in widths:
+            if width > image.width and width != widths[-1]:
+                continue
+            if width < image.width:
+                # Cada tamaño se reduce desde el anterior, que ya es más pequeño que el original.
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            _save_atomically(image, targets[width])
+            made.append(width)
+    return sorted(made)
+
+
+# Escribe en un archivo temporal del mismo directorio y lo renombra: un lector nunca ve un archivo a medias.
+def _save_atomically(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            image.save(file, **JPEG_OPTIONS)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
@@ -1,6 +1,6 @@
-from django.urls import path
+from django.urls import include, path
 
-from . import views
+from . import api, views
 
 app_name = 'auctions'
 
@@ -11,13 +11,26 @@ urlpatterns = [
     path("register", views.register, name="register"),
     path("create_listing", views.create_listing, name="create_listing"),
     path("listing/<int:listing_id>/", views.listing_detail, name="listing_detail"),
+    path("listing/<int:listing_id>/comments", views.listing_comments, name="listing_comments"),
+    path("listing/<int:listing_id>/events", views.listing_events, name="listing_events"),
     path("watchlist/<int:listing_id>/", views.watchlist, name="watchlist"),
+    path("watchlist/bulk", views.watchlist_bulk, name="watchlist_bulk"),
     path("bid/<int:listing_id>/", views.bid, name="bid"),
     path("close_auction/<int:listing_id>/", views.close_auction, name="close_auction"),
     path("comment/<int:listing_id>/", views.comment, name="comment"),
     path("watchlist_store", views.watchlist_store, name="watchlist_store"),
+    path("notifications", views.notifications, name="notifications"),
+    path("notifications/read", views.notifications_read, name="notifications_read"),
     path("categories/", views.categories, name="categories"),
     path("categories/<str:category_name>/", views.category_listings, name="category_listings"),
+    path("search", views.search, name="search"),
+    path("search/suggest", views.search_suggest, name="search_suggest"),
+    path("import/listings", views.bulk_import, name="bulk_import"),
+    path("export/<str:kind>.<str:format>", views.bulk_export, name="bulk_export"),
+    path("api/v1/", include((api.urlpatterns, "api"))),
+    path("media/<path:path>", views.media, name="media"),
+    path("metrics", views.metrics, name="metrics"),
+    path("metrics/cache", views.cache_metrics, name="cache_metrics"),
 ]
 
     
\ No newline at end of file
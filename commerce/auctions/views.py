@@ -1,22 +1,46 @@
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
-from django.http import HttpResponse, HttpResponseRedirect
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from django.views.decorators.http import require_GET, require_POST
 from django.urls import reverse
+from .bidding import BidResult, close_listing, place_bid
+from .bulk import EXPORTS, FORMATS, check_utf8, export_chunks, format_from_name, import_listings, read_rows
+from .cache import DETAIL, detail_key, get_or_compute, stats as cache_stats
+from .facets import category_facets
 from .forms import ListingForm
-from .models import User, AuctionListing, Bid, Comment
+from .images import store_original
+from .metrics import get_registry as get_metrics_registry
+from .models import User, ArchivedListing, AuctionListing, Bid, Comment
+from .pagination import paginate, paginate_request
+from .search import search_listings
+from .singleflight import SingleFlight
+from .streaming import format_sse, get_broker, listing_channel
+from .watchlist import MAX_BULK_IDS, is_watching, toggle, unwatch, watch
 from decimal import Decimal
+import json
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
 
 # Vista para la página principal que muestra las subastas activas.
 def index(request):
     # Obtén todas las subastas activas
-    active_listings = AuctionListing.objects.filter(is_active=True)
+    active_listings = paginate_request(request, AuctionListing.objects.card_rows().filter(is_active=True))  # Página actual por cursor.
 
-    # Si el usuario está autenticado, también obtén las subastas ganadas por el usuario
+    # Si el usuario está autenticado, también obtén las subastas ganadas por el usuario, incluidas las archivadas
     if request.user.is_authenticated:
-        won_listings = AuctionListing.objects.filter(winner=request.user)
+        won_listings = [
+            *AuctionListing.objects.card_rows().filter(winner=request.user),
+            *ArchivedListing.objects.card_rows().filter(winner=request.user),
+        ]
     else:
         won_listings = []
 
@@ -30,7 +54,7 @@ def login_view(request):
         # Intentar autenticar al usuario
         username = request.POST["username"]
         password = request.POST["password"]
-        user = authenticate(request, username=username, password=password)
+        user = authenticate(request, username=username, password=password)  # Recalcula el hash si cambió el coste (ver auctions/hashers.py).
 
         # Verificar si la autenticación fue exitosa
         if user is not None:
@@ -64,8 +88,7 @@ def register(request):
 
         # Intentar crear un nuevo usuario.
         try:
-            user = User.objects.create_user(username, email, password)
-            user.save()
+            user = User.objects.create_user(username, email, password)  # create_user ya guarda el usuario.
         except IntegrityError:
             return render(request, "auctions/register.html", {
                 "message": "Username already taken."
@@ -79,11 +102,13 @@ def register(request):
 @login_required
 def create_listing(request):
     if request.method == "POST":
-        form = ListingForm(request.POST)  # Formulario de subasta creado por el usuario.
+        form = ListingForm(request.POST, request.FILES)  # Formulario de subasta creado por el usuario.
         if form.is_valid():
             listing = form.save(commit=False)
             listing.owner = request.user  # Asigna al usuario actual como propietario.
             listing.is_active = True  # Marca la subasta como activa.
+            if form.cleaned_data["upload"]:
+                store_original(listing, form.cleaned_data["upload"])  # Las miniaturas las genera process_images.
             listing.save()
             return redirect("auctions:index")
     else:
@@ -93,53 +118,133 @@ def create_listing(request):
         "form": form
     })
 
+# Agrupa las peticiones simultáneas idénticas del detalle de una subasta (ver auctions/singleflight.py).
+flights = SingleFlight()
+
+# Modelo de lectura del detalle de una subasta: la subasta con propietario y ganador y la primera página
+# de sus comentarios (una consulta, haya los que haya; el resto se carga con listing_comments).
+# Se guarda en caché hasta que una señal de Bid, Comment o AuctionListing lo invalida. Una subasta que ya
+# no está en AuctionListing se busca en el archivo (ver auctions/archive.py); como está cerrada, su
+# detalle no muestra comentarios.
+def load_listing_detail(listing_id):
+    def compute():
+        listing = AuctionListing.objects.select_related("owner", "winner").filter(id=listing_id).first()
+        if listing is None:
+            archived = get_object_or_404(ArchivedListing.objects.select_related("owner", "winner"), id=listing_id)  # Mostrar error 404 si no existe.
+            return {"listing": archived, "comments": []}
+        comments = paginate(Comment.objects.rows(listing_id), page_size=settings.AUCTIONS_COMMENTS_PAGE_SIZE, ordering=Comment.PAGE_ORDERING)
+        return {"listing": listing, "comments": comments}
+
+    # Tras una invalidación, las peticiones simultáneas de la misma subasta esperan a un único cálculo.
+    if not settings.AUCTIONS_SINGLE_FLIGHT:
+        return get_or_compute(DETAIL, detail_key(listing_id), compute)
+    detail, _ = flights.do((DETAIL, listing_id), lambda: get_or_compute(DETAIL, detail_key(listing_id), compute))
+    return detail
+
+# Indica si la respuesta no depende de quién la pide: un visitante anónimo sin sesión ni mensajes pendientes.
+def is_shareable_request(request):
+    return (
+        not request.user.is_authenticated
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
 # Vista para mostrar los detalles de una subasta específica.
+# Las visitas anónimas simultáneas a la misma URL comparten una única respuesta renderizada: cuando una
+# subasta está a punto de cerrarse, cientos de recargas por segundo se resuelven con un solo render.
 def listing_detail(request, listing_id):
     if request.method == "GET":
-        listing = get_object_or_404(AuctionListing, id=listing_id)  # Obtener la subasta o mostrar error 404 si no existe.
-        current_highest_bid = listing.bids.order_by('-amount').first()  # Obtener la oferta más alta.
-        is_in_watchlist = request.user.is_authenticated and listing in request.user.watchlist.all()  # Verifica si está en la lista de seguimiento del usuario.
-
-        # Obtener todos los comentarios asociados a la subasta.
-        comments = Comment.objects.filter(listing=listing)
+        if not settings.AUCTIONS_SINGLE_FLIGHT or not is_shareable_request(request):
+            return render_listing_detail(request, listing_id)
+        response, shared = flights.do(("page", request.get_full_path()), lambda: render_listing_detail(request, listing_id))
+        if shared:
+            response = HttpResponse(response.content, status=response.status_code, headers=dict(response.items()))
+        return response
+
+def render_listing_detail(request, listing_id):
+    detail = load_listing_detail(listing_id)
+    listing = detail["listing"]
+    is_in_watchlist = is_watching(request.user, listing.id)  # Consulta indexada a la tabla intermedia, sin cargar la lista.
+
+    return render(request, "auctions/listing_detail.html", {
+        "listing": listing,
+        "is_in_watchlist": is_in_watchlist,
+        "current_highest_bid": listing.display_price,  # Precio desnormalizado, sin ordenar las ofertas.
+        "comments": detail["comments"],  # Primera página de comentarios de la subasta.
+        "live_events": settings.AUCTIONS_EVENTS_STREAMING,  # EventSource solo si se sirve por ASGI.
+    })
 
-        return render(request, "auctions/listing_detail.html", {
-            "listing": listing,
-            "is_in_watchlist": is_in_watchlist,
-            "current_highest_bid": current_highest_bid.amount if current_highest_bid else listing.starting_bid,
-            "comments": comments  # Pasa los comentarios como queryset.
-        })
+# Vista con una página de comentarios de una subasta, como fragmento HTML que el detalle añade al pulsar
+# "Load more comments". Cada página es una búsqueda por rango en comment_listing_time_idx.
+@require_GET
+def listing_comments(request, listing_id):
+    comments = paginate_request(request, Comment.objects.rows(listing_id), Comment.PAGE_ORDERING, settings.AUCTIONS_COMMENTS_PAGE_SIZE)
+    # Solo una primera página vacía necesita comprobar que la subasta existe.
+    if not comments and not request.GET.get("cursor"):
+        get_object_or_404(AuctionListing.objects.only("id"), id=listing_id)
+
+    return render(request, "auctions/comments.html", {
+        "listing_id": listing_id,
+        "comments": comments,
+    })
 
 # Vista para agregar o remover una subasta a/de la lista de seguimiento del usuario.
+# Con action=watch o action=unwatch es idempotente (reenviar el formulario no deshace el cambio);
+# sin action alterna el estado actual.
 @login_required
 def watchlist(request, listing_id):
-    listing = get_object_or_404(AuctionListing, id=listing_id)  # Obtener la subasta o mostrar error 404 si no existe.
+    get_object_or_404(AuctionListing.objects.only("id"), id=listing_id)  # Mostrar error 404 si la subasta no existe.
 
-    if listing in request.user.watchlist.all():
-        request.user.watchlist.remove(listing)  # Remover de la lista de seguimiento si ya está añadida.
+    action = request.POST.get("action")
+    if action == "watch":
+        watch(request.user, [listing_id])  # Agregar a la lista de seguimiento si no está añadida.
+    elif action == "unwatch":
+        unwatch(request.user, [listing_id])  # Remover de la lista de seguimiento si ya está añadida.
     else:
-        request.user.watchlist.add(listing)  # Agregar a la lista de seguimiento si no está añadida.
+        toggle(request.user, listing_id)
 
     return redirect('auctions:listing_detail', listing_id=listing_id)
 
+# Vista para seguir o dejar de seguir muchas subastas a la vez. Recibe JSON {"watch": [ids], "unwatch": [ids]}
+# y responde con cuántas subastas sigue el usuario.
+@login_required
+@require_POST
+def watchlist_bulk(request):
+    try:
+        payload = json.loads(request.body)
+        watch_ids, unwatch_ids = payload.get("watch", []), payload.get("unwatch", [])
+    except (ValueError, AttributeError):
+        watch_ids = unwatch_ids = None
+    # Solo listas de enteros: una cadena como "123" no debe leerse como los ids 1, 2 y 3.
+    if not all(isinstance(ids, list) and all(type(listing_id) is int for listing_id in ids) for ids in (watch_ids, unwatch_ids)):
+        return JsonResponse({"error": "Send a JSON object with 'watch' and/or 'unwatch' lists of listing ids."}, status=400)
+    if len(watch_ids) + len(unwatch_ids) > MAX_BULK_IDS:
+        return JsonResponse({"error": f"At most {MAX_BULK_IDS} listing ids per request."}, status=400)
+
+    with transaction.atomic():
+        watch(request.user, watch_ids)
+        unwatch(request.user, unwatch_ids)
+    return JsonResponse({"watching": request.user.watchlist.count()})
+
 # Vista para realizar una oferta en una subasta.
 @login_required
 def bid(request, listing_id):
-    listing = get_object_or_404(AuctionListing, id=listing_id)  # Obtener la subasta o mostrar error 404 si no existe.
+    get_object_or_404(AuctionListing, id=listing_id)  # Mostrar error 404 si la subasta no existe.
 
     if request.method == "POST":
         new_bid_amount = Decimal(request.POST["new_bid"])  # Obtener el monto de la nueva oferta.
-        current_highest_bid = listing.bids.order_by('-amount').first()  # Obtener la oferta más alta si existe.
+        result = place_bid(listing_id, request.user, new_bid_amount)  # Compare-and-set atómico sobre el precio actual.
 
-        if new_bid_amount < listing.starting_bid:  # Verificar que la oferta sea mayor o igual a la oferta inicial.
+        if result.status == BidResult.BELOW_STARTING_BID:  # La oferta debe ser mayor o igual a la oferta inicial.
             messages.error(request, "Your bid must be at least as large as the starting bid.")
 
-        elif current_highest_bid and new_bid_amount <= current_highest_bid.amount:  # Verificar que la oferta sea mayor a la oferta más alta.
+        elif result.status == BidResult.OUTBID:  # La oferta debe ser mayor a la oferta más alta.
             messages.error(request, "Your bid must be greater than the current highest bid.")
 
+        elif result.status == BidResult.CLOSED:  # No se aceptan ofertas en subastas cerradas.
+            messages.error(request, "This auction is closed.")
+
         else:
-            new_bid = Bid(bidder=request.user, listing=listing, amount=new_bid_amount)  # Crear y guardar la nueva oferta.
-            new_bid.save()
             messages.success(request, "Your bid has been placed successfully!")
 
         return redirect("auctions:listing_detail", listing_id=listing_id)
@@ -150,13 +255,7 @@ def close_auction(request, listing_id):
     listing = get_object_or_404(AuctionListing, id=listing_id)  # Obtener la subasta o mostrar error 404 si no existe.
 
     if request.user == listing.owner and listing.is_active:  # Verificar que el usuario actual sea el propietario y la subasta esté activa.
-        highest_bid = listing.bids.order_by("-amount").first()  # Obtener la oferta más alta.
-
-        if highest_bid:
-            listing.winner = highest_bid.bidder  # Asignar el ganador como el usuario con la oferta más alta.
-            listing.winning_bid = highest_bid.amount  # Asignar la oferta ganadora.
-        listing.is_active = False  # Marcar la subasta como inactiva.
-        listing.save()
+        close_listing(listing.id)  # Asignar ganador y oferta ganadora desde la oferta más alta y marcar la subasta como inactiva.
 
         return redirect('auctions:listing_detail', listing_id=listing_id)
 
@@ -175,15 +274,33 @@ def comment(request, listing_id):
 # Vista para mostrar todas las subastas en la lista de seguimiento del usuario.
 @login_required
 def watchlist_store(request):
-    all_watchlists = request.user.watchlist.all()  # Obtener todas las subastas en la lista de seguimiento del usuario.
+    all_watchlists = paginate_request(request, request.user.watchlist.only("id", "title", "starting_bid", "current_price", "is_active"))  # Página actual con los precios al día, en una consulta.
 
     return render(request, "auctions/watchlist.html", {
         "all_watchlists": all_watchlists,
     })
 
+# Vista con los avisos del usuario (ofertas superadas, subastas ganadas y cerradas), los más recientes
+# primero; los no leídos se marcan en la lista.
+@login_required
+def notifications(request):
+    notifications = request.user.notifications.select_related("listing").only(
+        "id", "kind", "amount", "created_at", "read_at", "listing__id", "listing__title",
+    )
+    return render(request, "auctions/notifications.html", {
+        "notifications": paginate_request(request, notifications, ("-created_at", "-id")),
+    })
+
+# Vista para marcar como leídos todos los avisos del usuario.
+@login_required
+@require_POST
+def notifications_read(request):
+    request.user.notifications.filter(read_at=None).update(read_at=timezone.now())
+    return redirect("auctions:notifications")
+
 # Vista para mostrar todas las categorías disponibles.
 def categories(request):
-    categories = [choice[0] for choice in AuctionListing.CATEGORY_CHOICES]  # Obtener todas las categorías posibles.
+    categories = category_facets()  # Número de subastas activas y rango de precios, de la tabla de contadores.
 
     return render(request, "auctions/categories.html", {
         "categories": categories
@@ -191,9 +308,165 @@ def categories(request):
 
 # Vista para mostrar todas las subastas activas en una categoría específica.
 def category_listings(request, category_name):
-    listings = AuctionListing.objects.filter(category=category_name, is_active=True)  # Filtrar las subastas activas por categoría.
+    listings = AuctionListing.objects.filter(category=category_name, is_active=True).only("id", "title", "starting_bid", "current_price")  # Filtrar las subastas activas por categoría.
+    listings = paginate_request(request, listings)  # Página actual por cursor.
 
     return render(request, "auctions/category_listings.html", {
         "category_name": category_name,
         "listings": listings
     })
+
+# Vista asíncrona que envía por Server-Sent Events las nuevas ofertas y el cierre de una subasta.
+# El primer evento es el estado actual; después se envía un comentario cada AUCTIONS_EVENTS_KEEPALIVE
+# segundos sin eventos para mantener viva la conexión. El stream termina cuando la subasta se cierra.
+# Sin AUCTIONS_EVENTS_STREAMING o por WSGI la respuesta es solo el estado actual con una pausa de
+# reconexión (retry), sin mantener la conexión: el handler WSGI no envía nada hasta que el stream termina.
+async def listing_events(request, listing_id):
+    live = settings.AUCTIONS_EVENTS_STREAMING and isinstance(request, ASGIRequest)
+    subscription = get_broker().subscribe(listing_channel(listing_id)) if live else None  # Suscribirse antes de leer el estado para no perder eventos.
+    snapshot = await AuctionListing.objects.filter(id=listing_id).values(
+        "is_active", "current_price", "starting_bid", "bid_count", "winning_bid", "winner__username"
+    ).afirst()
+    if snapshot is None:
+        if subscription is not None:
+            subscription.close()
+        raise Http404("No AuctionListing matches the given query.")
+    state = format_sse({
+        "type": "state" if snapshot["is_active"] else "closed",
+        "listing_id": listing_id,
+        "price": snapshot["current_price"] if snapshot["current_price"] is not None else snapshot["starting_bid"],
+        "bid_count": snapshot["bid_count"],
+        "winning_bid": snapshot["winning_bid"],
+        "winner": snapshot["winner__username"],
+    })
+
+    async def stream():
+        try:
+            yield state
+            if not snapshot["is_active"]:
+                return
+            while True:
+                event = await subscription.get(timeout=settings.AUCTIONS_EVENTS_KEEPALIVE)
+                if subscription.closed:
+                    return  # Cliente demasiado lento: se desconecta y el navegador se reconecta con el estado actual.
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+                if event["type"] == "closed":
+                    return
+        finally:
+            subscription.close()
+
+    if live:
+        response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    else:
+        response = HttpResponse(f"retry: {settings.AUCTIONS_EVENTS_RETRY * 1000}\n\n{state}", content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+# Vista para importar en bloque subastas del usuario desde un archivo CSV o JSON Lines (campo "file").
+# El archivo se lee línea a línea; responde con el número de subastas creadas y los errores por fila.
+@login_required
+@require_POST
+def bulk_import(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"error": "Upload a CSV or JSON Lines file in the 'file' field."}, status=400)
+    format = request.POST.get("format") or format_from_name(upload.name)
+    if format not in FORMATS:
+        return JsonResponse({"error": f"Unsupported format '{format}'."}, status=400)
+
+    try:
+        check_utf8(upload)
+    except UnicodeDecodeError:
+        return JsonResponse({"error": "The file must be UTF-8 encoded."}, status=400)
+
+    lines = (line.decode("utf-8-sig") for line in upload)
+    result = import_listings(read_rows(lines, format), request.user)
+    return JsonResponse({
+        "created": result.created,
+        "failed": result.failed,
+        "errors": [{"row": number, "errors": errors} for number, errors in result.errors],
+    }, status=200 if result.created or not result.failed else 400)
+
+# Vista para exportar las subastas del usuario, o las ofertas y comentarios recibidos en ellas.
+# La respuesta se genera por bloques mientras se lee la base de datos.
+@login_required
+def bulk_export(request, kind, format):
+    if kind not in EXPORTS or format not in FORMATS:
+        raise Http404("Unknown export.")
+    if kind == "listings":
+        queryset = AuctionListing.objects.filter(owner=request.user)
+    elif kind == "bids":
+        queryset = Bid.objects.filter(listing__owner=request.user)
+    else:
+        queryset = Comment.objects.filter(listing__owner=request.user)
+
+    content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(export_chunks(kind, format, queryset), content_type=f"{content_type}; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{format}"'
+    return response
+
+# Vista que sirve las imágenes guardadas (originales y miniaturas). Sus nombres dependen del contenido,
+# así que el navegador puede cachearlas un año sin revalidar. En producción las sirve el servidor web
+# con las mismas cabeceras.
+def media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
+
+# Contadores de aciertos y fallos de la caché de este proceso, como líneas de texto de Prometheus.
+def cache_metric_lines():
+    counters = cache_stats()
+    lines = []
+    for name, values in (("hits", counters["hits"]), ("misses", counters["misses"])):
+        lines.append(f"# HELP auctions_cache_{name}_total Cache {name} by entry kind.")
+        lines.append(f"# TYPE auctions_cache_{name}_total counter")
+        lines.extend(f'auctions_cache_{name}_total{{kind="{kind}"}} {count}' for kind, count in sorted(values.items()))
+    return lines
+
+# Las métricas solo se muestran a usuarios staff y a las IP de AUCTIONS_METRICS_ALLOWED_IPS; para el
+# resto las URLs no existen.
+def check_metrics_access(request):
+    if not (request.user.is_staff or request.META.get("REMOTE_ADDR") in settings.AUCTIONS_METRICS_ALLOWED_IPS):
+        raise Http404
+
+# Vista con los contadores de aciertos y fallos de la caché de este proceso, en formato de texto de Prometheus.
+def cache_metrics(request):
+    check_metrics_access(request)
+    return HttpResponse("\n".join(cache_metric_lines()) + "\n", content_type="text/plain; version=0.0.4")
+
+# Vista con todas las métricas de este proceso en formato Prometheus: latencia, SQL, plantillas y bytes
+# por vista (ver auctions/metrics.py) y los contadores de la caché.
+def metrics(request):
+    check_metrics_access(request)
+    lines = [*get_metrics_registry().prometheus_lines(), *cache_metric_lines()]
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4")
+
+# Vista para buscar subastas por título y descripción, ordenadas por relevancia (BM25).
+def search(request):
+    query = request.GET.get("q", "").strip()
+    category = request.GET.get("category") or None
+    active_only = request.GET.get("include_closed") != "1"
+
+    results = search_listings(query, category=category, active_only=active_only, limit=50)
+    listings = AuctionListing.objects.only("id", "title", "starting_bid", "current_price", "is_active").in_bulk([listing_id for listing_id, _ in results])  # Una consulta para todas las subastas encontradas.
+
+    return render(request, "auctions/search.html", {
+        "query": query,
+        "category": category,
+        "include_closed": not active_only,
+        "categories": AuctionListing.CATEGORY_CHOICES,
+        "listings": [listings[listing_id] for listing_id, _ in results if listing_id in listings],
+    })
+
+# Vista de autocompletado: subastas activas cuyo título o descripción contiene palabras que empiezan por lo escrito.
+def search_suggest(request):
+    results = search_listings(request.GET.get("q", ""), category=request.GET.get("category") or None, prefix=True, limit=10)
+    titles = dict(AuctionListing.objects.filter(id__in=[listing_id for listing_id, _ in results]).values_list("id", "title"))
+
+    return JsonResponse({
+        "results": [{"id": listing_id, "title": titles[listing_id]} for listing_id, _ in results if listing_id in titles],
+    })
@@ -0,0 +1,45 @@
+from django.db import transaction
+
+from .models import AuctionListing, User
+
+# Tabla intermedia de User.watchlist: una fila (user_id, auctionlisting_id) por subasta seguida, con un
+# índice único sobre el par. Las operaciones de este módulo trabajan sobre ella directamente para no
+# cargar nunca la lista completa del usuario.
+Watch = User.watchlist.through
+
+# Máximo de subastas por llamada a la API de seguimiento en bloque.
+MAX_BULK_IDS = 1000
+
+
+# Indica si el usuario sigue la subasta: una búsqueda por el índice único de la tabla intermedia.
+def is_watching(user, listing_id):
+    if not user.is_authenticated:
+        return False
+    return Watch.objects.filter(user_id=user.pk, auctionlisting_id=listing_id).exists()
+
+
+# Empieza a seguir las subastas indicadas que existan. Es idempotente: las que ya seguía se ignoran
+# gracias al índice único, sin leerlas antes.
+def watch(user, listing_ids):
+    listing_ids = AuctionListing.objects.filter(id__in=set(listing_ids)).values_list("id", flat=True)
+    Watch.objects.bulk_create(
+        [Watch(user_id=user.pk, auctionlisting_id=listing_id) for listing_id in listing_ids],
+        ignore_conflicts=True,
+    )
+
+
+# Deja de seguir las subastas indicadas; las que no seguía se ignoran.
+def unwatch(user, listing_ids):
+    Watch.objects.filter(user_id=user.pk, auctionlisting_id__in=set(listing_ids)).delete()
+
+
+# Alterna el seguimiento en una sola transacción y devuelve si el usuario queda siguiendo la subasta.
+# Primero intenta borrar: si no había fila, la inserta. Dos peticiones simultáneas no pueden dejar una
+# fila duplicada ni fallar por el índice único.
+def toggle(user, listing_id):
+    with transaction.atomic():
+        deleted, _ = Watch.objects.filter(user_id=user.pk, auctionlisting_id=listing_id).delete()
+        if deleted:
+            return False
+        watch(user, [listing_id])
+        return True
@@ -42,28 +42,41 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'auctions.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'auctions.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'auctions.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'commerce.urls'
 
+# Las plantillas se compilan una vez por proceso con el cargador cacheado (con runserver se recargan al
+# cambiar el archivo). Con AUCTIONS_CACHED_TEMPLATES=0 se vuelven a leer y compilar en cada render.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+AUCTIONS_CACHED_TEMPLATES = os.environ.get('AUCTIONS_CACHED_TEMPLATES', '1') != '0'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'auctions.metrics.TimedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)] if AUCTIONS_CACHED_TEMPLATES else TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'auctions.context_processors.notifications',
             ],
         },
     },
@@ -75,15 +88,131 @@ WSGI_APPLICATION = 'commerce.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# El perfil se elige con AUCTIONS_DB_PROFILE: sqlite (por defecto) o postgresql. En SQLite los PRAGMA de
+# AUCTIONS_SQLITE_PRAGMAS se aplican a cada conexión nueva (ver auctions/db.py). El modo WAL, con el que
+# los lectores no esperan a los escritores, no está entre ellos porque queda guardado en el archivo de
+# la base de datos: se activa una sola vez en cada despliegue con `manage.py sqlite_journal_mode wal`,
+# para que los comandos de desarrollo no reescriban el db.sqlite3 del repositorio. En PostgreSQL las
+# conexiones son persistentes (AUCTIONS_DB_CONN_MAX_AGE segundos) o, con AUCTIONS_DB_POOL_SIZE, se toman
+# de un pool de psycopg (requiere psycopg[pool]).
+
+DATABASE_PROFILES = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get('AUCTIONS_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': int(os.environ.get('AUCTIONS_DB_CONN_MAX_AGE', 600)),
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('AUCTIONS_DB_NAME', 'commerce'),
+        'USER': os.environ.get('AUCTIONS_DB_USER', ''),
+        'PASSWORD': os.environ.get('AUCTIONS_DB_PASSWORD', ''),
+        'HOST': os.environ.get('AUCTIONS_DB_HOST', ''),
+        'PORT': os.environ.get('AUCTIONS_DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('AUCTIONS_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[os.environ.get('AUCTIONS_DB_PROFILE', 'sqlite')],
+}
+
+if DATABASES['default']['ENGINE'].endswith('postgresql') and os.environ.get('AUCTIONS_DB_POOL_SIZE'):
+    # El pool sustituye a las conexiones persistentes: Django exige CONN_MAX_AGE = 0 con él.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {'min_size': 2, 'max_size': int(os.environ['AUCTIONS_DB_POOL_SIZE'])},
     }
+
+AUCTIONS_SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.environ.get('AUCTIONS_SQLITE_BUSY_TIMEOUT', 5000)),  # Milisegundos.
+    'synchronous': 'normal',
+    'mmap_size': int(os.environ.get('AUCTIONS_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
 }
 
 AUTH_USER_MODEL = 'auctions.User'
 
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# El backend se elige con AUCTIONS_CACHE_BACKEND: locmem (por defecto), file o redis (cualquier
+# servidor que hable el protocolo de Redis). Las entradas de cada subasta se invalidan con señales,
+# cambiando su versión (ver auctions/cache.py); el TIMEOUT limita cuánto ocupan las de versiones
+# anteriores. locmem y file solo sirven con un único proceso: las tarjetas y el detalle cacheados
+# necesitan una caché compartida (redis) en cuanto hay varios workers, o cada uno serviría su copia
+# sin enterarse de las invalidaciones de los demás.
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auctions',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('AUCTIONS_CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('AUCTIONS_CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+    },
+}
+
+AUCTIONS_CACHE_BACKEND = os.environ.get('AUCTIONS_CACHE_BACKEND', 'locmem')
+
+# Backends cuyas entradas ven todos los procesos (y todas las máquinas) que usan la misma configuración.
+SHARED_CACHE_BACKENDS = {'redis'}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[AUCTIONS_CACHE_BACKEND],
+        'TIMEOUT': int(os.environ.get('AUCTIONS_CACHE_TIMEOUT', 24 * 60 * 60)),
+    },
+}
+
+AUCTIONS_CACHE_ALIAS = 'default'
+
+# Sessions and messages
+# El motor de sesiones se elige con AUCTIONS_SESSION_ENGINE: cached_db (lee la sesión de la caché y solo
+# va a la base de datos si no está), db o signed_cookies (la sesión viaja firmada en la cookie, sin tabla
+# ni caché; su contenido es legible por el cliente). cached_db necesita una caché compartida: con locmem
+# o file cada proceso guarda su copia de la sesión, y al cerrar sesión o rotarla solo se borra la del
+# proceso que atendió la petición, así que en los demás la sesión anterior sigue siendo válida. Por eso
+# el motor por defecto es cached_db solo con una caché de SHARED_CACHE_BACKENDS, y db con las demás.
+# Los mensajes (ofertas aceptadas o rechazadas) van siempre en una cookie, así que mostrarlos no escribe
+# la sesión.
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('AUCTIONS_SESSION_ENGINE', 'cached_db' if AUCTIONS_CACHE_BACKEND in SHARED_CACHE_BACKENDS else 'db')]
+
+SESSION_CACHE_ALIAS = 'default'
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Password hashing
+# PBKDF2 con AUCTIONS_PBKDF2_ITERATIONS iteraciones (por defecto, las de Django). Es el coste de cada
+# inicio de sesión y cada registro: al cambiarlo, las contraseñas guardadas se recalculan con el nuevo
+# valor en el siguiente inicio de sesión de cada usuario (ver auctions/hashers.py y bench_login).
+
+AUCTIONS_PBKDF2_ITERATIONS = int(os.environ.get('AUCTIONS_PBKDF2_ITERATIONS', 1_000_000))
+
+PASSWORD_HASHERS = [
+    'auctions.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -120,4 +249,137 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
+# collectstatic copia los archivos a STATIC_ROOT y StaticFilesMiddleware los sirve desde ahí (ver
+# auctions/staticfiles.py). Con AUCTIONS_STATIC_STORAGE=manifest (por defecto sin DEBUG) los nombres
+# llevan el hash de su contenido y se sirven con caché inmutable, y los archivos con las extensiones de
+# AUCTIONS_STATIC_COMPRESS_EXTENSIONS de al menos AUCTIONS_STATIC_COMPRESS_MIN_BYTES bytes se guardan
+# también comprimidos con gzip y, si está instalado el paquete brotli, con brotli. Con plain (por
+# defecto con DEBUG) no hace falta ejecutar collectstatic. Los archivos sin hash se cachean
+# AUCTIONS_STATIC_MAX_AGE segundos.
+
 STATIC_URL = '/static/'
+
+STATIC_ROOT = os.environ.get('AUCTIONS_STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+
+STATIC_STORAGES = {
+    'plain': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    'manifest': 'auctions.staticfiles.CompressedManifestStaticFilesStorage',
+}
+
+AUCTIONS_STATIC_STORAGE = os.environ.get('AUCTIONS_STATIC_STORAGE', 'plain' if DEBUG else 'manifest')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': STATIC_STORAGES[AUCTIONS_STATIC_STORAGE]},
+}
+
+AUCTIONS_STATIC_COMPRESS_EXTENSIONS = ('css', 'js', 'svg', 'json', 'txt', 'html', 'xml', 'map')
+
+AUCTIONS_STATIC_COMPRESS_MIN_BYTES = 200
+
+AUCTIONS_STATIC_MAX_AGE = int(os.environ.get('AUCTIONS_STATIC_MAX_AGE', 60))
+
+
+# Listing images
+# Imágenes subidas o descargadas de image_url, con nombres derivados de su contenido (ver auctions/images.py).
+# El comando process_images genera las miniaturas de AUCTIONS_THUMBNAIL_WIDTHS píxeles de ancho con
+# AUCTIONS_IMAGE_WORKERS procesos (por defecto, uno por CPU).
+
+MEDIA_ROOT = os.environ.get('AUCTIONS_MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+MEDIA_URL = '/media/'
+
+AUCTIONS_THUMBNAIL_WIDTHS = (160, 320, 640)
+
+AUCTIONS_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+AUCTIONS_IMAGE_WORKERS = int(os.environ['AUCTIONS_IMAGE_WORKERS']) if os.environ.get('AUCTIONS_IMAGE_WORKERS') else None
+
+
+# Pagination
+# Tamaño de página de los listados paginados por cursor (index, categorías y watchlist) y de los
+# comentarios del detalle de una subasta.
+
+AUCTIONS_PAGE_SIZE = 24
+
+AUCTIONS_COMMENTS_PAGE_SIZE = 20
+
+AUCTIONS_MAX_PAGE_SIZE = 100
+
+
+# Real-time listing events (Server-Sent Events)
+# Con AUCTIONS_EVENTS_STREAMING=1 el detalle de una subasta activa abre un EventSource y listing_events
+# mantiene la conexión abierta enviando las ofertas y el cierre. Solo debe activarse al servir la
+# aplicación por ASGI (commerce.asgi.application): por WSGI (runserver incluido) Django lee el stream
+# asíncrono entero antes de enviarlo, así que cada visitante ocuparía un worker hasta el cierre de la
+# subasta sin recibir nada. Por WSGI, o con la opción desactivada (por defecto), listing_events envía solo
+# el estado actual y pide al navegador que vuelva a conectar tras AUCTIONS_EVENTS_RETRY segundos.
+# Broker que reparte los eventos de ofertas y cierres a los clientes conectados. Cada cliente tiene una
+# cola de AUCTIONS_EVENTS_MAX_QUEUE eventos; si descarta más de AUCTIONS_EVENTS_MAX_DROPPED se le desconecta.
+
+AUCTIONS_EVENTS_STREAMING = os.environ.get('AUCTIONS_EVENTS_STREAMING', '0') == '1'
+
+AUCTIONS_EVENTS_RETRY = 60
+
+AUCTIONS_EVENTS_BROKER = 'auctions.streaming.InProcessBroker'
+
+AUCTIONS_EVENTS_MAX_QUEUE = 16
+
+AUCTIONS_EVENTS_MAX_DROPPED = 256
+
+AUCTIONS_EVENTS_KEEPALIVE = 15
+
+
+# Request metrics
+# Límites (en segundos) del histograma de latencia por vista publicado en /metrics, y umbral a partir
+# del cual una petición se registra con sus consultas SQL en el logger "auctions.slow_requests"
+# (None lo desactiva). /metrics y /metrics/cache solo responden a usuarios staff y a las IP de
+# AUCTIONS_METRICS_ALLOWED_IPS (separadas por comas, p. ej. la del servidor de Prometheus); al resto,
+# con un 404.
+
+AUCTIONS_METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+AUCTIONS_SLOW_REQUEST_SECONDS = float(os.environ['AUCTIONS_SLOW_REQUEST_SECONDS']) if os.environ.get('AUCTIONS_SLOW_REQUEST_SECONDS') else None
+
+AUCTIONS_METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('AUCTIONS_METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
+
+# Background tasks
+# Cola de tareas en la base de datos (ver auctions/tasks.py), procesada por el comando run_tasks. Una
+# tarea que falla se reintenta hasta AUCTIONS_TASK_MAX_ATTEMPTS veces, esperando AUCTIONS_TASK_BACKOFF
+# segundos la primera vez y el doble cada vez siguiente (hasta AUCTIONS_TASK_MAX_BACKOFF). Una tarea
+# reclamada por un worker que muere vuelve a la cola tras AUCTIONS_TASK_LEASE segundos.
+
+AUCTIONS_TASK_MAX_ATTEMPTS = 5
+
+AUCTIONS_TASK_BACKOFF = 2.0
+
+AUCTIONS_TASK_MAX_BACKOFF = 600.0
+
+AUCTIONS_TASK_LEASE = 300.0
+
+
+# Rate limiting and request coalescing
+# Peticiones por segundo (rate) y ráfaga máxima (burst) por cliente para cada vista; con methods, solo
+# se limitan esos métodos. El cliente es el usuario o, si es anónimo, la IP. Los cubos se guardan en la
+# memoria de cada proceso (MemoryBackend) o, con AUCTIONS_RATELIMIT_BACKEND=cache, en la caché
+# AUCTIONS_RATELIMIT_CACHE_ALIAS compartida entre procesos (ver auctions/ratelimit.py).
+
+RATELIMIT_BACKENDS = {
+    'memory': 'auctions.ratelimit.MemoryBackend',
+    'cache': 'auctions.ratelimit.CacheBackend',
+}
+
+AUCTIONS_RATELIMIT_BACKEND = RATELIMIT_BACKENDS[os.environ.get('AUCTIONS_RATELIMIT_BACKEND', 'memory')]
+
+AUCTIONS_RATELIMIT_CACHE_ALIAS = 'default'
+
+AUCTIONS_RATELIMITS = {
+    'auctions:bid': {'rate': 1.0, 'burst': 5, 'methods': ['POST']},
+    'auctions:comment': {'rate': 0.5, 'burst': 5, 'methods': ['POST']},
+    'auctions:listing_detail': {'rate': 5.0, 'burst': 30},
+    'auctions:listing_comments': {'rate': 5.0, 'burst': 30},
+}
+
+# Agrupar las peticiones simultáneas idénticas del detalle de una subasta (ver auctions/singleflight.py).
+AUCTIONS_SINGLE_FLIGHT = True